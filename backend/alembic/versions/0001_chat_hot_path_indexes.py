@@ -0,0 +1,39 @@
+"""Composite indexes for the hot chat queries
+
+Tables themselves are still created by ``init_db()``; this revision brings
+existing databases up to the indexes declared on the models.
+
+Revision ID: 0001_chat_hot_path_indexes
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0001_chat_hot_path_indexes"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # get_conversation_context / get_conversation_messages:
+    #   WHERE conversation_id = ? ORDER BY created_at
+    op.create_index(
+        "ix_messages_conversation_created",
+        "messages",
+        ["conversation_id", "created_at"],
+        if_not_exists=True,
+    )
+    # get_user_conversations: WHERE session_id = ? ORDER BY updated_at DESC
+    op.create_index(
+        "ix_conversations_session_updated",
+        "conversations",
+        ["session_id", "updated_at"],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_conversations_session_updated", table_name="conversations", if_exists=True)
+    op.drop_index("ix_messages_conversation_created", table_name="messages", if_exists=True)
@@ -0,0 +1,50 @@
+"""Extend hot-path indexes with id for keyset pagination
+
+Listing and history now page on ``(timestamp, id)``; with ``id`` as the
+trailing key both the filter and the full ORDER BY are served by the index.
+
+Revision ID: 0002_keyset_pagination_indexes
+Revises: 0001_chat_hot_path_indexes
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "0002_keyset_pagination_indexes"
+down_revision = "0001_chat_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_messages_conversation_created_id",
+        "messages",
+        ["conversation_id", "created_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_conversations_session_updated_id",
+        "conversations",
+        ["session_id", "updated_at", "id"],
+        if_not_exists=True,
+    )
+    op.drop_index("ix_messages_conversation_created", table_name="messages", if_exists=True)
+    op.drop_index("ix_conversations_session_updated", table_name="conversations", if_exists=True)
+
+
+def downgrade():
+    op.create_index(
+        "ix_messages_conversation_created",
+        "messages",
+        ["conversation_id", "created_at"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_conversations_session_updated",
+        "conversations",
+        ["session_id", "updated_at"],
+        if_not_exists=True,
+    )
+    op.drop_index("ix_conversations_session_updated_id", table_name="conversations", if_exists=True)
+    op.drop_index("ix_messages_conversation_created_id", table_name="messages", if_exists=True)
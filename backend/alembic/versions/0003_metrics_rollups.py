@@ -0,0 +1,56 @@
+"""Metrics rollup tables for the admin dashboard
+
+Creates ``metric_counters`` and ``message_rollups_hourly`` and backfills
+them from existing messages so the counters start out exact.
+
+Revision ID: 0003_metrics_rollups
+Revises: 0002_keyset_pagination_indexes
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_metrics_rollups"
+down_revision = "0002_keyset_pagination_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "metric_counters",
+        sa.Column("name", sa.String(64), primary_key=True),
+        sa.Column("value", sa.Integer, nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "message_rollups_hourly",
+        sa.Column("bucket_start", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("tier", sa.String(100), primary_key=True),
+        sa.Column("message_count", sa.Integer, nullable=False),
+        if_not_exists=True,
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        bucket = "date_trunc('hour', created_at)"
+    else:
+        # Matches SQLAlchemy's SQLite DATETIME storage format
+        bucket = "strftime('%Y-%m-%d %H:00:00.000000', created_at)"
+
+    op.execute("DELETE FROM metric_counters WHERE name = 'messages'")
+    op.execute("INSERT INTO metric_counters (name, value) SELECT 'messages', count(*) FROM messages")
+    op.execute("DELETE FROM message_rollups_hourly")
+    op.execute(
+        "INSERT INTO message_rollups_hourly (bucket_start, tier, message_count) "
+        f"SELECT {bucket} AS bucket_start, "
+        "CASE WHEN role = 'user' THEN 'user' ELSE COALESCE(intent, 'unknown') END AS tier, "
+        "count(*) FROM messages "
+        f"WHERE created_at IS NOT NULL GROUP BY {bucket}, "
+        "CASE WHEN role = 'user' THEN 'user' ELSE COALESCE(intent, 'unknown') END"
+    )
+
+
+def downgrade():
+    op.drop_table("message_rollups_hourly", if_exists=True)
+    op.drop_table("metric_counters", if_exists=True)
@@ -1,7 +1,7 @@
 """Application configuration using Pydantic BaseSettings."""
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -11,6 +11,51 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./healthcare_chatbot.db"
     SQLITE_FALLBACK: bool = True
+    SQLITE_READ_POOL_SIZE: int = 4           # read-only WAL connections
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456        # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 65536        # 64 MiB page cache per connection
+
+    # Chat persistence (write-behind buffer)
+    CHAT_WRITE_BATCH_SIZE: int = 200
+    CHAT_WRITE_FLUSH_INTERVAL: float = 0.25  # seconds
+    CHAT_WRITE_MAX_RETRIES: int = 5          # failed batch flushes before rows are written one by one
+    CHAT_WRITE_RETRY_BACKOFF: float = 0.5    # seconds, doubled per consecutive failure
+    CHAT_WRITE_MAX_BACKOFF: float = 30.0     # seconds
+    CHAT_WRITE_MAX_BACKLOG: int = 10000      # buffered messages before /send answers 503
+
+    # Admin dashboard
+    ADMIN_METRICS_CACHE_TTL: float = 15.0    # seconds
+
+    # Rate limiting (token bucket per client IP)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: int = 60          # refill rate and burst size
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = {  # longest path prefix wins; 0 = exempt
+        "/api/health": 0,
+        "/metrics": 0,
+        "/api/chat/send": 5,
+        "/api/auth/login": 3,
+        "/api/auth/register": 3,
+        "/api/symptoms": 2,
+    }
+    # Proxies whose X-Forwarded-For is believed (IPs/CIDRs; "*" = any direct peer).
+    # The client is the right-most forwarded address that isn't a trusted proxy.
+    TRUSTED_PROXIES: str = "127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+
+    # AI tier quotas (per user, or per client IP when anonymous; per window)
+    QUOTA_ENABLED: bool = True
+    QUOTA_WINDOW_SECONDS: int = 3600
+    QUOTA_TIER2_SECONDS: float = 120.0       # local model generation time
+    QUOTA_TIER2_RESERVE_SECONDS: float = 15.0  # held per Tier 2 call until its duration is known
+    QUOTA_TIER3_TOKENS: int = 20000          # NVIDIA API tokens
+    QUOTA_TIER3_RESERVE_TOKENS: int = 1500   # held per Tier 3 call until its token count is known
+    QUOTA_REDIS: bool = False                # share usage across workers via REDIS_URL
+
+    # Symptom checker sessions
+    SYMPTOM_SESSION_BACKEND: str = "memory"  # "memory" or "redis"
+    SYMPTOM_SESSION_TTL: int = 1800          # seconds since last answer
+    SYMPTOM_SESSION_MAX: int = 10000         # in-memory LRU bound
+    SYMPTOM_TOKEN_SECRET: str = ""           # signs stateless path tokens ("" = derive from JWT_SECRET_KEY)
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -25,14 +70,52 @@ class Settings(BaseSettings):
     LOCAL_AI_MAX_TOKENS: int = 300
     LOCAL_AI_ADAPTER_PATH: str = ""          # e.g. models/medical_lora_adapter
 
+    # Tier 3 circuit breaker (NVIDIA API)
+    TIER3_BREAKER_FAILURES: int = 5          # consecutive failed calls before the circuit opens
+    TIER3_BREAKER_RESET_SECONDS: float = 30.0  # open period before a trial call is let through
+
+    # Metrics
+    METRICS_ENABLED: bool = True             # serve Prometheus metrics on /metrics
+    METRICS_TOKEN: str = ""                  # bearer token scrapers must send; unset = /metrics off when APP_ENV=production
+    TRACING_OTEL: bool = True                # also emit stage spans via OpenTelemetry if it is installed
+
+    # Diagnostics (admin sampling profiler, event-loop lag monitor)
+    PROFILER_MAX_SECONDS: float = 30.0       # upper bound on one profile's duration
+    PROFILER_INTERVAL_MS: float = 10.0       # default sampling period (100 Hz)
+    LOOP_LAG_MONITOR_ENABLED: bool = True
+    LOOP_LAG_THRESHOLD_MS: float = 100.0     # log the loop thread's stack when blocked this long
+    LOOP_LAG_INTERVAL_MS: float = 50.0       # heartbeat period
+
+    # Health checks
+    HEALTH_CHECK_TTL: float = 5.0            # seconds a readiness result is reused between probes
+    HEALTH_DB_TIMEOUT: float = 2.0           # seconds before the database check counts as down
+    HEALTH_READY_CHECKS: str = "database,tier2"  # checks that must pass for /api/health/ready (tier3 is a shared external API)
+
     # JWT
     JWT_SECRET_KEY: str = "dev-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    JWT_SIGNING_KEYS: str = ""               # rotation: "kid1:secret1,kid2:secret2"
+    JWT_ACTIVE_KID: str = ""                 # kid used for new tokens ("" = JWT_SECRET_KEY)
+    JWT_CACHE_MAX_ENTRIES: int = 10000       # verified-token LRU
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12                  # changing this rehashes on next login
+    AUTH_HASH_WORKERS: int = 2               # max concurrent bcrypt operations
+
+    # Authenticated-user cache
+    USER_CACHE_TTL: float = 30.0             # seconds
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_REDIS: bool = False           # share entries across workers via REDIS_URL
 
     # Encryption
     AES_ENCRYPTION_KEY: str = "0123456789abcdef0123456789abcdef"
+    ENCRYPT_AT_REST: bool = True             # encrypt EncryptedText columns (message content) on write
+    ENCRYPTION_KEYS: str = ""                # rotation: "kid1:key1,kid2:key2", hex or base64 ("default" = AES_ENCRYPTION_KEY)
+    ENCRYPTION_ACTIVE_KID: str = "default"   # kid used for newly written values
+    ENCRYPTION_REENCRYPT_ON_STARTUP: bool = False  # background job moving old rows to the active kid
+    ENCRYPTION_REENCRYPT_BATCH: int = 500    # rows per re-encryption transaction
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
@@ -45,6 +128,14 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def trusted_proxies_list(self) -> List[str]:
+        return [entry.strip() for entry in self.TRUSTED_PROXIES.split(",") if entry.strip()]
+
+    @property
+    def health_ready_checks_list(self) -> List[str]:
+        return [name.strip() for name in self.HEALTH_READY_CHECKS.split(",") if name.strip()]
+
     @property
     def is_sqlite(self) -> bool:
         return "sqlite" in self.DATABASE_URL
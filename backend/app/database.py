@@ -1,25 +1,80 @@
 """SQLAlchemy async database engine and session management."""
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import text
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.services.metrics import register_pool
 
 
-# Create async engine
-if settings.is_sqlite:
+def _is_memory_sqlite(url: str) -> bool:
+    return ":memory:" in url or url.rstrip("/").endswith("sqlite+aiosqlite:")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, read_only: bool):
+    """Per-connection SQLite tuning, applied on every new pooled connection."""
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # WAL is persistent in the database file; setting it from the writer
+        # is enough for readers to pick it up.
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    # Negative cache_size is interpreted by SQLite as KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def create_sqlite_engine(url: str, *, read_only: bool = False, pool_size: int = 1) -> AsyncEngine:
+    """
+    Build an aiosqlite engine for one side of the writer/reader split.
+
+    The writer engine holds exactly one connection so writes are serialised
+    in-process instead of fighting over SQLite's file lock.  Reader engines
+    hold a small pool of ``query_only`` connections which, under WAL, read a
+    consistent snapshot without ever blocking on (or blocking) the writer.
+    """
+    engine = create_async_engine(
+        url,
+        echo=settings.APP_DEBUG,
+        connect_args={"check_same_thread": False},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=30,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, read_only=read_only)
+
+    return engine
+
+
+# Create async engines
+if settings.is_sqlite and _is_memory_sqlite(settings.async_database_url):
     from sqlalchemy.pool import StaticPool
 
-    # StaticPool forces all async sessions to share a single underlying
-    # SQLite connection, which completely eliminates "database is locked"
-    # errors caused by concurrent writers.  SQLite's asyncio event-loop
-    # serialisation ensures writes never actually race.
+    # An in-memory database only exists inside a single connection, so the
+    # reader/writer split is impossible — every session shares that one.
     engine = create_async_engine(
         settings.async_database_url,
         echo=settings.APP_DEBUG,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+    read_engine = engine
+elif settings.is_sqlite:
+    engine = create_sqlite_engine(settings.async_database_url, read_only=False, pool_size=1)
+    read_engine = create_sqlite_engine(
+        settings.async_database_url,
+        read_only=True,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+    )
 else:
     engine = create_async_engine(
         settings.async_database_url,
@@ -27,9 +82,16 @@ else:
         pool_size=20,
         max_overflow=10,
     )
+    read_engine = engine
+
+register_pool("writer", engine)
+if read_engine is not engine:
+    register_pool("reader", read_engine)
 
-# Session factory
+# Session factories — writes go through ``async_session``, read-only
+# endpoints use ``async_read_session`` so they never queue behind the writer.
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+async_read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
@@ -50,12 +112,31 @@ async def get_db():
             await session.close()
 
 
+async def get_read_db():
+    """Dependency that provides a read-only database session."""
+    async with async_read_session() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Dependency for handlers that manage their own short transactions."""
+    return async_session
+
+
+def get_read_session_factory() -> async_sessionmaker:
+    """Read-only counterpart of ``get_session_factory`` (e.g. for streaming)."""
+    return async_read_session
+
+
 async def init_db():
-    """Create all tables and configure SQLite for concurrent async access."""
+    """Create all tables (SQLite pragmas are applied per connection on connect)."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-        if settings.is_sqlite:
-            # WAL + synchronous=NORMAL: safe and fast for concurrent access
-            await conn.execute(text("PRAGMA journal_mode=WAL"))
-            await conn.execute(text("PRAGMA synchronous=NORMAL"))
\ No newline at end of file
+    from app.services.admin_metrics import ensure_counters
+    async with async_session() as session:
+        await ensure_counters(session)
@@ -13,38 +13,73 @@ if sys.platform == "win32":
         if isinstance(handler, logging.StreamHandler) and hasattr(handler.stream, "reconfigure"):
             handler.stream.reconfigure(encoding="utf-8", errors="replace")
 
+import asyncio
+import importlib.util
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.database import init_db
-from app.routers import auth, chat, symptom_checker, appointments
+from app.routers import auth, chat, symptom_checker, appointments, health, metrics, diagnostics, admin
 from app.middleware.security_headers import SecurityHeadersMiddleware
+from app.middleware.rate_limiter import RateLimiterMiddleware
+from app.services.warmup import warmup
+
+logger = logging.getLogger(__name__)
+
+
+def _local_ai_installed() -> bool:
+    """Whether torch + transformers are importable, without importing them (~seconds)."""
+    return all(importlib.util.find_spec(name) is not None for name in ("torch", "transformers"))
+
+
+async def _warm_nlp():
+    # Pre-warm the NLP pipeline so the first chat request doesn't trigger a
+    # 30-60 second cold start (spaCy + scikit-learn model loading).
+    from app.routers.chat import _get_nlp_pipeline
+    await _get_nlp_pipeline()
+
+
+async def _warm_local_ai():
+    # Tier 2 counts towards readiness, so load it now rather than on the
+    # first mid-confidence request
+    from app.services.local_ai_service import local_ai_service
+    if local_ai_service.is_configured:
+        await local_ai_service._ensure_loaded()
+
+
+async def _warm_ai_client():
+    from app.services.gemini_service import gemini_service
+    try:
+        await asyncio.to_thread(gemini_service.initialize)
+    except ValueError as e:
+        # Lazy — will retry on first request if the key is missing
+        logger.warning(f"AI service not ready: {e}. Set NVIDIA_API_KEY in .env and restart.")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan: startup and shutdown events."""
-    # Startup
+    # Startup — only what requests cannot work without; heavy subsystems
+    # warm up in the background (see /api/health/ready).
     await init_db()
 
-    # Initialize AI service (lazy — will retry on first request if key missing)
+    # Fail fast on a malformed or public encryption key rather than on the first message
+    if settings.ENCRYPT_AT_REST:
+        from app.services.encryption import check_production_key, get_keyring
+        check_production_key()
+        get_keyring()
+
     from app.services.gemini_service import gemini_service
-    try:
-        gemini_service.initialize()
-    except ValueError as e:
-        import logging
-        logging.warning(f"AI service not ready: {e}. Set NVIDIA_API_KEY in .env and restart.")
     app.state.gemini_service = gemini_service
 
     # Initialize Local AI service (lazy model load on first request)
     from app.services.local_ai_service import local_ai_service
     if settings.LOCAL_AI_ENABLED:
-        try:
-            import torch  # noqa: F401 — only available locally
-            import logging as _log
-            _log.getLogger(__name__).info(
+        if _local_ai_installed():
+            logger.info(
                 f"Local AI enabled: {settings.LOCAL_AI_MODEL} "
                 f"(adapter: '{settings.LOCAL_AI_ADAPTER_PATH or 'none'}')"
             )
@@ -54,29 +89,52 @@ async def lifespan(app: FastAPI):
                 max_tokens=settings.LOCAL_AI_MAX_TOKENS,
                 use_quantize=settings.LOCAL_AI_QUANTIZE,
             )
-        except ImportError:
-            import logging as _log
-            _log.getLogger(__name__).info(
+        else:
+            logger.info(
                 "[LocalAI] torch/transformers not installed — Local AI disabled. "
                 "NVIDIA API will be used as fallback."
             )
     app.state.local_ai_service = local_ai_service
-
-    # Pre-warm NLP pipeline so the first chat request doesn't trigger
-    # a 30-60 second cold-start (spaCy + scikit-learn model loading).
-    import logging as _nlp_log
-    _nlp_log.getLogger(__name__).info("Pre-warming NLP pipeline...")
-    try:
-        from app.routers.chat import _get_nlp_pipeline
-        await _get_nlp_pipeline()
-        _nlp_log.getLogger(__name__).info("NLP pipeline ready.")
-    except Exception as _nlp_exc:
-        _nlp_log.getLogger(__name__).warning(f"NLP pre-warm skipped (non-fatal): {_nlp_exc}")
+    app.state.nlp_pipeline = chat._nlp_pipeline
+
+    # Start the chat message write-behind flusher
+    from app.services.chat_service import message_writer
+    message_writer.start()
+
+    warmup.start({"nlp": _warm_nlp, "ai_client": _warm_ai_client, "local_ai": _warm_local_ai})
+
+    # Move rows encrypted under retired keys (or still in plaintext) to the
+    # active key, in small batches alongside normal traffic
+    reencrypt_task = None
+    if settings.ENCRYPT_AT_REST and settings.ENCRYPTION_REENCRYPT_ON_STARTUP:
+        from app.services.reencryption import reencrypt_all
+        reencrypt_task = asyncio.create_task(reencrypt_all())
+
+    # Log the loop thread's stack whenever something blocks the event loop
+    lag_monitor = None
+    if settings.LOOP_LAG_MONITOR_ENABLED:
+        from app.services.profiler import LoopLagMonitor
+        lag_monitor = LoopLagMonitor(
+            threshold=settings.LOOP_LAG_THRESHOLD_MS / 1000,
+            interval=settings.LOOP_LAG_INTERVAL_MS / 1000,
+        )
+        lag_monitor.start()
 
     yield
 
-    # Shutdown
-    pass
+    # Shutdown — drain buffered chat messages before the process exits
+    if reencrypt_task is not None:
+        reencrypt_task.cancel()
+        try:
+            await reencrypt_task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("Re-encryption job failed")
+    if lag_monitor is not None:
+        await lag_monitor.stop()
+    await warmup.stop()
+    await message_writer.stop()
 
 
 app = FastAPI(
@@ -87,6 +145,8 @@ app = FastAPI(
 )
 
 # --- Middleware ---
+# Added first so it sits innermost: 429s still get CORS and security headers
+app.add_middleware(RateLimiterMiddleware, requests_per_minute=settings.RATE_LIMIT_PER_MINUTE)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
@@ -101,8 +161,8 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
 app.include_router(symptom_checker.router, prefix="/api/symptoms", tags=["Symptom Checker"])
 app.include_router(appointments.router, prefix="/api/appointments", tags=["Appointments"])
-
-
-@app.get("/api/health", tags=["Health"])
-async def health_check():
-    return {"status": "healthy", "version": "2.0.0"}
+app.include_router(health.router, prefix="/api/health", tags=["Health"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(diagnostics.router, prefix="/api/admin/diagnostics", tags=["Admin"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
@@ -1,11 +1,31 @@
-"""Redis-based token bucket rate limiter middleware."""
+"""
+Token bucket rate limiter middleware.
 
+Each client IP has one bucket holding up to ``requests_per_minute`` tokens,
+refilled at ``requests_per_minute / 60`` tokens per second. A request spends
+its route's cost (``RATE_LIMIT_ROUTE_COSTS``, longest path prefix wins), so
+a chat turn drains the bucket faster than a health check; cost 0 exempts a
+route entirely.
+
+With Redis the check-and-spend is one atomic Lua script (one round trip,
+shared across workers). When Redis is unavailable an in-process bucket
+takes over — approximate, since each worker then enforces the limit on its
+own — instead of failing fully open.
+
+Behind nginx or Render's router every connection comes from the proxy, so
+the client IP is taken from ``X-Forwarded-For`` when the direct peer is in
+``TRUSTED_PROXIES``: the right-most address that isn't itself a trusted
+proxy (left-most entries are client-supplied and can be forged).
+"""
+
+import ipaddress
+import logging
+import math
 import time
-import asyncio
-from typing import Optional
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 try:
     import redis.asyncio as aioredis
@@ -15,58 +35,176 @@ except ImportError:
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = bucket; ARGV = capacity, refill rate (tokens/s), cost.
+# Returns {allowed, retry_after_seconds}; floats go back as strings because
+# Redis truncates Lua numbers to integers.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class LocalTokenBucket:
+    """In-process token buckets, LRU-bounded by number of tracked clients."""
+
+    def __init__(self, capacity: float, rate: float, max_keys: int = 10000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, cost: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, ts = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - ts) * self.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / self.rate
+
+
+class ClientAddress:
+    """Resolves the client IP of a request from its peer and trusted proxy headers."""
+
+    def __init__(self, trusted_proxies: Iterable[str]):
+        entries = list(trusted_proxies)
+        self.trust_all = "*" in entries
+        self.networks = [ipaddress.ip_network(e, strict=False) for e in entries if e != "*"]
+
+    def _is_proxy(self, host: str) -> bool:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    def __call__(self, scope: Scope) -> str:
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not (self.trust_all or self._is_proxy(peer)):
+            return peer
+        forwarded = b",".join(v for k, v in scope.get("headers", ()) if k == b"x-forwarded-for")
+        hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+        if not hops:
+            return peer
+        if self.trust_all:
+            # Only the direct peer is known to be a proxy: take the address it saw
+            return hops[-1]
+        for hop in reversed(hops):
+            if not self._is_proxy(hop):
+                return hop
+        return hops[0]
+
+
+class RateLimiterMiddleware:
+    """Weighted token bucket rate limiter (pure ASGI)."""
 
-class RateLimiterMiddleware(BaseHTTPMiddleware):
-    """Token bucket rate limiter using Redis."""
+    REDIS_RETRY_SECONDS = 30.0
 
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.redis_client: Optional[object] = None
-        self._initialized = False
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        route_costs: Optional[Dict[str, int]] = None,
+        redis_client: Optional[object] = None,
+        trusted_proxies: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.capacity = float(requests_per_minute)
+        self.rate = requests_per_minute / 60.0
+        costs = settings.RATE_LIMIT_ROUTE_COSTS if route_costs is None else route_costs
+        # Longest prefix first so "/api/chat/send" beats "/api/chat"
+        self.route_costs = sorted(costs.items(), key=lambda item: len(item[0]), reverse=True)
+        self.local = LocalTokenBucket(self.capacity, self.rate)
+        self.client_address = ClientAddress(
+            settings.trusted_proxies_list if trusted_proxies is None else trusted_proxies
+        )
+        self.redis_client: Optional[object] = redis_client
+        self._script = redis_client.register_script(TOKEN_BUCKET_LUA) if redis_client is not None else None
+        self._next_connect = 0.0 if redis_client is None else math.inf
 
     async def _init_redis(self):
-        if self._initialized:
+        if self.redis_client is not None or not REDIS_AVAILABLE or time.monotonic() < self._next_connect:
             return
-        self._initialized = True
-        if REDIS_AVAILABLE:
+        self._next_connect = time.monotonic() + self.REDIS_RETRY_SECONDS
+        try:
+            client = aioredis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=2,
+            )
+            await client.ping()
+        except Exception:
+            logger.warning("Rate limiter: Redis unavailable, using in-process buckets")
+            return
+        self.redis_client = client
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    def cost_for(self, path: str) -> int:
+        for prefix, cost in self.route_costs:
+            if path.startswith(prefix):
+                return cost
+        return 1
+
+    async def _take(self, key: str, cost: int) -> Tuple[bool, float]:
+        if self._script is not None:
             try:
-                self.redis_client = aioredis.from_url(
-                    settings.REDIS_URL,
-                    decode_responses=True,
-                    socket_connect_timeout=2,
+                allowed, retry_after = await self._script(
+                    keys=[key], args=[self.capacity, self.rate, cost],
                 )
-                await self.redis_client.ping()
+                return bool(int(allowed)), float(retry_after)
             except Exception:
+                # Fall back locally and stop paying Redis timeouts until the retry window
+                logger.warning("Rate limiter: Redis call failed, using in-process buckets")
                 self.redis_client = None
+                self._script = None
+                self._next_connect = time.monotonic() + self.REDIS_RETRY_SECONDS
+        return self.local.take(key, cost)
 
-    async def dispatch(self, request: Request, call_next):
-        await self._init_redis()
-
-        # Skip rate limiting if Redis is not available
-        if self.redis_client is None:
-            return await call_next(request)
-
-        # Use IP + path as rate limit key
-        client_ip = request.client.host if request.client else "unknown"
-        key = f"rate_limit:{client_ip}:{request.url.path}"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
 
-        try:
-            # Token bucket: check current count
-            current = await self.redis_client.get(key)
-            if current is not None and int(current) >= self.requests_per_minute:
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Rate limit exceeded. Please try again later."},
-                )
+        cost = self.cost_for(scope["path"])
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
 
-            # Increment counter with TTL
-            pipe = self.redis_client.pipeline()
-            pipe.incr(key)
-            pipe.expire(key, 60)
-            await pipe.execute()
-        except Exception:
-            # Fail open — don't block requests if Redis has issues
-            pass
+        await self._init_redis()
+        key = f"rate_limit:{self.client_address(scope)}"
+        allowed, retry_after = await self._take(key, cost)
+        if not allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Please try again later."},
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
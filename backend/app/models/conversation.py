@@ -1,13 +1,18 @@
 """Conversation and Message database models."""
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
+from sqlalchemy.orm import relationship, query_expression, deferred
 from app.database import Base
+from app.models.types import EncryptedText
 
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # get_user_conversations: WHERE session_id = ? ORDER BY updated_at, id (keyset)
+        Index("ix_conversations_session_updated_id", "session_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String(64), nullable=False, index=True)
@@ -16,6 +21,9 @@ class Conversation(Base):
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    # Populated by listing queries via with_expression(); None otherwise
+    message_count = query_expression()
+
     # Relationships
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan",
                             order_by="Message.created_at")
@@ -23,11 +31,17 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Context / history reads: WHERE conversation_id = ? ORDER BY created_at, id (keyset)
+        Index("ix_messages_conversation_created_id", "conversation_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     role = Column(String(20), nullable=False)  # "user" or "assistant"
-    content = Column(Text, nullable=False)
+    # Encrypted at rest and not loaded with the row: readers that render it
+    # ask for it with undefer(Message.content), everything else never decrypts
+    content = deferred(Column(EncryptedText, nullable=False), raiseload=True)
     intent = Column(String(100), nullable=True)
     entities = Column(Text, nullable=True)
     is_emergency = Column(Boolean, default=False)
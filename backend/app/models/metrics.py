@@ -0,0 +1,23 @@
+"""Metrics rollup models — incrementally maintained counters for the admin dashboard."""
+
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+
+class MetricCounter(Base):
+    """Running total for an expensive-to-count table (e.g. ``messages``)."""
+
+    __tablename__ = "metric_counters"
+
+    name = Column(String(64), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class MessageRollup(Base):
+    """Messages created per hour, split by AI tier (``user`` for user turns)."""
+
+    __tablename__ = "message_rollups_hourly"
+
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    tier = Column(String(100), primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,32 @@
+"""Custom column types."""
+
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+
+from app.config import settings
+from app.services import encryption
+
+
+class EncryptedText(TypeDecorator):
+    """
+    Text encrypted at rest with the active key of ``encryption.get_keyring()``.
+
+    Values are encrypted when bound and decrypted when a result row carries
+    the column, so queries that don't select it never decrypt anything. Map
+    it with ``deferred(..., raiseload=True)`` so loading the entity doesn't
+    select it either. Ciphertexts are randomised: the column cannot be
+    compared, searched or indexed.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not settings.ENCRYPT_AT_REST:
+            return value
+        return encryption.get_keyring().encrypt(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return encryption.get_keyring().decrypt(value)
@@ -1,25 +1,35 @@
 """Admin panel routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import select, func
 from typing import List
 
-from app.database import get_db
-from app.schemas.admin import AdminUserResponse, SystemMetrics
+from app.database import get_db, get_read_db, get_read_session_factory
+from app.schemas.admin import AdminUserResponse, AdminUserUpdate, SystemMetrics, MetricsSeriesPoint, QuotaUsage
+from app.services import admin_metrics
+from app.services.chat_service import MessageWriteBehind, export_messages, get_message_writer
+from app.services.quota import QuotaManager, get_quota_manager
+from app.services.user_cache import UserPrincipal, user_cache
 from app.utils.dependencies import require_role
 from app.models.user import User, UserRole
 from app.models.conversation import Conversation, Message
 from app.models.appointment import Appointment
-from app.models.feedback import Feedback
+from app.utils.repository import update_returning
+
+try:
+    from app.models.feedback import Feedback
+except ImportError:  # feedback model not shipped with this deployment
+    Feedback = None
 
 router = APIRouter()
 
 
 @router.get("/users", response_model=List[AdminUserResponse])
 async def list_users(
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List all users in the system."""
     result = await db.execute(select(User).order_by(User.created_at.desc()))
@@ -29,7 +39,7 @@ async def list_users(
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
+    current_user: UserPrincipal = Depends(require_role(UserRole.ADMIN)),
     db: AsyncSession = Depends(get_db),
 ):
     """Delete a user (admin only)."""
@@ -42,27 +52,112 @@ async def delete_user(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
 
     await db.delete(user)
+    await db.commit()
+    await user_cache.invalidate(user_id)
     return {"message": f"User {user.email} deleted."}
 
 
+@router.patch("/users/{user_id}", response_model=AdminUserResponse)
+async def update_user_status(
+    user_id: int,
+    update: AdminUserUpdate,
+    current_user: UserPrincipal = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Activate or deactivate a user, or change their role (admin only)."""
+    if user_id == current_user.id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot change your own status.")
+
+    user = await update_returning(
+        db, User, where=[User.id == user_id], values=update.model_dump(exclude_none=True),
+    )
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+
+    await db.commit()
+    await user_cache.invalidate(user_id)
+    return user
+
+
 @router.get("/metrics", response_model=SystemMetrics)
 async def get_metrics(
-    current_user: User = Depends(require_role(UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get system usage metrics."""
-    users_count = await db.scalar(select(func.count(User.id)))
-    convos_count = await db.scalar(select(func.count(Conversation.id)))
-    msgs_count = await db.scalar(select(func.count(Message.id)))
-    appts_count = await db.scalar(select(func.count(Appointment.id)))
-    feedbacks_count = await db.scalar(select(func.count(Feedback.id)))
-    avg_rating = await db.scalar(select(func.avg(Feedback.rating)))
-
-    return SystemMetrics(
-        total_users=users_count or 0,
-        total_conversations=convos_count or 0,
-        total_messages=msgs_count or 0,
-        total_appointments=appts_count or 0,
-        total_feedbacks=feedbacks_count or 0,
-        average_rating=round(float(avg_rating), 2) if avg_rating else None,
+    """
+    Get system usage metrics.
+
+    Served from a short-TTL cache. On a miss the small tables are counted in
+    one combined query and the message total comes from the rollup counter
+    instead of a COUNT over ``messages``.
+    """
+    async def load() -> SystemMetrics:
+        counts = [
+            select(func.count(User.id)).scalar_subquery(),
+            select(func.count(Conversation.id)).scalar_subquery(),
+            select(func.count(Appointment.id)).scalar_subquery(),
+        ]
+        if Feedback is not None:
+            counts += [
+                select(func.count(Feedback.id)).scalar_subquery(),
+                select(func.avg(Feedback.rating)).scalar_subquery(),
+            ]
+        users_count, convos_count, appts_count, *feedback = (await db.execute(select(*counts))).one()
+        feedbacks_count, avg_rating = feedback or (0, None)
+        msgs_count = await admin_metrics.message_total(db)
+
+        return SystemMetrics(
+            total_users=users_count or 0,
+            total_conversations=convos_count or 0,
+            total_messages=msgs_count or 0,
+            total_appointments=appts_count or 0,
+            total_feedbacks=feedbacks_count or 0,
+            average_rating=round(float(avg_rating), 2) if avg_rating else None,
+        )
+
+    return await admin_metrics.metrics_cache.get_or_load("system", load)
+
+
+@router.get("/metrics/series", response_model=List[MetricsSeriesPoint])
+async def get_metrics_series(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    current_user: UserPrincipal = Depends(require_role(UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Messages per hour and AI tier mix, computed from the hourly rollups."""
+    async def load():
+        return await admin_metrics.message_series(db, hours)
+
+    return await admin_metrics.metrics_cache.get_or_load(f"series:{hours}", load)
+
+
+@router.get("/quotas", response_model=List[QuotaUsage])
+async def get_quota_usage(
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: UserPrincipal = Depends(require_role(UserRole.ADMIN)),
+    quotas: QuotaManager = Depends(get_quota_manager),
+):
+    """Tier 2 / Tier 3 usage this quota window, heaviest users / client IPs first."""
+    return await quotas.snapshot(limit)
+
+
+@router.get("/conversations/{conversation_id}/export")
+async def export_conversation_transcript(
+    conversation_id: int,
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_user: UserPrincipal = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+    writer: MessageWriteBehind = Depends(get_message_writer),
+):
+    """Stream any conversation's full transcript as NDJSON or CSV (clinicians and admins)."""
+    pending = writer.pending_rows(conversation_id)
+    exists = await db.scalar(select(Conversation.id).where(Conversation.id == conversation_id))
+    if exists is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found.")
+
+    return StreamingResponse(
+        export_messages(session_factory, Message.conversation_id == conversation_id, fmt=fmt, pending=pending),
+        media_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="conversation-{conversation_id}.{fmt}"'},
     )
@@ -5,19 +5,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate, AppointmentResponse
 from app.utils.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserPrincipal
 from app.models.appointment import Appointment
+from app.utils.repository import insert_returning, update_returning
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[AppointmentResponse])
 async def list_appointments(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get all appointments for the current user."""
     result = await db.execute(
@@ -31,47 +32,35 @@ async def list_appointments(
 @router.post("/", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_appointment(
     data: AppointmentCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Create a new appointment."""
-    appt = Appointment(user_id=current_user.id, **data.model_dump())
-    db.add(appt)
-    await db.flush()
-    await db.refresh(appt)
-    return appt
+    return await insert_returning(db, Appointment, user_id=current_user.id, **data.model_dump())
 
 
 @router.put("/{appointment_id}", response_model=AppointmentResponse)
 async def update_appointment(
     appointment_id: int,
     data: AppointmentUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Update an existing appointment."""
-    result = await db.execute(
-        select(Appointment).where(
-            Appointment.id == appointment_id,
-            Appointment.user_id == current_user.id,
-        )
+    appt = await update_returning(
+        db, Appointment,
+        where=[Appointment.id == appointment_id, Appointment.user_id == current_user.id],
+        values=data.model_dump(exclude_unset=True),
     )
-    appt = result.scalar_one_or_none()
     if not appt:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found.")
-
-    update_data = data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(appt, key, value)
-    await db.flush()
-    await db.refresh(appt)
     return appt
 
 
 @router.delete("/{appointment_id}")
 async def delete_appointment(
     appointment_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Delete an appointment."""
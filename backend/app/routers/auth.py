@@ -3,12 +3,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.auth import UserRegister, UserLogin, TokenResponse, UserResponse, ConsentRequest
-from app.services.auth_service import create_user, get_user_by_email, verify_password
+from app.services.auth_service import create_user, get_user_by_email, verify_and_update_password
+from app.utils.repository import update_returning
 from app.utils.jwt_handler import create_access_token, create_refresh_token
 from app.utils.dependencies import get_current_user
 from app.models.user import User
+from app.services.user_cache import UserPrincipal, user_cache
 
 router = APIRouter()
 
@@ -30,7 +32,11 @@ async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
 async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Authenticate and receive JWT tokens."""
     user = await get_user_by_email(db, credentials.email)
-    if not user or not verify_password(credentials.password, user.password_hash):
+    valid, new_hash = (
+        await verify_and_update_password(credentials.password, user.password_hash)
+        if user else (False, None)
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password.",
@@ -40,6 +46,9 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Account is deactivated.",
         )
+    if new_hash:
+        # Stored hash used an old cost factor — upgrade it transparently
+        user.password_hash = new_hash
 
     access_token = create_access_token({"sub": str(user.id), "role": user.role.value})
     refresh_token = create_refresh_token({"sub": str(user.id)})
@@ -50,7 +59,7 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
 @router.post("/consent")
 async def accept_consent(
     consent: ConsentRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Accept the medical disclaimer / consent."""
@@ -59,12 +68,24 @@ async def accept_consent(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You must accept the medical disclaimer to use the chat.",
         )
-    current_user.has_consented = True
-    await db.flush()
+    await update_returning(
+        db, User, where=[User.id == current_user.id], values={"has_consented": True},
+    )
+    # Commit before invalidating so a concurrent miss cannot re-cache the old value
+    await db.commit()
+    await user_cache.invalidate(current_user.id)
     return {"message": "Consent accepted successfully.", "has_consented": True}
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
     """Get current user profile."""
-    return current_user
+    user = await db.get(User, current_user.id)
+    if user is None:
+        # Deleted since the principal was cached
+        await user_cache.invalidate(current_user.id)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+    return user
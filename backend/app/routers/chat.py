@@ -1,18 +1,26 @@
 """Chat routes — send messages, stream responses, manage conversations."""
 
 import logging
+import time
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import List, Optional
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_read_db, get_session_factory, get_read_session_factory
+from app.models.conversation import Conversation, Message
 from app.schemas.chat import (
     ChatMessageRequest, ChatMessageResponse,
     ConversationResponse, ConversationDetailResponse,
 )
-from app.services import chat_service
+from app.middleware.rate_limiter import ClientAddress
+from app.services import admin_metrics, chat_service
+from app.services.quota import QuotaManager, TIER2_SECONDS, TIER3_TOKENS, get_quota_manager
+from app.services.metrics import TIER_SELECTED
+from app.services.tracing import span, start_trace
 from app.services.emergency_detector import detect_emergency, EMERGENCY_RESPONSE
 from app.services.nlp_pipeline import NLPPipeline
 from app.services.gemini_service import (
@@ -21,6 +29,7 @@ from app.services.gemini_service import (
     validate_health_query,
     NON_HEALTH_RESPONSE,
 )
+from app.utils.dependencies import get_token_user_id
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -44,8 +53,12 @@ NLP_HIGH_CONFIDENCE  = 0.80   # >= this  → use NLP ML response
 NLP_MID_CONFIDENCE   = 0.50   # >= this  → use local AI model
                                # <  0.50  → fall back to NVIDIA API
 
+# Tier label when an exhausted Tier 2/3 quota degrades the answer to Tier 1
+QUOTA_DEGRADED_TIER = "nlp_ml_quota"
+
 SESSION_COOKIE = "healthbot_session"
 
+_client_address = ClientAddress(settings.trusted_proxies_list)
 
 
 def get_session_id(request: Request, response: Response) -> str:
@@ -63,43 +76,90 @@ def get_session_id(request: Request, response: Response) -> str:
     return session_id
 
 
+def get_quota_subject(request: Request, user_id: Optional[int] = Depends(get_token_user_id)) -> str:
+    """
+    Who AI tier usage is charged to: the signed-in user, else the client IP.
+
+    Not the session cookie — dropping it would hand out a fresh budget.
+    """
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{_client_address(request.scope)}"
+
+
 @router.post("/send")
 async def send_message(
     request: Request,
     response: Response,
     msg: ChatMessageRequest,
-    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+    writer: chat_service.MessageWriteBehind = Depends(chat_service.get_message_writer),
+    quotas: QuotaManager = Depends(get_quota_manager),
+    quota_subject: str = Depends(get_quota_subject),
 ):
-    """Send a message and receive a streaming SSE response."""
-    session_id = get_session_id(request, response)
-
-    # Get or create conversation
-    conversation = await chat_service.get_or_create_conversation(
-        db, session_id, msg.conversation_id
-    )
-
-    # Save user message
-    await chat_service.save_message(db, conversation.id, "user", msg.message)
+    """
+    Send a message and receive a streaming SSE response.
 
-    # Update title if first message
-    if msg.conversation_id is None:
-        await chat_service.update_conversation_title(db, conversation, msg.message)
+    Database work is kept out of the AI call: one short transaction resolves
+    the conversation and reads context, and messages are handed to the
+    write-behind buffer, so neither a pooled connection nor a commit sits on
+    the request's critical path during Tier 2/3 generation.
+    """
+    if writer.full:
+        # The database has been failing long enough to fill the buffer; don't grow it further
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Chat history is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(writer.retry_after)},
+        )
+    session_id = get_session_id(request, response)
+    # Stage spans below (and inside the NLP / AI services) land in this trace
+    trace = start_trace("chat_send")
+
+    # Step 1: Emergency detection (pure CPU, no DB needed)
+    with span("emergency"):
+        is_emergency, matched_keyword = detect_emergency(msg.message)
+
+    # Short transaction: resolve conversation (creating it if needed) and context
+    async with session_factory() as db:
+        with span("context"):
+            conversation = await chat_service.get_or_create_conversation(
+                db, session_id, msg.conversation_id
+            )
+            conversation_id = conversation.id
+
+            # Update title if first message
+            if msg.conversation_id is None:
+                await chat_service.update_conversation_title(db, conversation, msg.message)
+
+            writer.enqueue(conversation_id, "user", msg.message)
+
+            if is_emergency:
+                writer.enqueue(
+                    conversation_id, "assistant", EMERGENCY_RESPONSE,
+                    intent="emergency", is_emergency=True,
+                )
+                context = []
+            else:
+                # Conversation context (shared by all AI tiers)
+                context = await chat_service.get_conversation_context(
+                    db, conversation_id, pending=writer.pending_for(conversation_id),
+                )
+        with span("db_commit"):
+            await db.commit()
+    trace.attributes["conversation_id"] = conversation_id
 
-    # Step 1: Emergency detection
-    is_emergency, matched_keyword = detect_emergency(msg.message)
     if is_emergency:
-        await chat_service.save_message(
-            db, conversation.id, "assistant", EMERGENCY_RESPONSE,
-            intent="emergency", is_emergency=True,
-        )
-        await db.commit()
+        TIER_SELECTED.labels(tier="emergency").inc()
+        trace.attributes["tier"] = "emergency"
         return StreamingResponse(
-            chat_service.stream_response(EMERGENCY_RESPONSE),
+            chat_service.stream_response(EMERGENCY_RESPONSE, trace=trace),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
-                "X-Conversation-Id": str(conversation.id),
+                "Server-Timing": trace.server_timing(),
+                "X-Conversation-Id": str(conversation_id),
                 "X-Is-Emergency": "true",
                 "Access-Control-Expose-Headers": "X-Conversation-Id, X-Is-Emergency",
             },
@@ -107,7 +167,8 @@ async def send_message(
 
     # Step 2: NLP pipeline — always run so we have intent + confidence
     nlp = await _get_nlp_pipeline()
-    nlp_result = await nlp.process(msg.message, context=None)
+    with span("nlp"):
+        nlp_result = await nlp.process(msg.message, context=None)
 
     confidence: float = nlp_result.get("confidence", 0.0)
     nlp_intent: str = nlp_result.get("intent", "")
@@ -118,33 +179,34 @@ async def send_message(
     )
     if not is_health:
         logger.info(f"[HealthFilter] Blocked non-health query ({health_reason}): {msg.message[:80]}")
+        TIER_SELECTED.labels(tier="health_filter").inc()
+        trace.attributes["tier"] = "health_filter"
         structured = parse_response_to_json(NON_HEALTH_RESPONSE)
-        await chat_service.save_message(
-            db, conversation.id, "assistant", NON_HEALTH_RESPONSE,
+        writer.enqueue(
+            conversation_id, "assistant", NON_HEALTH_RESPONSE,
             intent="non_health_filtered",
         )
-        await db.commit()
         return StreamingResponse(
-            chat_service.stream_response(NON_HEALTH_RESPONSE, structured_data=structured),
+            chat_service.stream_response(NON_HEALTH_RESPONSE, structured_data=structured, trace=trace),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
-                "X-Conversation-Id": str(conversation.id),
+                "Server-Timing": trace.server_timing(),
+                "X-Conversation-Id": str(conversation_id),
                 "X-Is-Emergency": "false",
                 "X-AI-Tier": "health_filter",
                 "Access-Control-Expose-Headers": "X-Conversation-Id, X-Is-Emergency, X-AI-Tier",
             },
         )
 
-    # Step 3: Get conversation context (shared by all AI tiers)
-    context = await chat_service.get_conversation_context(db, conversation.id)
-
     # ------------------------------------------------------------------ #
     # Step 4: HYBRID AI DECISION SYSTEM                                   #
     #   Tier 1 (confidence >= 0.80) → NLP ML response (fast, local)      #
     #   Tier 2 (confidence 0.50-0.79) → Local TinyLlama model            #
     #   Tier 3 (confidence < 0.50)  → NVIDIA API fallback                #
+    # Tiers 2 and 3 are metered per user / client IP; once a budget is   #
+    # spent the request degrades to the Tier 1 answer, not the queue.    #
     # ------------------------------------------------------------------ #
     ai_tier: str = ""
     response_text: str = ""
@@ -160,24 +222,45 @@ async def send_message(
         ai_tier = "local_ai"
         local_ai = getattr(request.app.state, "local_ai_service", None)
         if local_ai is not None and local_ai._model_id:
-            try:
-                response_text = await local_ai.generate_response(msg.message, context)
-                logger.info(f"[HybridAI] Tier 2 (Local AI) — confidence={confidence:.2f}")
-            except Exception as exc:
-                logger.warning(f"[HybridAI] Local AI failed ({exc}), falling back to NVIDIA")
-                ai_tier = "nvidia_api_fallback"
+            reservation = await quotas.reserve(quota_subject, TIER2_SECONDS, settings.QUOTA_TIER2_RESERVE_SECONDS)
+            if reservation is None:
+                ai_tier = QUOTA_DEGRADED_TIER
+                response_text = nlp_result["response"]
+                logger.info("[HybridAI] Tier 2 quota exhausted — degrading to NLP ML")
+            else:
+                started = time.monotonic()
+                try:
+                    with span("tier2"):
+                        response_text = await local_ai.generate_response(msg.message, context)
+                    logger.info(f"[HybridAI] Tier 2 (Local AI) — confidence={confidence:.2f}")
+                except Exception as exc:
+                    logger.warning(f"[HybridAI] Local AI failed ({exc}), falling back to NVIDIA")
+                    ai_tier = "nvidia_api_fallback"
+                finally:
+                    await quotas.settle(reservation, time.monotonic() - started)
         else:
             # Local AI not configured — drop straight to NVIDIA
             ai_tier = "nvidia_api_fallback"
             logger.info("[HybridAI] Local AI not configured, using NVIDIA fallback")
 
-    if not response_text or ai_tier in ("nvidia_api_fallback", ""):
+    if ai_tier != QUOTA_DEGRADED_TIER and (not response_text or ai_tier in ("nvidia_api_fallback", "")):
         # ── Tier 3: NVIDIA API fallback ──────────────────────────────────
         ai_tier = ai_tier or "nvidia_api"
         gemini = request.app.state.gemini_service
         try:
-            response_text = await gemini.generate_response(msg.message, context)
-            logger.info(f"[HybridAI] Tier 3 (NVIDIA API) — confidence={confidence:.2f}")
+            reservation = await quotas.reserve(quota_subject, TIER3_TOKENS, settings.QUOTA_TIER3_RESERVE_TOKENS)
+            if reservation is None:
+                ai_tier = QUOTA_DEGRADED_TIER
+                response_text = nlp_result["response"]
+                logger.info("[HybridAI] Tier 3 quota exhausted — degrading to NLP ML")
+            else:
+                tokens = 0
+                try:
+                    with span("tier3"):
+                        response_text, tokens = await gemini.generate_response_with_usage(msg.message, context)
+                finally:
+                    await quotas.settle(reservation, tokens)
+                logger.info(f"[HybridAI] Tier 3 (NVIDIA API) — confidence={confidence:.2f}")
         except Exception as exc:
             logger.error(f"[HybridAI] NVIDIA API error: {type(exc).__name__}: {exc}")
             response_text = (
@@ -186,27 +269,30 @@ async def send_message(
                 "please call emergency services immediately."
             )
 
-    # Step 5: Format response into structured bullet points
-    response_text = format_health_response(response_text)
+    with span("format"):
+        # Step 5: Format response into structured bullet points
+        response_text = format_health_response(response_text)
 
-    # Step 6: Parse into structured JSON for frontend
-    structured = parse_response_to_json(response_text)
+        # Step 6: Parse into structured JSON for frontend
+        structured = parse_response_to_json(response_text)
+    TIER_SELECTED.labels(tier=ai_tier).inc()
+    trace.attributes.update(tier=ai_tier, confidence=round(confidence, 3))
 
     # Save assistant response (record which AI tier handled it)
-    await chat_service.save_message(
-        db, conversation.id, "assistant", response_text,
+    writer.enqueue(
+        conversation_id, "assistant", response_text,
         intent=ai_tier,
     )
-    await db.commit()
 
     # Stream the response with structured data
     return StreamingResponse(
-        chat_service.stream_response(response_text, structured_data=structured),
+        chat_service.stream_response(response_text, structured_data=structured, trace=trace),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "X-Conversation-Id": str(conversation.id),
+            "Server-Timing": trace.server_timing(),
+            "X-Conversation-Id": str(conversation_id),
             "X-Is-Emergency": "false",
             "X-AI-Tier": ai_tier,
             "Access-Control-Expose-Headers": "X-Conversation-Id, X-Is-Emergency, X-AI-Tier",
@@ -218,27 +304,98 @@ async def send_message(
 async def list_conversations(
     request: Request,
     response: Response,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List all conversations for the current session."""
+    """
+    List the current session's conversations, most recent first.
+
+    Paginated: when more remain, the ``X-Next-Cursor`` response header holds
+    the value to pass as ``cursor`` for the next page.
+    """
     session_id = get_session_id(request, response)
-    conversations = await chat_service.get_user_conversations(db, session_id)
+    try:
+        conversations, next_cursor = await chat_service.get_user_conversations(
+            db, session_id, limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Access-Control-Expose-Headers"] = "X-Next-Cursor"
     return conversations
 
 
+_PENDING_FIELDS = ("role", "content", "intent", "entities", "is_emergency", "created_at")
+
+
 @router.get("/conversations/{conversation_id}", response_model=ConversationDetailResponse)
 async def get_conversation(
     conversation_id: int,
     request: Request,
     response: Response,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(100, ge=1, le=500),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    writer: chat_service.MessageWriteBehind = Depends(chat_service.get_message_writer),
 ):
-    """Get a conversation with all messages."""
+    """
+    Get a conversation with its most recent messages (older pages via ``before``).
+
+    The newest page includes messages still in the write-behind buffer
+    (``id`` is null until they are written).
+    """
     session_id = get_session_id(request, response)
-    conv = await chat_service.get_conversation_messages(db, conversation_id, session_id)
+    pending = writer.pending_rows(conversation_id)
+    try:
+        conv, next_cursor = await chat_service.get_conversation_messages(
+            db, conversation_id, session_id, limit=limit, before=before,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not conv:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found.")
-    return conv
+    detail = ConversationDetailResponse.model_validate(conv)
+    detail.next_cursor = next_cursor
+    if before is None:
+        newest = detail.messages[-1].created_at if detail.messages else None
+        detail.messages += [
+            ChatMessageResponse(id=None, **{k: row[k] for k in _PENDING_FIELDS})
+            for row in chat_service.not_yet_visible(pending, newest)
+        ]
+    return detail
+
+
+@router.get("/conversations/{conversation_id}/export")
+async def export_conversation(
+    conversation_id: int,
+    request: Request,
+    response: Response,
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+    writer: chat_service.MessageWriteBehind = Depends(chat_service.get_message_writer),
+):
+    """Stream the full transcript of one of the session's conversations."""
+    session_id = get_session_id(request, response)
+    pending = writer.pending_rows(conversation_id)
+    owned = await db.scalar(
+        select(Conversation.id).where(
+            Conversation.id == conversation_id,
+            Conversation.session_id == session_id,
+        )
+    )
+    if owned is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found.")
+
+    return StreamingResponse(
+        chat_service.export_messages(
+            session_factory, Message.conversation_id == conversation_id, fmt=fmt, pending=pending,
+        ),
+        media_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="conversation-{conversation_id}.{fmt}"'},
+    )
 
 
 @router.delete("/conversations/{conversation_id}")
@@ -247,11 +404,9 @@ async def delete_conversation(
     request: Request,
     response: Response,
     db: AsyncSession = Depends(get_db),
+    writer: chat_service.MessageWriteBehind = Depends(chat_service.get_message_writer),
 ):
     """Delete a conversation."""
-    from sqlalchemy import select
-    from app.models.conversation import Conversation
-
     session_id = get_session_id(request, response)
 
     result = await db.execute(
@@ -264,7 +419,13 @@ async def delete_conversation(
     if not conv:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found.")
 
+    # Buffered rows would be inserted after the delete and counted again
+    await writer.discard(conversation_id)
+    message_count = await db.scalar(
+        select(func.count(Message.id)).where(Message.conversation_id == conversation_id)
+    )
     await db.delete(conv)
+    await admin_metrics.record_messages_deleted(db, message_count or 0)
     return {"message": "Conversation deleted."}
 
 
@@ -3,24 +3,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import undefer
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.auth import UserResponse
 from app.schemas.chat import ConversationResponse, ConversationDetailResponse
 from app.schemas.admin import ClinicianNoteCreate, ClinicianNoteResponse
+from app.services.user_cache import UserPrincipal
 from app.utils.dependencies import require_role
 from app.models.user import User, UserRole
 from app.models.conversation import Conversation, Message
 from app.models.clinician_note import ClinicianNote
+from app.utils.repository import insert_returning
 
 router = APIRouter()
 
 
 @router.get("/patients", response_model=List[UserResponse])
 async def list_patients(
-    current_user: User = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List all patient users."""
     result = await db.execute(
@@ -32,8 +36,8 @@ async def list_patients(
 @router.get("/patients/{patient_id}/conversations", response_model=List[ConversationResponse])
 async def get_patient_conversations(
     patient_id: int,
-    current_user: User = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get all conversations for a specific patient."""
     result = await db.execute(
@@ -47,8 +51,8 @@ async def get_patient_conversations(
 @router.get("/conversations/{conversation_id}", response_model=ConversationDetailResponse)
 async def get_conversation_detail(
     conversation_id: int,
-    current_user: User = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get full conversation transcript."""
     result = await db.execute(select(Conversation).where(Conversation.id == conversation_id))
@@ -57,31 +61,30 @@ async def get_conversation_detail(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found.")
 
     msg_result = await db.execute(
-        select(Message).where(Message.conversation_id == conversation_id).order_by(Message.created_at)
+        select(Message)
+        .options(undefer(Message.content))
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_at)
     )
-    conv.messages = msg_result.scalars().all()
+    set_committed_value(conv, "messages", msg_result.scalars().all())
     return conv
 
 
 @router.post("/notes", response_model=ClinicianNoteResponse, status_code=status.HTTP_201_CREATED)
 async def add_note(
     data: ClinicianNoteCreate,
-    current_user: User = Depends(require_role(UserRole.CLINICIAN)),
+    current_user: UserPrincipal = Depends(require_role(UserRole.CLINICIAN)),
     db: AsyncSession = Depends(get_db),
 ):
     """Add a clinician note for a patient."""
-    note = ClinicianNote(clinician_id=current_user.id, **data.model_dump())
-    db.add(note)
-    await db.flush()
-    await db.refresh(note)
-    return note
+    return await insert_returning(db, ClinicianNote, clinician_id=current_user.id, **data.model_dump())
 
 
 @router.get("/notes/{patient_id}", response_model=List[ClinicianNoteResponse])
 async def get_patient_notes(
     patient_id: int,
-    current_user: User = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
-    db: AsyncSession = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_role(UserRole.CLINICIAN, UserRole.ADMIN)),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get all notes for a patient."""
     result = await db.execute(
@@ -0,0 +1,51 @@
+"""Admin diagnostics — on-demand sampling profile of this worker."""
+
+import asyncio
+import os
+import threading
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.models.user import UserRole
+from app.services.profiler import ProfilerBusyError, render_collapsed, sample_stacks
+from app.services.user_cache import UserPrincipal
+from app.utils.dependencies import require_role
+
+router = APIRouter()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(None, ge=1),
+    all_threads: bool = Query(False),
+    current_user: UserPrincipal = Depends(require_role(UserRole.ADMIN)),
+):
+    """
+    Sample this worker's stacks for ``seconds`` (capped at PROFILER_MAX_SECONDS)
+    and return them as a collapsed-stack file for flamegraph tools.
+
+    By default only the event loop thread is sampled — where a blocking call
+    stalls every request; ``all_threads`` adds the thread pool and others.
+    """
+    seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+    interval = (interval_ms or settings.PROFILER_INTERVAL_MS) / 1000
+    thread_ids = None if all_threads else {threading.get_ident()}
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval, thread_ids)
+    except ProfilerBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker.",
+        )
+    filename = f"profile-{os.getpid()}-{int(time.time())}.collapsed"
+    return PlainTextResponse(
+        render_collapsed(stacks),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(sum(stacks.values())),
+        },
+    )
@@ -0,0 +1,43 @@
+"""Health routes — liveness and readiness probes."""
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import get_read_session_factory
+from app.services.health import health_checker, is_ready
+from app.services.warmup import warmup
+
+router = APIRouter()
+
+
+@router.get("")
+async def health_check():
+    return {"status": "healthy", "version": "2.0.0"}
+
+
+@router.get("/live")
+async def liveness():
+    """The process is up and its event loop is answering. Checks nothing else."""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness(
+    request: Request,
+    session_factory: async_sessionmaker = Depends(get_read_session_factory),
+):
+    """
+    200 once warm-up has finished and none of ``HEALTH_READY_CHECKS`` is
+    down, 503 otherwise. The body lists every check either way.
+    """
+    checks = await health_checker.check(request.app.state, session_factory)
+    ready = warmup.ready and is_ready(checks)
+    if not warmup.ready:
+        status = "warming_up"
+    else:
+        status = "ready" if ready else "not_ready"
+    return JSONResponse(
+        {"status": status, "checks": checks, "warmup": warmup.status()},
+        status_code=200 if ready else 503,
+    )
@@ -0,0 +1,38 @@
+"""Prometheus scrape endpoint."""
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.config import settings
+from app.services import metrics
+from app.utils.dependencies import optional_security
+
+router = APIRouter()
+
+
+async def require_scrape_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> None:
+    """
+    Guard ``/metrics``: with ``METRICS_TOKEN`` set scrapers must send it as a
+    bearer token; without one the endpoint is only served outside production.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if settings.APP_ENV == "production":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+        return
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_scrape_token)])
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,11 +1,12 @@
 """Symptom Checker routes — no auth required."""
 
 import uuid
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
-from app.services.symptom_checker import create_session, answer_question
+from app.services.symptom_checker import create_session, answer_question, start_stateless, answer_stateless
+from app.services.symptom_session_store import SymptomSessionStore, get_session_store
 
 router = APIRouter()
 
@@ -24,19 +25,53 @@ class SymptomAnswerRequest(BaseModel):
     option_index: int
 
 
+class StatelessStartResponse(BaseModel):
+    token: str
+    node_id: str
+    question: str
+    options: list
+    category: str
+    is_final: bool = False
+
+
+class StatelessAnswerRequest(BaseModel):
+    token: str
+    option_index: int
+
+
 @router.post("/start", response_model=SymptomStartResponse)
-async def start_symptom_check():
+async def start_symptom_check(store: SymptomSessionStore = Depends(get_session_store)):
     """Start a new symptom checker session."""
     session_id = uuid.uuid4().hex[:16]
-    question_data = create_session(session_id)
+    question_data = await create_session(store, session_id)
     return SymptomStartResponse(session_id=session_id, **question_data)
 
 
 @router.post("/answer")
-async def answer_symptom_question(answer: SymptomAnswerRequest):
+async def answer_symptom_question(
+    answer: SymptomAnswerRequest,
+    store: SymptomSessionStore = Depends(get_session_store),
+):
     """Answer the current symptom checker question."""
     try:
-        result = answer_question(answer.session_id, answer.option_index)
+        result = await answer_question(store, answer.session_id, answer.option_index)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+# --- Stateless mode: the client carries a signed answer-path token ---
+
+@router.post("/stateless/start", response_model=StatelessStartResponse)
+async def start_stateless_check():
+    """Start a symptom check without server-side session state."""
+    return StatelessStartResponse(**start_stateless())
+
+
+@router.post("/stateless/answer")
+async def answer_stateless_question(answer: StatelessAnswerRequest):
+    """Answer the question the token points at; returns the next question and a new token."""
+    try:
+        return answer_stateless(answer.token, answer.option_index)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
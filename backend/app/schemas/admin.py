@@ -1,7 +1,7 @@
 """Admin Pydantic schemas."""
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from app.models.user import UserRole
 
@@ -19,6 +19,11 @@ class AdminUserResponse(BaseModel):
         from_attributes = True
 
 
+class AdminUserUpdate(BaseModel):
+    is_active: Optional[bool] = None
+    role: Optional[UserRole] = None
+
+
 class SystemMetrics(BaseModel):
     total_users: int
     total_conversations: int
@@ -28,6 +33,20 @@ class SystemMetrics(BaseModel):
     average_rating: Optional[float] = None
 
 
+class MetricsSeriesPoint(BaseModel):
+    bucket_start: datetime
+    total_messages: int
+    tiers: Dict[str, int]
+
+
+class QuotaUsage(BaseModel):
+    subject: str
+    window_start: datetime
+    tier2_seconds: float
+    tier3_tokens: int
+    exhausted: List[str]
+
+
 class ClinicianNoteCreate(BaseModel):
     patient_id: int
     conversation_id: Optional[int] = None
@@ -11,7 +11,7 @@ class ChatMessageRequest(BaseModel):
 
 
 class ChatMessageResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # null while the message is still in the write-behind buffer
     role: str
     content: str
     intent: Optional[str] = None
@@ -41,6 +41,7 @@ class ConversationDetailResponse(BaseModel):
     is_active: bool
     created_at: datetime
     messages: List[ChatMessageResponse] = []
+    next_cursor: Optional[str] = None  # pass as ?before= to load older messages
 
     class Config:
         from_attributes = True
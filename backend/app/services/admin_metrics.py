@@ -0,0 +1,133 @@
+"""Admin metrics rollups — incremental counters, hourly series and a TTL cache."""
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.conversation import Message
+from app.models.metrics import MetricCounter, MessageRollup
+
+MESSAGES_COUNTER = "messages"
+
+
+def _bucket(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _tier(row: Dict) -> str:
+    if row["role"] == "user":
+        return "user"
+    return row.get("intent") or "unknown"
+
+
+def _upsert_increment(db: AsyncSession, model, keys: Dict[str, Any], column: str, delta: int):
+    """Build ``INSERT ... ON CONFLICT DO UPDATE SET col = col + delta`` for SQLite / PostgreSQL."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    table = model.__table__
+    stmt = insert(table).values(**keys, **{column: delta})
+    return stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: table.c[column] + stmt.excluded[column]},
+    )
+
+
+async def record_messages(db: AsyncSession, rows: Iterable[Dict]) -> None:
+    """
+    Fold newly inserted message rows into the counters and hourly rollups.
+
+    Called inside the same transaction as the insert, so rollups never drift
+    from the ``messages`` table.
+    """
+    buckets: Dict[Tuple[datetime, str], int] = defaultdict(int)
+    total = 0
+    for row in rows:
+        buckets[(_bucket(row["created_at"]), _tier(row))] += 1
+        total += 1
+    if not total:
+        return
+    await db.execute(_upsert_increment(db, MetricCounter, {"name": MESSAGES_COUNTER}, "value", total))
+    for (bucket_start, tier), count in buckets.items():
+        await db.execute(_upsert_increment(
+            db, MessageRollup, {"bucket_start": bucket_start, "tier": tier}, "message_count", count,
+        ))
+
+
+async def record_messages_deleted(db: AsyncSession, count: int) -> None:
+    """Decrement the running total (hourly series is activity history and is kept)."""
+    if count:
+        await db.execute(_upsert_increment(db, MetricCounter, {"name": MESSAGES_COUNTER}, "value", -count))
+
+
+async def ensure_counters(db: AsyncSession) -> None:
+    """Seed missing counters from a one-off COUNT(*) (databases predating rollups)."""
+    exists = await db.scalar(select(MetricCounter.name).where(MetricCounter.name == MESSAGES_COUNTER))
+    if exists is None:
+        count = await db.scalar(select(func.count(Message.id))) or 0
+        db.add(MetricCounter(name=MESSAGES_COUNTER, value=count))
+        await db.commit()
+
+
+async def message_total(db: AsyncSession) -> int:
+    """Current message count from the rollup counter (COUNT(*) only if never seeded)."""
+    value = await db.scalar(select(MetricCounter.value).where(MetricCounter.name == MESSAGES_COUNTER))
+    if value is None:
+        value = await db.scalar(select(func.count(Message.id))) or 0
+    return value
+
+
+async def message_series(db: AsyncSession, hours: int = 24) -> List[Dict[str, Any]]:
+    """Messages per hour for the last ``hours`` hours with the tier mix of each bucket."""
+    since = _bucket(datetime.now(timezone.utc)) - timedelta(hours=hours - 1)
+    result = await db.execute(
+        select(MessageRollup.bucket_start, MessageRollup.tier, MessageRollup.message_count)
+        .where(MessageRollup.bucket_start >= since)
+        .order_by(MessageRollup.bucket_start)
+    )
+    series: Dict[datetime, Dict[str, Any]] = {}
+    for bucket_start, tier, count in result.all():
+        point = series.setdefault(bucket_start, {"bucket_start": bucket_start, "total_messages": 0, "tiers": {}})
+        point["total_messages"] += count
+        point["tiers"][tier] = count
+    return list(series.values())
+
+
+class MetricsCache:
+    """
+    Tiny in-process TTL cache for dashboard queries.
+
+    Concurrent misses for the same key share a single load, so a wall of
+    dashboards polling at once still costs one query per TTL window.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            value = await loader()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+metrics_cache = MetricsCache(ttl=settings.ADMIN_METRICS_CACHE_TTL)
@@ -1,13 +1,36 @@
 """Authentication service — password hashing and user operations."""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from passlib.context import CryptContext
 
+from app.config import settings
 from app.models.user import User
 from app.schemas.auth import UserRegister
+from app.utils.repository import insert_returning
+
+# Pinning min == default == max makes any change to BCRYPT_ROUNDS (up or
+# down) mark existing hashes as needing an update, picked up on next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Dedicated, bounded pool for bcrypt: it holds the CPU for 100-300 ms per call,
+# so it must stay off the event loop and out of the default executor that the
+# NLP / local AI paths use. The worker count is the concurrency cap — a login
+# storm queues here instead of starving chat.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.AUTH_HASH_WORKERS,
+    thread_name_prefix="bcrypt",
+)
 
 
 def hash_password(password: str) -> str:
@@ -18,19 +41,37 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """``hash_password`` on the dedicated bcrypt executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the dedicated bcrypt executor.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    was made with a different cost factor and should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     result = await db.execute(select(User).where(User.email == email))
     return result.scalar_one_or_none()
 
 
 async def create_user(db: AsyncSession, user_data: UserRegister) -> User:
-    user = User(
+    return await insert_returning(
+        db, User,
         email=user_data.email,
         full_name=user_data.full_name,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         role=user_data.role,
     )
-    db.add(user)
-    await db.flush()
-    await db.refresh(user)
-    return user
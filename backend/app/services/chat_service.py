@@ -1,12 +1,30 @@
 """Chat service — manages conversations and message persistence."""
 
+import base64
+import csv
+import io
 import json
-from typing import List, Dict, Optional, AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple, AsyncGenerator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, insert, update, bindparam, func, or_, and_
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import undefer, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
 import asyncio
+import math
 
+from app.config import settings
 from app.models.conversation import Conversation, Message
+from app.services import admin_metrics
+from app.services.metrics import SSE_STREAM_SECONDS, WRITE_BEHIND_BACKLOG, WRITE_BEHIND_DROPPED, observe_stage
+from app.services.tracing import RequestTrace
+from app.utils.repository import insert_returning
+
+logger = logging.getLogger(__name__)
 
 
 async def get_or_create_conversation(
@@ -25,52 +43,36 @@ async def get_or_create_conversation(
             return conv
 
     # Create new conversation
-    conv = Conversation(session_id=session_id, title="New Conversation")
-    db.add(conv)
-    await db.flush()
-    await db.refresh(conv)
-    return conv
+    return await insert_returning(db, Conversation, session_id=session_id, title="New Conversation")
 
 
-async def save_message(
+async def get_conversation_context(
     db: AsyncSession,
     conversation_id: int,
-    role: str,
-    content: str,
-    intent: Optional[str] = None,
-    entities: Optional[List[Dict]] = None,
-    is_emergency: bool = False,
-) -> Message:
-    """Save a message to the database."""
-    msg = Message(
-        conversation_id=conversation_id,
-        role=role,
-        content=content,
-        intent=intent,
-        entities=json.dumps(entities) if entities else None,
-        is_emergency=is_emergency,
-    )
-    db.add(msg)
-    await db.flush()
-    await db.refresh(msg)
-    return msg
-
-
-async def get_conversation_context(
-    db: AsyncSession, conversation_id: int, limit: int = 10
+    limit: int = 10,
+    pending: Optional[List[Dict]] = None,
 ) -> List[Dict]:
-    """Get recent messages for context."""
+    """
+    Get recent messages for context.
+
+    ``pending`` holds messages accepted by the write-behind buffer but not yet
+    flushed; they are newer than anything in the database and are appended.
+    """
     result = await db.execute(
         select(Message)
+        .options(undefer(Message.content))
         .where(Message.conversation_id == conversation_id)
         .order_by(Message.created_at.desc())
         .limit(limit)
     )
     messages = result.scalars().all()
-    return [
+    context = [
         {"role": m.role, "content": m.content}
         for m in reversed(messages)
     ]
+    if pending:
+        context = (context + pending)[-limit:]
+    return context
 
 
 async def update_conversation_title(
@@ -82,34 +84,114 @@ async def update_conversation_title(
     await db.flush()
 
 
-async def stream_response(response_text: str, structured_data: dict = None) -> AsyncGenerator[str, None]:
-    """Stream response text token-by-token as SSE events."""
-    words = response_text.split(" ")
-    for i, word in enumerate(words):
-        token = word + (" " if i < len(words) - 1 else "")
-        yield f"data: {json.dumps({'token': token})}\n\n"
-        await asyncio.sleep(0.03)
-    # Include structured JSON in the done event (backwards compatible)
-    done_payload = {'done': True}
-    if structured_data:
-        done_payload['structured'] = structured_data
-    yield f"data: {json.dumps(done_payload)}\n\n"
+async def stream_response(
+    response_text: str,
+    structured_data: dict = None,
+    trace: Optional[RequestTrace] = None,
+) -> AsyncGenerator[str, None]:
+    """
+    Stream response text token-by-token as SSE events.
 
+    With a ``trace``, the done event carries its stage ``timings`` (ms) and
+    the request's structured log line is written once the stream ends.
+    """
+    started = time.perf_counter()
+    completed = False
+    try:
+        words = response_text.split(" ")
+        for i, word in enumerate(words):
+            token = word + (" " if i < len(words) - 1 else "")
+            yield f"data: {json.dumps({'token': token})}\n\n"
+            await asyncio.sleep(0.03)
+        # Include structured JSON in the done event (backwards compatible)
+        done_payload = {'done': True}
+        if structured_data:
+            done_payload['structured'] = structured_data
+        if trace is not None:
+            done_payload['timings'] = trace.timings()
+        yield f"data: {json.dumps(done_payload)}\n\n"
+        completed = True
+    finally:
+        stream_seconds = time.perf_counter() - started
+        SSE_STREAM_SECONDS.observe(stream_seconds)
+        if trace is not None:
+            trace.finish(stream_ms=round(stream_seconds * 1000, 1), completed=completed)
 
-async def get_user_conversations(db: AsyncSession, session_id: str) -> List[Conversation]:
-    """Get all conversations for a session."""
-    result = await db.execute(
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for a (timestamp, id) position."""
+    raw = json.dumps([ts.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of ``encode_cursor``; raises ValueError on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as exc:
+        raise ValueError("Invalid pagination cursor.") from exc
+
+
+def _message_count_expr():
+    return (
+        select(func.count(Message.id))
+        .where(Message.conversation_id == Conversation.id)
+        .correlate(Conversation)
+        .scalar_subquery()
+    )
+
+
+async def get_user_conversations(
+    db: AsyncSession,
+    session_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Conversation], Optional[str]]:
+    """
+    Get one page of a session's conversations, most recently updated first.
+
+    Keyset pagination on ``(updated_at, id)``; ``message_count`` is loaded by a
+    correlated count in the same query. Returns ``(page, next_cursor)``.
+    """
+    query = (
         select(Conversation)
         .where(Conversation.session_id == session_id)
-        .order_by(Conversation.updated_at.desc())
+        .options(with_expression(Conversation.message_count, _message_count_expr()))
+        .order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        .limit(limit + 1)
     )
-    return result.scalars().all()
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                Conversation.updated_at < ts,
+                and_(Conversation.updated_at == ts, Conversation.id < row_id),
+            )
+        )
+    result = await db.execute(query)
+    rows = list(result.scalars().all())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].id)
+    return rows, next_cursor
 
 
 async def get_conversation_messages(
-    db: AsyncSession, conversation_id: int, session_id: str
-) -> Optional[Conversation]:
-    """Get a conversation with all its messages."""
+    db: AsyncSession,
+    conversation_id: int,
+    session_id: str,
+    limit: int = 100,
+    before: Optional[str] = None,
+) -> Tuple[Optional[Conversation], Optional[str]]:
+    """
+    Get a conversation with one page of its messages.
+
+    Returns the newest ``limit`` messages older than the ``before`` cursor,
+    in chronological order, plus a cursor for the next (older) page.
+    """
     result = await db.execute(
         select(Conversation)
         .where(
@@ -118,11 +200,453 @@ async def get_conversation_messages(
         )
     )
     conv = result.scalar_one_or_none()
-    if conv:
-        msg_result = await db.execute(
-            select(Message)
-            .where(Message.conversation_id == conversation_id)
-            .order_by(Message.created_at)
+    if not conv:
+        return None, None
+
+    query = (
+        select(Message)
+        .options(undefer(Message.content))
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(limit + 1)
+    )
+    if before:
+        ts, row_id = decode_cursor(before)
+        query = query.where(
+            or_(
+                Message.created_at < ts,
+                and_(Message.created_at == ts, Message.id < row_id),
+            )
+        )
+    msg_result = await db.execute(query)
+    messages = list(msg_result.scalars().all())
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
+    # set_committed_value avoids a lazy load of the old collection (which
+    # fails under asyncio) and doesn't mark the conversation dirty
+    set_committed_value(conv, "messages", list(reversed(messages)))
+    return conv, next_cursor
+
+
+EXPORT_COLUMNS = ("conversation_id", "message_id", "role", "content", "intent", "is_emergency", "created_at")
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they were written in UTC
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def not_yet_visible(pending: List[Dict], newest: Optional[datetime]) -> List[Dict]:
+    """
+    Buffered rows missing from a read whose newest message is ``newest``.
+
+    Take the ``pending`` snapshot before the read: a flush committing in
+    between then shows up in the read, and its rows are skipped here.
+    """
+    if newest is None:
+        return pending
+    newest = _utc(newest)
+    return [row for row in pending if _utc(row["created_at"]) > newest]
+
+
+async def export_messages(
+    session_factory: async_sessionmaker,
+    *criteria,
+    fmt: str = "ndjson",
+    batch_size: int = 500,
+    pending: Optional[List[Dict]] = None,
+) -> AsyncGenerator[str, None]:
+    """
+    Stream messages matching ``criteria`` as NDJSON lines or CSV rows.
+
+    Rows come from a server-side cursor in ``batch_size`` partitions of plain
+    tuples (no ORM identity map), so memory stays constant regardless of
+    transcript length. Opens its own session because it runs after the
+    request handler has returned. ``pending`` (from
+    ``MessageWriteBehind.pending_rows``, one conversation) is appended after
+    the stored rows, with an empty ``message_id``.
+    """
+    query = (
+        select(
+            Message.conversation_id, Message.id, Message.role, Message.content,
+            Message.intent, Message.is_emergency, Message.created_at,
         )
-        conv.messages = msg_result.scalars().all()
-    return conv
+        .where(*criteria)
+        .order_by(Message.conversation_id, Message.created_at, Message.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buf.getvalue()
+
+    newest = None
+    async with session_factory() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            newest = partition[-1][6] or newest
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                for row in partition:
+                    writer.writerow([
+                        *row[:6], row[6].isoformat() if row[6] else "",
+                    ])
+                yield buf.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({
+                        **dict(zip(EXPORT_COLUMNS[:6], row[:6])),
+                        "created_at": row[6].isoformat() if row[6] else None,
+                    }) + "\n"
+                    for row in partition
+                )
+
+    extra = [
+        (row["conversation_id"], None, row["role"], row["content"],
+         row["intent"], row["is_emergency"], row["created_at"])
+        for row in not_yet_visible(pending or [], newest)
+    ]
+    if extra:
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for row in extra:
+                writer.writerow([*row[:6], row[6].isoformat()])
+            yield buf.getvalue()
+        else:
+            yield "".join(
+                json.dumps({**dict(zip(EXPORT_COLUMNS[:6], row[:6])), "created_at": row[6].isoformat()}) + "\n"
+                for row in extra
+            )
+
+
+# Errors meaning the database is unreachable or busy, not that a row is bad:
+# rows are kept and retried instead of dropped. OperationalError also covers
+# permanent failures ("no such table", schema mismatches), so it is narrowed
+# per dialect by ``is_outage``.
+_OUTAGE_ERRORS = (OperationalError, InterfaceError, DisconnectionError, PoolTimeoutError, OSError)
+
+# SQLite OperationalError messages that clear up on their own
+_SQLITE_TRANSIENT = ("database is locked", "database table is locked", "unable to open database",
+                     "disk i/o error", "database or disk is full")
+
+# PostgreSQL SQLSTATE classes / codes that clear up on their own: connection
+# exceptions, insufficient resources, operator intervention (e.g. shutdown),
+# serialization failures and deadlocks
+_PG_TRANSIENT_CLASSES = ("08", "53", "57")
+_PG_TRANSIENT_CODES = ("40001", "40P01")
+
+
+def is_outage(exc: BaseException, dialect: str) -> bool:
+    """True if ``exc`` means "try again later" rather than "this write can never succeed"."""
+    if isinstance(exc, (DisconnectionError, PoolTimeoutError, OSError)):
+        return True
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    if not isinstance(exc, (OperationalError, InterfaceError)):
+        return False
+    if dialect == "sqlite":
+        message = str(exc.orig).lower()
+        return any(fragment in message for fragment in _SQLITE_TRANSIENT)
+    code = getattr(exc.orig, "sqlstate", None) or getattr(exc.orig, "pgcode", None)
+    if code:
+        return code[:2] in _PG_TRANSIENT_CLASSES or code in _PG_TRANSIENT_CODES
+    # Unknown driver without an error code: assume the database went away
+    return True
+
+
+class MessageWriteBehind:
+    """
+    Write-behind buffer for chat message persistence.
+
+    ``enqueue`` returns immediately.  A background task drains the buffer with
+    multi-row ``INSERT ... VALUES`` statements, touches the parent
+    conversations' ``updated_at`` and updates the admin metrics rollups in
+    the same transaction, whenever
+    ``max_batch`` rows are waiting or ``flush_interval`` seconds have passed.
+    ``stop()`` drains whatever is left and is awaited from the app lifespan.
+
+    A failed flush puts its rows back and is retried with exponential
+    backoff. After ``max_retries`` consecutive failures the rows are written
+    one transaction each, so a single bad row (e.g. its conversation was
+    deleted) is logged and dropped instead of blocking every later message.
+    Rows failing with a connectivity error (see ``is_outage``) are kept for
+    the next retry.
+
+    The backlog is bounded: ``full`` turns true at ``max_backlog`` rows and
+    ``/send`` answers 503 until it drains. ``enqueue`` itself drops (and
+    counts) rows past ``max_backlog + max_batch``, headroom for the replies of
+    requests admitted just before the limit.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker] = None,
+        max_batch: int = 200,
+        flush_interval: float = 0.25,
+        max_retries: int = 5,
+        retry_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_backlog: int = 10000,
+    ):
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.max_backlog = max_backlog
+        self.failures = 0
+        self._retry_at = 0.0
+        self._rows: List[Dict] = []
+        self._inflight: List[Dict] = []
+        self._touches: Dict[int, datetime] = {}
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._dialect: Optional[str] = None
+
+    @property
+    def session_factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            from app.database import async_session
+            self._session_factory = async_session
+        return self._session_factory
+
+    def enqueue(
+        self,
+        conversation_id: int,
+        role: str,
+        content: str,
+        intent: Optional[str] = None,
+        entities: Optional[List[Dict]] = None,
+        is_emergency: bool = False,
+    ) -> None:
+        """Buffer a message insert (and conversation touch) for the next flush."""
+        if self.backlog >= self.max_backlog + self.max_batch:
+            WRITE_BEHIND_DROPPED.inc()
+            logger.error(
+                f"[WriteBehind] Backlog of {self.backlog} messages; dropping {role} message "
+                f"for conversation {conversation_id}"
+            )
+            return
+        now = datetime.now(timezone.utc)
+        self._rows.append({
+            "conversation_id": conversation_id,
+            "role": role,
+            "content": content,
+            "intent": intent,
+            "entities": json.dumps(entities) if entities else None,
+            "is_emergency": is_emergency,
+            "created_at": now,
+        })
+        self._touches[conversation_id] = now
+        self.start()
+        if len(self._rows) >= self.max_batch:
+            self._wakeup.set()
+
+    def pending_rows(self, conversation_id: int) -> List[Dict]:
+        """Rows for a conversation that are not yet committed, oldest first."""
+        return [
+            dict(r) for r in self._inflight + self._rows
+            if r["conversation_id"] == conversation_id
+        ]
+
+    def pending_for(self, conversation_id: int) -> List[Dict]:
+        """``pending_rows`` as AI context messages."""
+        return [{"role": r["role"], "content": r["content"]} for r in self.pending_rows(conversation_id)]
+
+    async def discard(self, conversation_id: int) -> int:
+        """
+        Drop a conversation's buffered rows (it is being deleted). Returns how many.
+
+        Waits for an in-flight flush, so afterwards every row of the
+        conversation is either committed or gone.
+        """
+        async with self._lock:
+            kept = [r for r in self._rows if r["conversation_id"] != conversation_id]
+            dropped = len(self._rows) - len(kept)
+            self._rows = kept
+            self._touches.pop(conversation_id, None)
+            return dropped
+
+    @property
+    def backlog(self) -> int:
+        return len(self._rows) + len(self._inflight)
+
+    @property
+    def full(self) -> bool:
+        return self.backlog >= self.max_backlog
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: until the next flush attempt."""
+        wait = self._retry_at - time.monotonic()
+        return max(1, math.ceil(wait if wait > 0 else self.flush_interval))
+
+    def _is_outage(self, exc: BaseException) -> bool:
+        return is_outage(exc, self._dialect or "")
+
+    async def _write(self, db: AsyncSession, rows: List[Dict], touches: Dict[int, datetime]) -> None:
+        for i in range(0, len(rows), self.max_batch):
+            await db.execute(insert(Message.__table__).values(rows[i:i + self.max_batch]))
+        if touches:
+            table = Conversation.__table__
+            await db.execute(
+                update(table)
+                .where(table.c.id == bindparam("conv_id"))
+                .values(updated_at=bindparam("touched_at")),
+                [{"conv_id": cid, "touched_at": ts} for cid, ts in touches.items()],
+            )
+        await admin_metrics.record_messages(db, rows)
+
+    def _requeue(self, rows: List[Dict], touches: Dict[int, datetime]) -> None:
+        # In front of newer rows, so per-conversation order is kept
+        self._rows[:0] = rows
+        for cid, ts in touches.items():
+            self._touches.setdefault(cid, ts)
+
+    async def _write_one_by_one(self, rows: List[Dict], touches: Dict[int, datetime]) -> int:
+        """Write each row in its own transaction; drop rows the database rejects."""
+        written = 0
+        for index, row in enumerate(rows):
+            cid = row["conversation_id"]
+            try:
+                async with self.session_factory() as db:
+                    await self._write(db, [row], {cid: touches.get(cid, row["created_at"])})
+                    await db.commit()
+            except _OUTAGE_ERRORS as exc:
+                if not self._is_outage(exc):
+                    WRITE_BEHIND_DROPPED.inc()
+                    logger.exception(
+                        f"[WriteBehind] Dropping {row['role']} message for conversation {cid}: "
+                        f"permanent database error"
+                    )
+                    continue
+                self._requeue(rows[index:], touches)
+                raise
+            except Exception:
+                WRITE_BEHIND_DROPPED.inc()
+                logger.exception(
+                    f"[WriteBehind] Dropping {row['role']} message for conversation {cid}: "
+                    f"rejected by the database"
+                )
+                continue
+            written += 1
+        return written
+
+    async def flush(self, isolate: bool = False) -> int:
+        """
+        Write all buffered rows now. Returns the number of messages written.
+
+        ``isolate`` skips the retry budget: if the batch fails, rows are
+        written one by one at once (used at shutdown).
+        """
+        async with self._lock:
+            if not self._rows and not self._touches:
+                return 0
+            rows, self._rows = self._rows, []
+            touches, self._touches = self._touches, {}
+            self._inflight = rows
+            try:
+                try:
+                    async with self.session_factory() as db:
+                        if self._dialect is None:
+                            self._dialect = db.get_bind().dialect.name
+                        await self._write(db, rows, touches)
+                        started = time.perf_counter()
+                        await db.commit()
+                        observe_stage("write_behind_commit", time.perf_counter() - started)
+                    written = len(rows)
+                except asyncio.CancelledError:
+                    # stop() cancelled the flusher mid-write: its final flush takes these
+                    self._requeue(rows, touches)
+                    raise
+                except Exception:
+                    self.failures += 1
+                    if not isolate and self.failures < self.max_retries:
+                        self._requeue(rows, touches)
+                        delay = min(self.max_backoff, self.retry_backoff * 2 ** (self.failures - 1))
+                        self._retry_at = time.monotonic() + delay
+                        logger.exception(
+                            f"[WriteBehind] Flush of {len(rows)} messages failed "
+                            f"({self.failures}/{self.max_retries}); retrying in {delay:.1f}s"
+                        )
+                        raise
+                    logger.exception(
+                        f"[WriteBehind] Flush of {len(rows)} messages failed {self.failures} times; "
+                        f"writing them one by one"
+                    )
+                    try:
+                        written = await self._write_one_by_one(rows, touches)
+                    except _OUTAGE_ERRORS:
+                        # Database unreachable: keep the rows, back off at the cap
+                        self._retry_at = time.monotonic() + self.max_backoff
+                        raise
+            finally:
+                self._inflight = []
+            self.failures = 0
+            self._retry_at = 0.0
+            return written
+
+    def start(self) -> None:
+        """Start the background flusher (no-op if already running)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write any buffered rows (dropping rejected ones)."""
+        if self._task is not None:
+            # wait_for() on 3.11 can swallow a cancel that races the wakeup; the flag ends the loop anyway
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush(isolate=True)
+        except Exception:
+            logger.error(f"[WriteBehind] Database unavailable at shutdown; {self.backlog} messages not written")
+
+    async def _run(self):
+        while not self._stopping:
+            timeout = max(self.flush_interval, self._retry_at - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            if time.monotonic() < self._retry_at:
+                continue  # backing off; a full batch does not cut the wait short
+            try:
+                await self.flush()
+            except Exception:
+                pass  # already logged; rows were re-queued
+
+
+message_writer = MessageWriteBehind(
+    max_batch=settings.CHAT_WRITE_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITE_FLUSH_INTERVAL,
+    max_retries=settings.CHAT_WRITE_MAX_RETRIES,
+    retry_backoff=settings.CHAT_WRITE_RETRY_BACKOFF,
+    max_backoff=settings.CHAT_WRITE_MAX_BACKOFF,
+    max_backlog=settings.CHAT_WRITE_MAX_BACKLOG,
+)
+WRITE_BEHIND_BACKLOG.set_function(lambda: message_writer.backlog)
+
+
+def get_message_writer() -> MessageWriteBehind:
+    """Dependency returning the process-wide message write-behind buffer."""
+    return message_writer
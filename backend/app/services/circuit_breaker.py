@@ -0,0 +1,71 @@
+"""
+Consecutive-failure circuit breaker for outbound AI calls.
+
+After ``failure_threshold`` failed calls in a row the circuit opens and
+calls fail immediately with ``CircuitOpenError`` instead of waiting on a
+struggling upstream (the NVIDIA client retries with multi-second backoff).
+After ``reset_seconds`` one trial call is let through (half-open): success
+closes the circuit, failure re-opens it for another period. A trial that
+ends without an outcome (cancelled, e.g. by a client disconnect) must hand
+its slot back with ``release_trial`` so the next call can try instead.
+"""
+
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    @property
+    def trial_in_flight(self) -> bool:
+        return self._trial_in_flight
+
+    def before_call(self) -> bool:
+        """
+        Raise ``CircuitOpenError`` unless a call may go out now.
+
+        Returns True when this call is the half-open trial; the caller must
+        then ``release_trial()`` in a ``finally`` block.
+        """
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._trial_in_flight):
+            raise CircuitOpenError("Upstream circuit is open")
+        if state == HALF_OPEN:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Free the trial slot if the trial ended without recording an outcome."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
@@ -2,35 +2,207 @@
 
 import os
 import base64
+import binascii
+import string
+from typing import Dict, Iterable, List, Optional, Tuple
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from app.config import settings
 
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+# Stored form of an encrypted column value: "enc:<kid>:<base64 ciphertext>"
+ENCRYPTED_PREFIX = "enc:"
+
+KEY_SIZE = 32
+
+
+def parse_key(key: str) -> bytes:
+    """
+    256-bit key from its configured form.
+
+    Accepts hex (zero-padded or truncated to 64 characters, as it always has
+    been) or base64 of exactly 32 bytes — the form Render's ``generateValue``
+    produces. Anything else is a configuration error.
+    """
+    key = key.strip()
+    if key and all(c in string.hexdigits for c in key):
+        return bytes.fromhex(key.ljust(2 * KEY_SIZE, '0')[:2 * KEY_SIZE])
+    try:
+        raw = base64.b64decode(key, validate=True)
+    except (binascii.Error, ValueError):
+        raw = b""
+    if len(raw) == KEY_SIZE:
+        return raw
+    raise ValueError(
+        "Encryption keys must be 64 hex characters or base64 of 32 bytes "
+        "(generate one with: python -c 'import secrets; print(secrets.token_hex(32))')"
+    )
+
 
 class EncryptionService:
-    """Encrypt and decrypt sensitive data using AES-256-GCM."""
+    """
+    Encrypt and decrypt sensitive data using AES-256-GCM.
+
+    Ciphertext layout is ``nonce (12 bytes) || ciphertext+tag``. The ``*_bytes``
+    methods use it as-is (for ``LargeBinary`` columns); the string methods wrap
+    it in base64 for text columns. The AESGCM object is built once and reused.
+    """
+
+    def __init__(self, key_hex: str = None):
+        self.key = parse_key(key_hex or settings.AES_ENCRYPTION_KEY)
+        self._aesgcm = AESGCM(self.key)
+
+    # --- raw bytes -------------------------------------------------------
 
-    def __init__(self):
-        key_hex = settings.AES_ENCRYPTION_KEY
-        # Ensure 32 bytes (256 bits)
-        self.key = bytes.fromhex(key_hex.ljust(64, '0')[:64])
+    def encrypt_bytes(self, plaintext: bytes) -> bytes:
+        """Encrypt bytes; returns ``nonce || ciphertext``."""
+        nonce = os.urandom(NONCE_SIZE)
+        return nonce + self._aesgcm.encrypt(nonce, plaintext, None)
+
+    def decrypt_bytes(self, raw: bytes) -> bytes:
+        """Decrypt ``nonce || ciphertext`` produced by ``encrypt_bytes``."""
+        return self._aesgcm.decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], None)
+
+    # --- base64 text -----------------------------------------------------
 
     def encrypt(self, plaintext: str) -> str:
         """Encrypt a string and return base64-encoded ciphertext."""
-        nonce = os.urandom(12)
-        aesgcm = AESGCM(self.key)
-        ciphertext = aesgcm.encrypt(nonce, plaintext.encode('utf-8'), None)
-        # Prepend nonce to ciphertext
-        encrypted = nonce + ciphertext
-        return base64.b64encode(encrypted).decode('utf-8')
+        return base64.b64encode(self.encrypt_bytes(plaintext.encode('utf-8'))).decode('utf-8')
 
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt a base64-encoded ciphertext string."""
-        raw = base64.b64decode(encrypted_data)
-        nonce = raw[:12]
-        ciphertext = raw[12:]
-        aesgcm = AESGCM(self.key)
-        plaintext = aesgcm.decrypt(nonce, ciphertext, None)
-        return plaintext.decode('utf-8')
+        return self.decrypt_bytes(base64.b64decode(encrypted_data)).decode('utf-8')
+
+    # --- bulk ------------------------------------------------------------
+
+    def encrypt_many(self, plaintexts: Iterable[str], raw: bool = False) -> List:
+        """
+        Encrypt a batch of strings (e.g. a transcript page).
+
+        Nonces for the whole batch come from a single ``os.urandom`` call.
+        Returns ``bytes`` per item when ``raw`` is set, base64 text otherwise.
+        """
+        items = [p.encode('utf-8') for p in plaintexts]
+        nonces = os.urandom(NONCE_SIZE * len(items))
+        encrypt = self._aesgcm.encrypt
+        out = []
+        for i, data in enumerate(items):
+            nonce = nonces[i * NONCE_SIZE:(i + 1) * NONCE_SIZE]
+            out.append(nonce + encrypt(nonce, data, None))
+        if raw:
+            return out
+        b64 = base64.b64encode
+        return [b64(item).decode('ascii') for item in out]
+
+    def decrypt_many(self, values: Iterable, raw: bool = False) -> List[str]:
+        """Decrypt a batch produced by ``encrypt_many`` (same ``raw`` setting)."""
+        decrypt = self._aesgcm.decrypt
+        b64decode = base64.b64decode
+        out = []
+        for value in values:
+            data = value if raw else b64decode(value)
+            out.append(decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:], None).decode('utf-8'))
+        return out
+
+
+class KeyRing:
+    """
+    Encryption keys by key id, for values stored as ``enc:<kid>:<ciphertext>``.
+
+    New values are always written with ``active_kid``; any listed kid can
+    still be read, so keys are rotated by adding a new key, switching the
+    active kid and re-encrypting old rows in the background. Anything that
+    is not such an envelope under a known kid — legacy plaintext, or text
+    that merely starts with ``enc:`` — is returned unchanged.
+    """
+
+    def __init__(self, keys: Dict[str, str], active_kid: str):
+        if active_kid not in keys:
+            raise ValueError(f"Active encryption key {active_kid!r} is not configured")
+        self.active_kid = active_kid
+        self.active_prefix = f"{ENCRYPTED_PREFIX}{active_kid}:"
+        self._services = {kid: EncryptionService(key) for kid, key in keys.items()}
+
+    def encrypt(self, plaintext: str) -> str:
+        return self.active_prefix + self._services[self.active_kid].encrypt(plaintext)
+
+    @staticmethod
+    def _split(stored: str) -> Optional[Tuple[str, bytes]]:
+        """Kid and raw ciphertext if ``stored`` has the envelope's shape."""
+        if not stored.startswith(ENCRYPTED_PREFIX):
+            return None
+        kid, sep, data = stored[len(ENCRYPTED_PREFIX):].partition(":")
+        if not sep or not kid:
+            return None
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        if len(raw) < NONCE_SIZE + TAG_SIZE:
+            return None
+        return kid, raw
+
+    def decrypt(self, stored: str) -> str:
+        envelope = self._split(stored)
+        if envelope is None or envelope[0] not in self._services:
+            return stored
+        kid, raw = envelope
+        return self._services[kid].decrypt_bytes(raw).decode('utf-8')
+
+    def needs_rotation(self, stored: str) -> bool:
+        """True for plaintext and for values written under a non-active key."""
+        return not stored.startswith(self.active_prefix)
+
+    def reencrypt(self, stored: str) -> str:
+        """Rewrite under the active key; refuses envelopes whose key is not configured."""
+        envelope = self._split(stored)
+        if envelope is not None and envelope[0] not in self._services:
+            # Most likely a key dropped from ENCRYPTION_KEYS too early; don't wrap it again
+            raise ValueError(f"Unknown encryption key id {envelope[0]!r}")
+        return self.encrypt(self.decrypt(stored))
+
+
+def build_keyring(spec: Optional[str] = None, active_kid: Optional[str] = None) -> KeyRing:
+    """Key ring from ``ENCRYPTION_KEYS`` (``kid:key`` pairs) plus the default key."""
+    keys = {"default": settings.AES_ENCRYPTION_KEY}
+    for pair in (settings.ENCRYPTION_KEYS if spec is None else spec).split(","):
+        if ":" in pair:
+            kid, key = pair.split(":", 1)
+            keys[kid.strip()] = key.strip()
+    return KeyRing(keys, active_kid or settings.ENCRYPTION_ACTIVE_KID)
+
+
+# Built on first use, so importing the models never parses key material
+keyring: Optional[KeyRing] = None
+
+
+def get_keyring() -> KeyRing:
+    global keyring
+    if keyring is None:
+        keyring = build_keyring()
+    return keyring
+
+
+def check_production_key() -> None:
+    """Refuse to run production with the development key from ``config.py``."""
+    default = type(settings).model_fields["AES_ENCRYPTION_KEY"].default
+    if settings.APP_ENV == "production" and settings.AES_ENCRYPTION_KEY.strip() == default:
+        raise RuntimeError(
+            "AES_ENCRYPTION_KEY is the public development default; set a real key for production "
+            "(python -c 'import secrets; print(secrets.token_hex(32))')"
+        )
+
+
+_encryption_service: Optional[EncryptionService] = None
 
 
-encryption_service = EncryptionService()
+def __getattr__(name: str):
+    # ``encryption_service`` used to be built at import time; keep it for
+    # existing callers, but build it on first access like the key ring
+    global _encryption_service
+    if name == "encryption_service":
+        if _encryption_service is None:
+            _encryption_service = EncryptionService()
+        return _encryption_service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,14 @@
 """NVIDIA AI service for healthcare chatbot responses."""
 
-from openai import OpenAI
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import asyncio
 import re
 import logging
 
 from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.metrics import TIER3_ERRORS, TIER3_RETRIES
+from app.services.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -288,11 +290,20 @@ class AIService:
 
     def __init__(self):
         self._client = None
+        self.breaker = CircuitBreaker(
+            settings.TIER3_BREAKER_FAILURES, settings.TIER3_BREAKER_RESET_SECONDS,
+        )
+
+    @property
+    def is_configured(self) -> bool:
+        return self._client is not None
 
     def initialize(self):
         """Initialize the NVIDIA OpenAI-compatible client."""
         if not settings.NVIDIA_API_KEY:
             raise ValueError("NVIDIA_API_KEY is not set in environment variables")
+        # Imported here: the openai package costs ~0.5s at import time
+        from openai import OpenAI
         self._client = OpenAI(
             base_url="https://integrate.api.nvidia.com/v1",
             api_key=settings.NVIDIA_API_KEY,
@@ -303,9 +314,31 @@ class AIService:
         self, message: str, context: List[Dict[str, str]] = None
     ) -> str:
         """Generate a response using NVIDIA API with conversation context."""
+        text, _ = await self.generate_response_with_usage(message, context)
+        return text
+
+    async def generate_response_with_usage(
+        self, message: str, context: List[Dict[str, str]] = None
+    ) -> Tuple[str, int]:
+        """Like ``generate_response`` but also returns total tokens used (for quotas)."""
         if not self._client:
             self.initialize()
-
+        # Fail fast while the API is down instead of retrying on every request
+        try:
+            is_trial = self.breaker.before_call()
+        except CircuitOpenError:
+            TIER3_ERRORS.labels(error="CircuitOpenError").inc()
+            raise
+        try:
+            return await self._call_with_retries(message, context)
+        finally:
+            if is_trial:
+                # Cancelled or otherwise unrecorded: let the next call be the trial
+                self.breaker.release_trial()
+
+    async def _call_with_retries(
+        self, message: str, context: Optional[List[Dict[str, str]]]
+    ) -> Tuple[str, int]:
         # Build messages list
         messages = [{"role": "system", "content": SYSTEM_PROMPT}]
 
@@ -320,22 +353,34 @@ class AIService:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = await asyncio.to_thread(
-                    self._client.chat.completions.create,
-                    model="meta/llama-3.1-70b-instruct",
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=1024,
-                )
-                return response.choices[0].message.content
+                with span("tier3_call"):
+                    response = await asyncio.to_thread(
+                        self._client.chat.completions.create,
+                        model="meta/llama-3.1-70b-instruct",
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=1024,
+                    )
+                text = response.choices[0].message.content
+                usage = getattr(response, "usage", None)
+                tokens = getattr(usage, "total_tokens", None)
+                if tokens is None:
+                    # Rough estimate (~4 chars/token) when the API omits usage
+                    tokens = (sum(len(m["content"]) for m in messages) + len(text or "")) // 4
+                self.breaker.record_success()
+                return text, tokens
             except Exception as e:
                 error_str = str(e)
                 if ("429" in error_str or "rate" in error_str.lower()) and attempt < max_retries - 1:
                     wait_time = (attempt + 1) * 5
                     logger.warning(f"NVIDIA rate limited (attempt {attempt+1}), retrying in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
+                    TIER3_RETRIES.inc()
+                    with span("tier3_backoff"):
+                        await asyncio.sleep(wait_time)
                 else:
                     logger.error(f"NVIDIA API error: {type(e).__name__}: {e}")
+                    self.breaker.record_failure()
+                    TIER3_ERRORS.labels(error=type(e).__name__).inc()
                     raise
 
 
@@ -0,0 +1,116 @@
+"""
+Subsystem checks behind ``/api/health/ready``.
+
+Each check reports ``ok``, ``down`` (with a reason) or ``disabled`` (not
+configured on purpose, e.g. Tier 2 without torch):
+
+  database   ``SELECT 1`` through the read session factory, with a timeout
+  nlp        intent model + spaCy loaded (``NLPPipeline`` logs and carries
+             on without them, answering every message through Tier 3);
+             disabled when the libraries are not installed
+  tier2      local model loaded (not merely configured — the first request
+             would otherwise pay the load)
+  tier3      NVIDIA client configured and its circuit breaker not open
+
+Results are cached for ``HEALTH_CHECK_TTL`` seconds and concurrent probes
+share one run, so frequent load-balancer probes cost at most one database
+round trip per TTL per process.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.services.circuit_breaker import HALF_OPEN, OPEN
+
+OK = "ok"
+DOWN = "down"
+DISABLED = "disabled"
+
+
+async def check_database(session_factory: async_sessionmaker) -> Dict:
+    started = time.perf_counter()
+    try:
+        async with session_factory() as db:
+            await asyncio.wait_for(db.execute(text("SELECT 1")), settings.HEALTH_DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"status": DOWN, "reason": f"no response within {settings.HEALTH_DB_TIMEOUT}s"}
+    except Exception as e:
+        return {"status": DOWN, "reason": f"{type(e).__name__}: {e}"}
+    return {"status": OK, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def check_nlp(pipeline) -> Dict:
+    if pipeline is None or not pipeline._initialized:
+        return {"status": DOWN, "reason": "loading"}
+    if not pipeline.models_loaded:
+        if getattr(pipeline, "dependency_missing", False):
+            return {"status": DISABLED, "reason": pipeline.load_error}
+        return {"status": DOWN, "reason": pipeline.load_error or "models not loaded"}
+    return {"status": OK}
+
+
+def check_tier2(local_ai) -> Dict:
+    if local_ai is None or not local_ai.is_configured:
+        return {"status": DISABLED}
+    if local_ai.is_ready:
+        return {"status": OK, "model": local_ai._model_id}
+    if local_ai._loading:
+        return {"status": DOWN, "reason": "loading"}
+    return {"status": DOWN, "reason": local_ai.load_error or "model not loaded"}
+
+
+def check_tier3(ai_service) -> Dict:
+    if ai_service is None or not ai_service.is_configured:
+        return {"status": DOWN, "reason": "NVIDIA API client not configured"}
+    state = ai_service.breaker.state
+    if state == OPEN:
+        return {"status": DOWN, "reason": "circuit open", "circuit": state}
+    if state == HALF_OPEN and ai_service.breaker.trial_in_flight:
+        return {"status": DOWN, "reason": "circuit half-open, trial call in flight", "circuit": state}
+    return {"status": OK, "circuit": state}
+
+
+class HealthChecker:
+    """Cached, coalesced run of all subsystem checks."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._result: Optional[Dict[str, Dict]] = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    def clear(self):
+        self._result = None
+        self._expires = 0.0
+
+    async def check(self, app_state, session_factory: async_sessionmaker) -> Dict[str, Dict]:
+        if self._result is not None and time.monotonic() < self._expires:
+            return self._result
+        async with self._lock:
+            # Another probe may have refreshed the result while we waited
+            if self._result is not None and time.monotonic() < self._expires:
+                return self._result
+            self._result = {
+                "database": await check_database(session_factory),
+                "nlp": check_nlp(getattr(app_state, "nlp_pipeline", None)),
+                "tier2": check_tier2(getattr(app_state, "local_ai_service", None)),
+                "tier3": check_tier3(getattr(app_state, "gemini_service", None)),
+            }
+            self._expires = time.monotonic() + self.ttl
+            return self._result
+
+
+health_checker = HealthChecker(ttl=settings.HEALTH_CHECK_TTL)
+
+
+def is_ready(checks: Dict[str, Dict]) -> bool:
+    """Ready when none of the ``HEALTH_READY_CHECKS`` is down."""
+    return all(
+        checks.get(name, {}).get("status") != DOWN
+        for name in settings.health_ready_checks_list
+    )
@@ -3,19 +3,19 @@
 import json
 import os
 import re
-from typing import Tuple, Optional
+from typing import TYPE_CHECKING, Tuple, Optional
 
-import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import Pipeline
+# scikit-learn and joblib take ~1s to import; they are loaded with the model
+# (in the background warm-up) rather than when the app module is imported.
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
 
 # Path to intents training data
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 MODEL_PATH = os.path.join(DATA_DIR, "intent_model.joblib")
 INTENTS_PATH = os.path.join(DATA_DIR, "intents.json")
 
-_model: Optional[Pipeline] = None
+_model: Optional["Pipeline"] = None
 _intent_responses: dict = {}
 
 
@@ -29,6 +29,10 @@ def _preprocess(text: str) -> str:
 def train_model():
     """Train intent classifier from intents.json."""
     global _model, _intent_responses
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
 
     with open(INTENTS_PATH, 'r', encoding='utf-8') as f:
         intents_data = json.load(f)
@@ -59,6 +63,7 @@ def load_model():
     """Load a previously trained model."""
     global _model, _intent_responses
     if os.path.exists(MODEL_PATH):
+        import joblib
         _model, _intent_responses = joblib.load(MODEL_PATH)
     else:
         train_model()
@@ -19,6 +19,9 @@ import re
 import time
 from typing import List, Dict, Optional
 
+from app.services.metrics import TIER2_INFLIGHT
+from app.services.tracing import span
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -128,6 +131,8 @@ class LocalAIService:
         self._tokenizer = None
         self._initialized = False
         self._loading = False
+        self.load_error: Optional[str] = None
+        self._load_lock = asyncio.Lock()
         self._model_id: str = ""
         self._adapter_path: str = ""
         self._max_tokens: int = 300
@@ -213,8 +218,24 @@ class LocalAIService:
 
     async def _ensure_loaded(self):
         """Ensure model is loaded (lazy init, thread-safe for asyncio)."""
-        if not self._initialized:
-            await asyncio.to_thread(self._load_model_sync)
+        if self._initialized:
+            return
+        async with self._load_lock:
+            if self._initialized:
+                return
+            self._loading = True
+            try:
+                await asyncio.to_thread(self._load_model_sync)
+                self.load_error = None
+            except Exception as e:
+                self.load_error = str(e)
+                raise
+            finally:
+                self._loading = False
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self._model_id)
 
     def _generate_sync(self, prompt: str) -> str:
         """Run synchronous token generation — call via asyncio.to_thread."""
@@ -261,10 +282,16 @@ class LocalAIService:
                 "LocalAIService not configured — call configure() before use."
             )
 
-        await self._ensure_loaded()
-
-        prompt = _build_prompt(message, context)
-        raw = await asyncio.to_thread(self._generate_sync, prompt)
+        TIER2_INFLIGHT.inc()
+        try:
+            if not self._initialized:
+                with span("tier2_load"):
+                    await self._ensure_loaded()
+            prompt = _build_prompt(message, context)
+            with span("tier2_generate"):
+                raw = await asyncio.to_thread(self._generate_sync, prompt)
+        finally:
+            TIER2_INFLIGHT.dec()
         return safe_response(raw)
 
     @property
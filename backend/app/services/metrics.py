@@ -0,0 +1,295 @@
+"""
+In-process Prometheus metrics for the chat pipeline, served on ``/metrics``.
+
+A small dependency-free registry emitting the Prometheus text format
+(0.0.4). An observation is a dictionary lookup plus a ``bisect`` into the
+bucket bounds, so instrumentation stays on in production. Metrics are
+updated from the event loop thread only. Values are per process: with
+several workers, scrape each one (or aggregate by ``instance``).
+
+    STAGE_SECONDS.labels(stage="intent").observe(0.004)
+    with STAGE_SECONDS.labels(stage="ner").time():
+        ...
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond CPU stages up to slow Tier 2/3 generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    @abstractmethod
+    def _new_child(self):
+        """Return the per-label-set value holder."""
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def clear(self):
+        self._children.clear()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    @abstractmethod
+    def _samples(self) -> Iterable[str]:
+        """Yield the exposition lines for every child."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def _samples(self):
+        for key, child in self._children.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    """Settable gauge; ``set_function`` makes it read a callback at scrape time instead."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._children[()].dec(amount)
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        self._functions[tuple(str(labels[name]) for name in self.labelnames)] = fn
+
+    def _samples(self):
+        values = {key: child.value for key, child in self._children.items()}
+        for key, fn in self._functions.items():
+            try:
+                values[key] = fn()
+            except Exception:
+                continue
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot: above the largest bound
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def _samples(self):
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+# --- Chat pipeline ---------------------------------------------------------
+
+STAGE_SECONDS = registry.register(Histogram(
+    "healthbot_chat_stage_seconds",
+    "Time spent in each /api/chat/send stage.",
+    ["stage"],
+))
+TIER_SELECTED = registry.register(Counter(
+    "healthbot_chat_tier_selected",
+    "Chat replies by the AI tier that produced them.",
+    ["tier"],
+))
+TIER2_INFLIGHT = registry.register(Gauge(
+    "healthbot_tier2_inflight",
+    "Tier 2 (local model) generations running or waiting for the model.",
+))
+TIER3_RETRIES = registry.register(Counter(
+    "healthbot_tier3_retries",
+    "NVIDIA API calls retried after a rate-limit response.",
+))
+TIER3_ERRORS = registry.register(Counter(
+    "healthbot_tier3_errors",
+    "NVIDIA API calls that failed, by exception type (CircuitOpenError: rejected by the breaker).",
+    ["error"],
+))
+SSE_STREAM_SECONDS = registry.register(Histogram(
+    "healthbot_sse_stream_seconds",
+    "Duration of SSE reply streams, first to last event.",
+))
+WRITE_BEHIND_BACKLOG = registry.register(Gauge(
+    "healthbot_write_behind_backlog",
+    "Chat messages buffered or in flight to the database.",
+))
+WRITE_BEHIND_DROPPED = registry.register(Counter(
+    "healthbot_write_behind_dropped",
+    "Chat messages dropped because the database rejected the row itself.",
+))
+
+# --- Event loop ------------------------------------------------------------
+
+LOOP_LAG_SECONDS = registry.register(Histogram(
+    "healthbot_event_loop_lag_seconds",
+    "How late the event loop ran its lag-monitor heartbeat (time it spent blocked).",
+))
+
+# --- Database --------------------------------------------------------------
+
+DB_POOL_CHECKED_OUT = registry.register(Gauge(
+    "healthbot_db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ["engine"],
+))
+DB_POOL_SIZE = registry.register(Gauge(
+    "healthbot_db_pool_size",
+    "Configured pool size (0 for pools without a fixed size).",
+    ["engine"],
+))
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+def register_pool(name: str, engine) -> None:
+    """Expose pool usage of an ``AsyncEngine`` (read at scrape time)."""
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.set_function(pool.checkedout, engine=name)
+    DB_POOL_SIZE.set_function(lambda: pool.size() if hasattr(pool, "size") else 0, engine=name)
+
+
+def render() -> str:
+    return registry.render()
@@ -7,6 +7,7 @@ from typing import Dict, Any, List
 from app.services.emergency_detector import detect_emergency, EMERGENCY_RESPONSE
 from app.services.entity_extractor import extract_entities, _get_nlp
 from app.services.intent_classifier import classify_intent, get_response_for_intent, load_model
+from app.services.tracing import span
 
 
 class NLPPipeline:
@@ -14,21 +15,34 @@ class NLPPipeline:
 
     def __init__(self):
         self._initialized = False
+        # Set by initialize(): whether the intent model and spaCy loaded, and why not
+        self.models_loaded = False
+        self.load_error = None
+        # True when a library is not installed at all (e.g. the prod build has no spaCy)
+        self.dependency_missing = False
+        # The background warm-up and an early request may both initialise
+        self._init_lock = asyncio.Lock()
 
     async def initialize(self):
         """Load models and resources (runs CPU-bound work in thread pool)."""
         if self._initialized:
             return
-        try:
-            # Run synchronous model loading in thread pool to avoid blocking event loop
-            await asyncio.to_thread(load_model)
-            await asyncio.to_thread(_get_nlp)  # Pre-load spaCy model
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).warning(
-                f"[NLP] Failed to load NLP models (will use API fallback): {e}"
-            )
-        self._initialized = True
+        async with self._init_lock:
+            if self._initialized:
+                return
+            try:
+                # Run synchronous model loading in thread pool to avoid blocking event loop
+                await asyncio.to_thread(load_model)
+                await asyncio.to_thread(_get_nlp)  # Pre-load spaCy model
+                self.models_loaded = True
+            except Exception as e:
+                self.load_error = str(e)
+                self.dependency_missing = isinstance(e, ImportError)
+                import logging
+                logging.getLogger(__name__).warning(
+                    f"[NLP] Failed to load NLP models (will use API fallback): {e}"
+                )
+            self._initialized = True
 
     async def process(self, text: str, context: List[Dict] = None) -> Dict[str, Any]:
         """
@@ -48,10 +62,12 @@ class NLPPipeline:
             }
 
         # Step 2: Entity extraction
-        entities = extract_entities(text)
+        with span("ner"):
+            entities = extract_entities(text)
 
         # Step 3: Intent classification
-        intent, confidence = classify_intent(text)
+        with span("intent"):
+            intent, confidence = classify_intent(text)
 
         # Step 4: Generate response
         response = get_response_for_intent(intent)
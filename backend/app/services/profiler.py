@@ -0,0 +1,153 @@
+"""
+Production diagnosis: an on-demand sampling profiler and an event-loop lag
+monitor.
+
+``sample_stacks`` runs in a worker thread and snapshots every thread's
+Python stack (``sys._current_frames``) at a fixed interval for a bounded
+time. The result is in the collapsed-stack format read by ``flamegraph.pl``,
+speedscope and inferno — one ``thread;outer;...;inner count`` line per
+distinct stack. Sampling only pauses the process for a stack walk per
+interval, so it is safe to run against live traffic.
+
+``LoopLagMonitor`` keeps a heartbeat coroutine on the event loop and a
+watchdog thread beside it. When the heartbeat falls more than the threshold
+behind, the watchdog logs the loop thread's stack *while it is still
+blocked* (logger ``app.profiler``) — the synchronous call holding up every
+other request is in that stack. Late heartbeats also feed the
+``healthbot_event_loop_lag_seconds`` histogram.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Iterable, Optional
+
+from app.services.metrics import LOOP_LAG_SECONDS
+
+logger = logging.getLogger("app.profiler")
+
+# One profile at a time per process: concurrent samplers would skew each other
+_profile_lock = threading.Lock()
+
+# Floor for the sampling interval; each sample holds the GIL for a stack walk
+MIN_INTERVAL = 0.001
+
+
+class ProfilerBusyError(RuntimeError):
+    """A profile is already running in this process."""
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapse(frame, thread_name: str) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float, thread_ids: Optional[Iterable[int]] = None) -> Counter:
+    """
+    Sample Python stacks for ``seconds``, every ``interval`` seconds.
+
+    ``thread_ids`` limits sampling to those threads (default: all but the
+    sampler); ``interval`` is raised to at least ``MIN_INTERVAL``. Returns a
+    ``Counter`` of collapsed stacks; blocks the calling thread, so run it via
+    ``asyncio.to_thread``.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        interval = max(interval, MIN_INTERVAL)
+        me = threading.get_ident()
+        wanted = set(thread_ids) if thread_ids is not None else None
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (wanted is not None and ident not in wanted):
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stacks[_collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _profile_lock.release()
+
+
+def render_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class LoopLagMonitor:
+    """Logs the event loop thread's stack whenever the loop stalls past ``threshold`` seconds."""
+
+    def __init__(self, threshold: float, interval: float):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._reported_beat: Optional[float] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from the loop thread)."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.to_thread(self._thread.join, 1.0)
+        self._task = self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._last_beat - self.interval)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag > self.threshold:
+                logger.warning(f"Event loop stall ended after {lag * 1000:.0f} ms")
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked <= self.threshold or self._reported_beat == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._reported_beat = beat
+            self.stalls += 1
+            logger.warning(
+                f"Event loop blocked for {blocked * 1000:.0f} ms; loop thread stack:\n"
+                + "".join(traceback.format_stack(frame))
+            )
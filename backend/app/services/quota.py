@@ -0,0 +1,242 @@
+"""
+Per-client quotas for the expensive AI tiers.
+
+Each client gets a budget per fixed window (``QUOTA_WINDOW_SECONDS``):
+Tier 2 is metered in local-model generation seconds, Tier 3 in NVIDIA API
+tokens. Authenticated callers are metered per user, anonymous ones per
+client IP — never per chat-session cookie, which a client can simply drop.
+The chat router reserves an estimate before dispatching (degrading to the
+Tier 1 NLP answer once the budget is spent) and settles it with the real
+usage afterwards, so one client cannot monopolise the TinyLlama queue or
+the API quota, even with concurrent requests.
+
+Usage lives in-process by default; with ``QUOTA_REDIS`` enabled it is kept
+in Redis hashes so budgets hold across workers (falls back to in-process if
+Redis cannot be reached).
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TIER2_SECONDS = "tier2_seconds"
+TIER3_TOKENS = "tier3_tokens"
+
+# KEYS[1] = usage hash; ARGV = kind, limit, amount, ttl. Check and hold in
+# one step so concurrent requests cannot all pass the same check.
+RESERVE_LUA = """
+local used = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+if used >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('HINCRBYFLOAT', KEYS[1], ARGV[1], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """Budget held by ``reserve``; ``settle`` corrects it in the same window and store."""
+
+    subject: str
+    kind: str
+    amount: float
+    window: int
+    in_redis: bool
+
+
+class QuotaManager:
+    """Fixed-window usage counters per subject (``user:<id>`` / ``ip:<addr>``) and tier."""
+
+    KEY_PREFIX = "quota:"
+
+    def __init__(
+        self,
+        limits: Dict[str, float],
+        window_seconds: int,
+        use_redis: bool = False,
+        max_subjects: int = 50000,
+    ):
+        self.limits = limits
+        self.window_seconds = window_seconds
+        self.use_redis = use_redis and REDIS_AVAILABLE
+        self.max_subjects = max_subjects
+        self.redis_client: Optional[object] = None
+        self._reserve_script = None
+        self._initialized = False
+        self._window = self._current_window()
+        self._usage: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+
+    def _current_window(self) -> int:
+        return int(time.time() // self.window_seconds)
+
+    def _local_usage(self) -> "OrderedDict[str, Dict[str, float]]":
+        window = self._current_window()
+        if window != self._window:
+            self._window = window
+            self._usage.clear()
+        return self._usage
+
+    async def _init_redis(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        if self.use_redis:
+            try:
+                self.redis_client = aioredis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                )
+                await self.redis_client.ping()
+                self._reserve_script = self.redis_client.register_script(RESERVE_LUA)
+            except Exception:
+                logger.warning("Quotas: Redis unavailable, using in-process counters")
+                self.redis_client = None
+
+    def _key(self, subject: str, window: Optional[int] = None) -> str:
+        return f"{self.KEY_PREFIX}{self._current_window() if window is None else window}:{subject}"
+
+    def _local_entry(self, subject: str) -> Dict[str, float]:
+        usage = self._local_usage()
+        entry = usage.setdefault(subject, {})
+        usage.move_to_end(subject)
+        while len(usage) > self.max_subjects:
+            usage.popitem(last=False)
+        return entry
+
+    async def used(self, subject: str, kind: str) -> float:
+        await self._init_redis()
+        if self.redis_client is not None:
+            try:
+                return float(await self.redis_client.hget(self._key(subject), kind) or 0)
+            except Exception:
+                pass
+        return self._local_usage().get(subject, {}).get(kind, 0.0)
+
+    async def _incr_redis(self, subject: str, kind: str, amount: float, window: int) -> None:
+        key = self._key(subject, window)
+        pipe = self.redis_client.pipeline()
+        pipe.hincrbyfloat(key, kind, amount)
+        pipe.expire(key, self.window_seconds * 2)
+        await pipe.execute()
+
+    def _incr_local(self, subject: str, kind: str, amount: float) -> None:
+        entry = self._local_entry(subject)
+        entry[kind] = entry.get(kind, 0.0) + amount
+
+    async def reserve(self, subject: str, kind: str, amount: float) -> Optional[Reservation]:
+        """
+        Hold ``amount`` of ``subject``'s ``kind`` budget, if any is left.
+
+        Succeeds while the subject has not yet spent its budget this window;
+        the check and the hold are one atomic step. Returns None when the
+        budget is spent; pass every reservation to ``settle`` once the real
+        usage is known.
+        """
+        await self._init_redis()
+        window = self._current_window()
+        if self.redis_client is not None:
+            try:
+                if not settings.QUOTA_ENABLED:
+                    await self._incr_redis(subject, kind, amount, window)
+                    return Reservation(subject, kind, amount, window, True)
+                allowed = await self._reserve_script(
+                    keys=[self._key(subject, window)],
+                    args=[kind, self.limits[kind], amount, self.window_seconds * 2],
+                )
+                return Reservation(subject, kind, amount, window, True) if int(allowed) else None
+            except Exception:
+                logger.warning("Quotas: Redis reserve failed, using in-process counters")
+
+        # No await between check and update: atomic within the event loop
+        entry = self._local_entry(subject)
+        if settings.QUOTA_ENABLED and entry.get(kind, 0.0) >= self.limits[kind]:
+            return None
+        entry[kind] = entry.get(kind, 0.0) + amount
+        return Reservation(subject, kind, amount, self._window, False)
+
+    async def settle(self, reservation: Reservation, actual: float) -> None:
+        """
+        Replace a reservation with the usage actually incurred.
+
+        The correction goes to the window and store the reservation was made
+        in, even if the window has rolled over or Redis has come back since.
+        """
+        delta = actual - reservation.amount
+        if not delta:
+            return
+        if reservation.in_redis:
+            try:
+                await self._incr_redis(reservation.subject, reservation.kind, delta, reservation.window)
+            except Exception:
+                logger.warning(
+                    f"Quotas: Redis settle failed; {reservation.subject} keeps a "
+                    f"{reservation.kind} hold of {reservation.amount}"
+                )
+        elif reservation.window == self._current_window():
+            # (an earlier window's in-process counters are already gone)
+            self._incr_local(reservation.subject, reservation.kind, delta)
+
+    async def snapshot(self, limit: int = 100) -> List[Dict]:
+        """Current-window usage for the heaviest subjects (admin dashboard)."""
+        await self._init_redis()
+        window = self._current_window()
+        rows: Dict[str, Dict[str, float]] = {}
+        if self.redis_client is not None:
+            prefix = f"{self.KEY_PREFIX}{window}:"
+            try:
+                async for key in self.redis_client.scan_iter(match=f"{prefix}*", count=500):
+                    values = await self.redis_client.hgetall(key)
+                    rows[key[len(prefix):]] = {k: float(v) for k, v in values.items()}
+            except Exception:
+                rows = {}
+        if not rows:
+            rows = {subject: dict(entry) for subject, entry in self._local_usage().items()}
+
+        window_start = datetime.fromtimestamp(window * self.window_seconds, tz=timezone.utc)
+        result = [
+            {
+                "subject": subject,
+                "window_start": window_start,
+                TIER2_SECONDS: round(entry.get(TIER2_SECONDS, 0.0), 2),
+                TIER3_TOKENS: int(entry.get(TIER3_TOKENS, 0)),
+                "exhausted": [kind for kind, cap in self.limits.items() if entry.get(kind, 0.0) >= cap],
+            }
+            for subject, entry in rows.items()
+        ]
+        result.sort(
+            key=lambda r: (r[TIER2_SECONDS] / self.limits[TIER2_SECONDS]
+                           + r[TIER3_TOKENS] / self.limits[TIER3_TOKENS]),
+            reverse=True,
+        )
+        return result[:limit]
+
+
+quota_manager = QuotaManager(
+    limits={
+        TIER2_SECONDS: settings.QUOTA_TIER2_SECONDS,
+        TIER3_TOKENS: settings.QUOTA_TIER3_TOKENS,
+    },
+    window_seconds=settings.QUOTA_WINDOW_SECONDS,
+    use_redis=settings.QUOTA_REDIS,
+)
+
+
+def get_quota_manager() -> QuotaManager:
+    """Dependency returning the process-wide quota manager."""
+    return quota_manager
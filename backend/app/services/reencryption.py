@@ -0,0 +1,103 @@
+"""
+Background re-encryption of ``EncryptedText`` columns.
+
+After a key rotation (new ``ENCRYPTION_ACTIVE_KID``) or turning on
+``ENCRYPT_AT_REST`` over existing data, rows still hold values under the old
+key or in plaintext. This job walks each encrypted column in primary-key
+order and rewrites those rows under the active key, ``batch_size`` rows per
+transaction, so it never holds the writer for long. Rows already under the
+active key are filtered out in SQL and are never decrypted.
+
+Usage (from backend/):
+    python -m app.services.reencryption
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import Text, bindparam, select, type_coerce, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.models.conversation import Message
+from app.services import encryption
+
+logger = logging.getLogger(__name__)
+
+ENCRYPTED_COLUMNS = (Message.content,)
+
+
+async def reencrypt_column(
+    session_factory: async_sessionmaker,
+    column,
+    batch_size: int = 500,
+    pause: float = 0.0,
+    keyring: Optional[encryption.KeyRing] = None,
+) -> int:
+    """Move every value of ``column`` to the active key. Returns the number of rows rewritten."""
+    ring = keyring or encryption.get_keyring()
+    table = column.table
+    pk = table.primary_key.columns[0]
+    # Text-typed views of the column: read and write the stored form as-is
+    raw = type_coerce(table.c[column.key], Text)
+    rewrite = (
+        update(table)
+        .where(pk == bindparam("_pk"))
+        .values({column.key: type_coerce(bindparam("_value"), Text)})
+    )
+
+    total = 0
+    last_pk = None
+    while True:
+        query = (
+            select(pk, raw)
+            .where(raw.is_not(None), ~raw.startswith(ring.active_prefix, autoescape=True))
+            .order_by(pk)
+            .limit(batch_size)
+        )
+        if last_pk is not None:
+            query = query.where(pk > last_pk)
+
+        async with session_factory() as db:
+            rows = (await db.execute(query)).all()
+            if not rows:
+                return total
+            last_pk = rows[-1][0]
+            params = []
+            for row_pk, stored in rows:
+                try:
+                    params.append({"_pk": row_pk, "_value": ring.reencrypt(stored)})
+                except Exception:
+                    logger.error(f"Re-encryption: cannot decrypt {table.name} row {row_pk}, skipped")
+            if params:
+                await db.execute(rewrite, params)
+                await db.commit()
+            total += len(params)
+
+        # Let request handlers in between batches
+        await asyncio.sleep(pause)
+
+
+async def reencrypt_all(
+    session_factory: Optional[async_sessionmaker] = None,
+    batch_size: Optional[int] = None,
+    pause: float = 0.05,
+) -> int:
+    """Re-encrypt every ``EncryptedText`` column; safe to run while serving traffic."""
+    if session_factory is None:
+        from app.database import async_session
+        session_factory = async_session
+    batch_size = batch_size or settings.ENCRYPTION_REENCRYPT_BATCH
+    total = 0
+    for column in ENCRYPTED_COLUMNS:
+        count = await reencrypt_column(session_factory, column, batch_size=batch_size, pause=pause)
+        logger.info(f"Re-encryption: {count} {column.class_.__tablename__}.{column.key} values "
+                    f"moved to key '{encryption.get_keyring().active_kid}'")
+        total += count
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Re-encrypted {asyncio.run(reencrypt_all(pause=0))} values")
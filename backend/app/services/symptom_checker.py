@@ -1,137 +1,343 @@
 """Symptom Checker — decision-tree-based symptom triage system."""
 
+import base64
+import hashlib
+import hmac
 import json
 import os
-from typing import Dict, Any, Optional, List
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.symptom_session_store import SessionState, SymptomSessionStore
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 SYMPTOM_TREE_PATH = os.path.join(DATA_DIR, "symptom_tree.json")
+SYMPTOM_RESULTS_PATH = os.path.join(DATA_DIR, "symptom_results.json")
+
+logger = logging.getLogger(__name__)
+
+DISCLAIMER = "⚠️ This assessment is for informational purposes only and does not constitute medical advice. Always consult a qualified healthcare provider for proper diagnosis and treatment."
+
+# ``option_next`` value for an option that ends the questionnaire
+END = -1
+
+
+class CompiledTree:
+    """
+    ``symptom_tree.json`` compiled into integer-indexed arrays.
+
+    Nodes and conditions get dense integer ids. Options of node ``n`` are the
+    rows ``option_start[n]:option_start[n + 1]`` of the flat option tables:
+    ``option_next`` (target node id or ``END``) and ``option_scores`` (one
+    score vector over the condition index per option). A session is then just
+    a node id plus a float32 score vector, and answering is one vector add.
+    ``option_conditions`` keeps each option's scored conditions in file order,
+    which decides ties between equal scores.
+    """
+
+    def __init__(self, tree: Dict):
+        self.tree = tree
+        # Identifies this version of the tree (binds stateless path tokens to it)
+        self.fingerprint = hashlib.sha256(json.dumps(tree, sort_keys=True).encode()).digest()
+        self.node_ids: List[str] = list(tree["nodes"])
+        self.node_index: Dict[str, int] = {nid: i for i, nid in enumerate(self.node_ids)}
+
+        names = set(tree.get("conditions", {}))
+        for node in tree["nodes"].values():
+            for option in node.get("options", []):
+                names.update(option.get("scores", {}))
+        self.conditions: List[str] = sorted(names)
+        self.condition_index: Dict[str, int] = {name: i for i, name in enumerate(self.conditions)}
+        self.condition_info: List[Dict] = [tree.get("conditions", {}).get(name, {}) for name in self.conditions]
+
+        starts, nexts, rows = [0], [], []
+        self.option_conditions: List[List[int]] = []
+        self.questions: List[Dict[str, Any]] = []
+        self.is_final = np.zeros(len(self.node_ids), dtype=bool)
+        for i, nid in enumerate(self.node_ids):
+            node = tree["nodes"][nid]
+            options = node.get("options", [])
+            for option in options:
+                nexts.append(self.node_index.get(option.get("next"), END))
+                row = np.zeros(len(self.conditions), dtype=np.float32)
+                for condition, score in option.get("scores", {}).items():
+                    row[self.condition_index[condition]] = score
+                rows.append(row)
+                self.option_conditions.append([self.condition_index[c] for c in option.get("scores", {})])
+            starts.append(starts[-1] + len(options))
+            self.is_final[i] = node.get("is_final", False)
+            # Response payload is static per node — build it once
+            self.questions.append({
+                "node_id": nid,
+                "question": node["question"],
+                "options": options,
+                "category": node.get("category", "general"),
+                "is_final": node.get("is_final", False),
+            })
+
+        self.option_start = np.asarray(starts, dtype=np.int32)
+        self.option_next = np.asarray(nexts, dtype=np.int32)
+        self.option_scores = (
+            np.vstack(rows) if rows else np.zeros((0, len(self.conditions)), dtype=np.float32)
+        )
+        self.root = self.node_index["root"]
+        # path_key(path) -> final response, filled from the precomputed table
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def new_scores(self) -> np.ndarray:
+        return np.zeros(len(self.conditions), dtype=np.float32)
 
-_symptom_tree: Optional[Dict] = None
+    def scoring_order(self, path: List[int]) -> List[int]:
+        """Condition indices in the order the answers on ``path`` first scored them."""
+        node, order, seen = self.root, [], set()
+        for option_index in path:
+            row = self.option_start[node] + option_index
+            for i in self.option_conditions[row]:
+                if i not in seen:
+                    seen.add(i)
+                    order.append(i)
+            node = int(self.option_next[row])
+            if node == END:
+                break
+        return order
 
+    def replay(self, path: List[int]) -> SessionState:
+        """Rebuild the state reached by answering ``path`` from the root."""
+        state = SessionState(node=self.root, scores=self.new_scores())
+        for option_index in path:
+            start, stop = self.option_start[state.node], self.option_start[state.node + 1]
+            if not 0 <= option_index < stop - start:
+                raise ValueError("Invalid answer path")
+            row = start + option_index
+            state.scores += self.option_scores[row]
+            state.path.append(option_index)
+            state.node = int(self.option_next[row])
+            if state.node == END or self.is_final[state.node]:
+                raise ValueError("Answer path is already complete")
+        return state
 
-def _load_tree():
-    global _symptom_tree
-    if _symptom_tree is None:
+
+_compiled: Optional[CompiledTree] = None
+
+
+def path_key(path: List[int]) -> str:
+    """Stable key for a complete answer path (one byte per answer)."""
+    return hashlib.blake2b(bytes(path), digest_size=8).hexdigest()
+
+
+def _load_results(tree: CompiledTree, path: str = SYMPTOM_RESULTS_PATH):
+    """Materialise the precomputed result table if it was built for this tree."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+    except FileNotFoundError:
+        logger.info("No precomputed symptom results; computing results per request")
+        return
+    if table.get("fingerprint") != tree.fingerprint.hex() or table.get("conditions") != tree.conditions:
+        logger.warning(
+            "symptom_results.json is stale — rebuild with `python -m app.services.symptom_tree_build`"
+        )
+        return
+    tree.results = {
+        key: _result_payload(tree, [(i, p) for i, p in entry["c"]], entry["u"])
+        for key, entry in table["results"].items()
+    }
+
+
+def _load_tree() -> CompiledTree:
+    global _compiled
+    if _compiled is None:
         with open(SYMPTOM_TREE_PATH, 'r', encoding='utf-8') as f:
-            _symptom_tree = json.load(f)
-    return _symptom_tree
+            _compiled = CompiledTree(json.load(f))
+        _load_results(_compiled)
+    return _compiled
 
 
 class SymptomCheckerSession:
     """Manages a single symptom checker session with branching logic."""
 
-    def __init__(self):
+    def __init__(self, state: Optional[SessionState] = None):
         self.tree = _load_tree()
-        self.current_node_id = "root"
-        self.answers: List[Dict] = []
-        self.scores: Dict[str, float] = {}
+        self.state = state or SessionState(node=self.tree.root, scores=self.tree.new_scores())
+
+    @property
+    def current_node_id(self) -> str:
+        return self.tree.node_ids[self.state.node]
 
     def get_current_question(self) -> Dict[str, Any]:
         """Get the current question and options."""
-        node = self.tree["nodes"][self.current_node_id]
-        return {
-            "node_id": self.current_node_id,
-            "question": node["question"],
-            "options": node.get("options", []),
-            "category": node.get("category", "general"),
-            "is_final": node.get("is_final", False),
-        }
+        return self.tree.questions[self.state.node]
 
     def answer(self, option_index: int) -> Dict[str, Any]:
         """Process an answer and advance to the next node."""
-        node = self.tree["nodes"][self.current_node_id]
-        options = node.get("options", [])
+        tree = self.tree
+        start, stop = tree.option_start[self.state.node], tree.option_start[self.state.node + 1]
 
-        if option_index < 0 or option_index >= len(options):
+        if option_index < 0 or option_index >= stop - start:
             raise ValueError("Invalid option index")
 
-        selected = options[option_index]
-        self.answers.append({
-            "question": node["question"],
-            "answer": selected["text"],
-            "node_id": self.current_node_id,
-        })
-
-        # Accumulate scores for conditions
-        if "scores" in selected:
-            for condition, score in selected["scores"].items():
-                self.scores[condition] = self.scores.get(condition, 0) + score
+        row = start + option_index
+        self.state.path.append(option_index)
+        self.state.scores += tree.option_scores[row]
 
         # Move to next node
-        next_node_id = selected.get("next")
-        if next_node_id is None or next_node_id not in self.tree["nodes"]:
+        next_node = int(tree.option_next[row])
+        if next_node == END:
             return self._generate_result()
 
-        self.current_node_id = next_node_id
-        next_node = self.tree["nodes"][self.current_node_id]
-
-        if next_node.get("is_final", False):
+        self.state.node = next_node
+        if tree.is_final[next_node]:
             return self._generate_result()
 
         return self.get_current_question()
 
     def _generate_result(self) -> Dict[str, Any]:
         """Generate final result based on accumulated scores."""
-        if not self.scores:
-            return {
-                "is_final": True,
-                "result": {
-                    "conditions": [],
-                    "recommendation": "Based on your responses, no specific conditions were strongly indicated. If symptoms persist, please consult a healthcare professional.",
-                    "urgency": "low",
-                    "disclaimer": "⚠️ This assessment is for informational purposes only and does not constitute medical advice. Always consult a qualified healthcare provider for proper diagnosis and treatment.",
-                },
-            }
-
-        # Sort conditions by score
-        sorted_conditions = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
-        total_score = sum(s for _, s in sorted_conditions)
-
-        conditions = []
-        for condition, score in sorted_conditions[:3]:
-            probability = round((score / total_score) * 100, 1) if total_score > 0 else 0
-            condition_info = self.tree.get("conditions", {}).get(condition, {})
-            conditions.append({
-                "name": condition,
-                "probability": probability,
-                "description": condition_info.get("description", ""),
-                "recommendation": condition_info.get("recommendation", "Consult a healthcare professional."),
-            })
+        precomputed = self.tree.results.get(path_key(self.state.path))
+        if precomputed is not None:
+            return precomputed
+        return generate_result(self.tree, self.state.scores, self.tree.scoring_order(self.state.path))
 
-        # Determine urgency
-        max_score = sorted_conditions[0][1] if sorted_conditions else 0
-        urgency = "high" if max_score > 5 else "medium" if max_score > 3 else "low"
 
+def _result_payload(tree: CompiledTree, ranked: List[Tuple[int, float]], urgency: str) -> Dict[str, Any]:
+    """Response body for the top conditions as (condition index, probability) pairs."""
+    if not ranked:
         return {
             "is_final": True,
             "result": {
-                "conditions": conditions,
-                "recommendation": f"Based on your symptoms, the most likely condition may be {sorted_conditions[0][0]}. Please consult a healthcare professional for a proper diagnosis.",
-                "urgency": urgency,
-                "disclaimer": "⚠️ This assessment is for informational purposes only and does not constitute medical advice. Always consult a qualified healthcare provider for proper diagnosis and treatment.",
+                "conditions": [],
+                "recommendation": "Based on your responses, no specific conditions were strongly indicated. If symptoms persist, please consult a healthcare professional.",
+                "urgency": "low",
+                "disclaimer": DISCLAIMER,
             },
         }
 
+    conditions = []
+    for i, probability in ranked:
+        info = tree.condition_info[i]
+        conditions.append({
+            "name": tree.conditions[i],
+            "probability": probability,
+            "description": info.get("description", ""),
+            "recommendation": info.get("recommendation", "Consult a healthcare professional."),
+        })
+
+    return {
+        "is_final": True,
+        "result": {
+            "conditions": conditions,
+            "recommendation": f"Based on your symptoms, the most likely condition may be {tree.conditions[ranked[0][0]]}. Please consult a healthcare professional for a proper diagnosis.",
+            "urgency": urgency,
+            "disclaimer": DISCLAIMER,
+        },
+    }
+
+
+def generate_result(tree: CompiledTree, scores: np.ndarray, order: List[int]) -> Dict[str, Any]:
+    """
+    Final result for a score vector: top-3 conditions, probabilities, urgency.
+
+    ``order`` lists the scored conditions as ``CompiledTree.scoring_order``
+    returns them; equal scores keep that order, as the dict-based checker did.
+    """
+    if not order:
+        return _result_payload(tree, [], "low")
+
+    scored = np.asarray(order, dtype=np.intp)
+    values = scores[scored]
+    top = scored[np.argsort(-values, kind="stable")[:3]]
+    total_score = float(values.sum())
+
+    ranked = [
+        (int(i), round((float(scores[i]) / total_score) * 100, 1) if total_score > 0 else 0)
+        for i in top
+    ]
 
-# In-memory session store (in production, use Redis)
-_sessions: Dict[str, SymptomCheckerSession] = {}
+    # Determine urgency
+    max_score = float(scores[top[0]])
+    urgency = "high" if max_score > 5 else "medium" if max_score > 3 else "low"
 
+    return _result_payload(tree, ranked, urgency)
 
-def create_session(session_id: str) -> Dict[str, Any]:
+
+async def create_session(store: SymptomSessionStore, session_id: str) -> Dict[str, Any]:
     """Start a new symptom checker session."""
-    _load_tree()
     session = SymptomCheckerSession()
-    _sessions[session_id] = session
+    await store.set(session_id, session.state)
     return session.get_current_question()
 
 
-def answer_question(session_id: str, option_index: int) -> Dict[str, Any]:
+async def answer_question(store: SymptomSessionStore, session_id: str, option_index: int) -> Dict[str, Any]:
     """Answer the current question in an existing session."""
-    if session_id not in _sessions:
+    state = await store.get(session_id)
+    if state is None:
         raise ValueError("Session not found. Please start a new session.")
-    session = _sessions[session_id]
+    session = SymptomCheckerSession(state)
     result = session.answer(option_index)
     if result.get("is_final"):
-        del _sessions[session_id]  # Clean up completed session
+        await store.delete(session_id)  # Clean up completed session
+    else:
+        await store.set(session_id, session.state)
     return result
+
+
+# --- Stateless mode -------------------------------------------------------
+#
+# The client carries the answer path in an HMAC-signed token instead of the
+# server holding a session: ``/answer`` verifies the token, replays the path
+# on the compiled tree and returns a token for the extended path. Any worker
+# can serve any request and nothing is stored.
+
+_TOKEN_MAC_BYTES = 16
+
+
+def _token_key() -> bytes:
+    secret = settings.SYMPTOM_TOKEN_SECRET or settings.JWT_SECRET_KEY
+    # Domain-separated so the key is never used for JWTs directly
+    return hmac.new(secret.encode(), b"symptom-path-token", hashlib.sha256).digest()
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode_path_token(path: List[int]) -> str:
+    """Sign an answer path (one byte per answer) for the current tree."""
+    body = bytes(path)
+    mac = hmac.new(_token_key(), _load_tree().fingerprint + body, hashlib.sha256).digest()
+    return f"{_b64(body)}.{_b64(mac[:_TOKEN_MAC_BYTES])}"
+
+
+def decode_path_token(token: str) -> List[int]:
+    """Verify a path token; raises ValueError if it is malformed, forged or for another tree."""
+    try:
+        body_part, mac_part = token.split(".")
+        body, mac = _unb64(body_part), _unb64(mac_part)
+    except ValueError:
+        raise ValueError("Invalid symptom checker token.")
+    expected = hmac.new(_token_key(), _load_tree().fingerprint + body, hashlib.sha256).digest()
+    if not hmac.compare_digest(mac, expected[:_TOKEN_MAC_BYTES]):
+        raise ValueError("Invalid symptom checker token.")
+    return list(body)
+
+
+def start_stateless() -> Dict[str, Any]:
+    """First question plus the token for the empty path."""
+    tree = _load_tree()
+    return {**tree.questions[tree.root], "token": encode_path_token([])}
+
+
+def answer_stateless(token: str, option_index: int) -> Dict[str, Any]:
+    """Answer the question the token points at; returns the next question + token, or the result."""
+    session = SymptomCheckerSession(_load_tree().replay(decode_path_token(token)))
+    result = session.answer(option_index)
+    if result.get("is_final"):
+        return result
+    return {**result, "token": encode_path_token(session.state.path)}
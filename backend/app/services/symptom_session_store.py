@@ -0,0 +1,213 @@
+"""
+Symptom checker session stores.
+
+A session is kept as compact state — current node id, the answer indices
+taken so far and the score vector — rather than a live object, so it can be put in
+Redis and served by any worker. The in-memory backend is bounded (LRU) and
+evicts abandoned sessions after ``SYMPTOM_SESSION_TTL`` seconds.
+"""
+
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    RedisError = OSError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the serialised form changes; sessions stored in another
+# format (e.g. by the previous release, in Redis) are treated as expired.
+SESSION_FORMAT = 2
+
+
+@dataclass
+class SessionState:
+    """Everything needed to resume a symptom checker session."""
+
+    node: int
+    path: List[int] = field(default_factory=list)
+    scores: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+
+    def dumps(self) -> str:
+        # Scores are small integers in practice; store them sparsely
+        nonzero = np.flatnonzero(self.scores)
+        return json.dumps({
+            "v": SESSION_FORMAT,
+            "n": self.node,
+            "p": self.path,
+            "k": len(self.scores),
+            "s": {int(i): float(self.scores[i]) for i in nonzero},
+        }, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, raw: str) -> "SessionState":
+        """Parse ``dumps`` output; raises ``ValueError`` for other formats."""
+        data = json.loads(raw)
+        if not isinstance(data, dict) or data.get("v") != SESSION_FORMAT:
+            raise ValueError("Unsupported symptom session format")
+        scores = np.zeros(data["k"], dtype=np.float32)
+        for i, value in data["s"].items():
+            scores[int(i)] = value
+        return cls(node=data["n"], path=data["p"], scores=scores)
+
+
+def _load(raw: str) -> Optional[SessionState]:
+    try:
+        return SessionState.loads(raw)
+    except (ValueError, KeyError, TypeError, IndexError):
+        logger.info("Symptom sessions: discarding a session stored in an older format")
+        return None
+
+
+class SymptomSessionStore(ABC):
+    """Interface for symptom checker session backends."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        ...
+
+    @abstractmethod
+    async def set(self, session_id: str, state: SessionState) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        ...
+
+
+class InMemorySessionStore(SymptomSessionStore):
+    """Per-process LRU with a sliding TTL; holds serialised state only."""
+
+    def __init__(self, ttl: float, max_sessions: int):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[session_id]
+            return None
+        return _load(entry[1])
+
+    async def set(self, session_id: str, state: SessionState) -> None:
+        self._entries[session_id] = (time.monotonic() + self.ttl, state.dumps())
+        self._entries.move_to_end(session_id)
+        # Expired entries sit at the front (least recently touched) — drop
+        # those first, then trim to size.
+        now = time.monotonic()
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest[0] > now and len(self._entries) <= self.max_sessions:
+                break
+            self._entries.popitem(last=False)
+
+    async def delete(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+
+class RedisSessionStore(SymptomSessionStore):
+    """
+    Redis-backed store shared by all workers.
+
+    Uses the in-memory ``fallback`` when Redis cannot be reached at startup
+    and, per call, whenever a Redis command fails, so a Redis outage
+    degrades sessions to per-worker instead of failing requests.
+    """
+
+    KEY_PREFIX = "symptom_session:"
+
+    def __init__(self, ttl: float, fallback: SymptomSessionStore, redis_client: Optional[object] = None):
+        self.ttl = ttl
+        self.fallback = fallback
+        self.redis_client = redis_client
+        self._initialized = redis_client is not None
+
+    async def _init_redis(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        if REDIS_AVAILABLE:
+            try:
+                self.redis_client = aioredis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                )
+                await self.redis_client.ping()
+            except Exception:
+                logger.warning("Symptom sessions: Redis unavailable, using in-process store")
+                self.redis_client = None
+
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        await self._init_redis()
+        if self.redis_client is not None:
+            try:
+                raw = await self.redis_client.get(f"{self.KEY_PREFIX}{session_id}")
+            except (RedisError, OSError):
+                logger.warning("Symptom sessions: Redis read failed, using in-process store")
+            else:
+                if raw is not None:
+                    return _load(raw)
+        # Also covers sessions written to the fallback during a Redis outage
+        return await self.fallback.get(session_id)
+
+    async def set(self, session_id: str, state: SessionState) -> None:
+        await self._init_redis()
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.set(f"{self.KEY_PREFIX}{session_id}", state.dumps(), ex=int(self.ttl))
+            except (RedisError, OSError):
+                logger.warning("Symptom sessions: Redis write failed, using in-process store")
+            else:
+                # Drop any copy written during an outage so it cannot shadow this one
+                await self.fallback.delete(session_id)
+                return
+        await self.fallback.set(session_id, state)
+
+    async def delete(self, session_id: str) -> None:
+        await self._init_redis()
+        await self.fallback.delete(session_id)
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.delete(f"{self.KEY_PREFIX}{session_id}")
+            except (RedisError, OSError):
+                logger.warning("Symptom sessions: Redis delete failed")
+
+
+def create_session_store() -> SymptomSessionStore:
+    """Build the store selected by ``SYMPTOM_SESSION_BACKEND``."""
+    memory = InMemorySessionStore(
+        ttl=settings.SYMPTOM_SESSION_TTL,
+        max_sessions=settings.SYMPTOM_SESSION_MAX,
+    )
+    if settings.SYMPTOM_SESSION_BACKEND == "redis":
+        return RedisSessionStore(ttl=settings.SYMPTOM_SESSION_TTL, fallback=memory)
+    return memory
+
+
+session_store = create_session_store()
+
+
+def get_session_store() -> SymptomSessionStore:
+    """Dependency returning the process-wide symptom session store."""
+    return session_store
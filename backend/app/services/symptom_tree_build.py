@@ -0,0 +1,151 @@
+"""
+Symptom tree build step — validation and the precomputed result table.
+
+The tree is static, so every complete answer path and its result can be
+worked out ahead of time. This module validates ``symptom_tree.json`` and
+writes ``symptom_results.json``: one compact entry per path, keyed by
+``path_key(path)``, which the checker turns into a dictionary lookup.
+
+Usage (from backend/):
+    python -m app.services.symptom_tree_build            # validate + write table
+    python -m app.services.symptom_tree_build --check    # fail if table is stale
+    python -m app.services.symptom_tree_build --strict   # warnings are errors too
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+from app.services.symptom_checker import (
+    SYMPTOM_RESULTS_PATH, SYMPTOM_TREE_PATH, CompiledTree, END, generate_result, path_key,
+)
+
+
+def validate_tree(tree: Dict) -> Tuple[List[str], List[str]]:
+    """
+    Check the raw tree for structural bugs.
+
+    Errors: missing root, dangling ``next`` ids, unreachable nodes, cycles,
+    nodes without options. Warnings: scored conditions that have no entry in
+    ``conditions`` (they are shown without a description).
+    """
+    errors: List[str] = []
+    warnings: List[str] = []
+    nodes = tree.get("nodes", {})
+    known = set(tree.get("conditions", {}))
+
+    if "root" not in nodes:
+        return ["missing 'root' node"], warnings
+
+    edges: Dict[str, List[str]] = {}
+    for node_id, node in nodes.items():
+        options = node.get("options", [])
+        if not options and not node.get("is_final"):
+            errors.append(f"node '{node_id}' has no options and is not final")
+        edges[node_id] = []
+        for i, option in enumerate(options):
+            nxt = option.get("next")
+            if nxt is not None and nxt not in nodes:
+                errors.append(f"node '{node_id}' option {i} points to missing node '{nxt}'")
+            elif nxt is not None:
+                edges[node_id].append(nxt)
+            for condition in option.get("scores", {}):
+                if condition not in known:
+                    warnings.append(f"node '{node_id}' option {i} scores unknown condition '{condition}'")
+
+    # Reachability and cycles in one iterative DFS (white/grey/black colouring)
+    state: Dict[str, int] = {}
+    stack: List[Tuple[str, Iterator[str]]] = [("root", iter(edges["root"]))]
+    state["root"] = 1
+    while stack:
+        node_id, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            state[node_id] = 2
+            stack.pop()
+        elif state.get(child) == 1:
+            errors.append(f"cycle through '{child}' (reached again from '{node_id}')")
+        elif child not in state:
+            state[child] = 1
+            stack.append((child, iter(edges[child])))
+
+    for node_id in nodes:
+        if node_id not in state:
+            errors.append(f"node '{node_id}' is unreachable from root")
+
+    return errors, warnings
+
+
+def enumerate_paths(tree: CompiledTree) -> Iterator[List[int]]:
+    """Every complete answer path (assumes a validated, acyclic tree)."""
+    stack = [(tree.root, [])]
+    while stack:
+        node, path = stack.pop()
+        start, stop = tree.option_start[node], tree.option_start[node + 1]
+        for option_index in range(stop - start):
+            nxt = int(tree.option_next[start + option_index])
+            extended = path + [option_index]
+            if nxt == END or tree.is_final[nxt]:
+                yield extended
+            else:
+                stack.append((nxt, extended))
+
+
+def build_result_table(tree: CompiledTree) -> Dict:
+    """Compact precomputed results: condition indices, probabilities and urgency per path."""
+    results = {}
+    for path in enumerate_paths(tree):
+        state = tree.replay(path[:-1])
+        start = tree.option_start[state.node]
+        scores = state.scores + tree.option_scores[start + path[-1]]
+        result = generate_result(tree, scores, tree.scoring_order(path))["result"]
+        results[path_key(path)] = {
+            "c": [[tree.condition_index[c["name"]], c["probability"]] for c in result["conditions"]],
+            "u": result["urgency"],
+        }
+    return {
+        "fingerprint": tree.fingerprint.hex(),
+        "conditions": tree.conditions,
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Validate symptom_tree.json and build the result table.")
+    parser.add_argument("--check", action="store_true", help="only verify the committed table is current")
+    parser.add_argument("--strict", action="store_true", help="treat warnings as errors")
+    args = parser.parse_args(argv)
+
+    with open(SYMPTOM_TREE_PATH, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    errors, warnings = validate_tree(raw)
+    for message in warnings:
+        print(f"warning: {message}")
+    for message in errors:
+        print(f"error: {message}")
+    if errors or (args.strict and warnings):
+        return 1
+
+    table = build_result_table(CompiledTree(raw))
+    if args.check:
+        try:
+            with open(SYMPTOM_RESULTS_PATH, "r", encoding="utf-8") as f:
+                current = json.load(f)
+        except FileNotFoundError:
+            current = None
+        if current != table:
+            print(f"{SYMPTOM_RESULTS_PATH} is stale — rerun without --check")
+            return 1
+        print(f"OK: {len(table['results'])} paths, table up to date")
+        return 0
+
+    with open(SYMPTOM_RESULTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(table, f, separators=(",", ":"), sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {len(table['results'])} paths to {SYMPTOM_RESULTS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
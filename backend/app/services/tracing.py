@@ -0,0 +1,113 @@
+"""
+Per-request stage timing.
+
+``send_message`` starts a ``RequestTrace`` and code below it — the NLP
+pipeline and the Tier 2 / Tier 3 services — wraps its stages in
+``span(name)``. The current trace travels in a ``ContextVar``, so nothing is
+passed through call signatures. Each span:
+
+- is appended to the current request's trace (if any), which becomes the
+  ``Server-Timing`` header, the ``timings`` field of the SSE ``done`` event
+  and one JSON log line (logger ``app.trace``) when the stream ends;
+- feeds the ``healthbot_chat_stage_seconds`` histogram;
+- becomes an OpenTelemetry span when the ``opentelemetry`` package is
+  installed and ``TRACING_OTEL`` is on (no-op otherwise).
+"""
+
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.metrics import observe_stage
+
+try:
+    from opentelemetry import trace as otel_trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger("app.trace")
+
+# Upper bound on spans kept per request (retry loops stay bounded)
+MAX_SPANS = 64
+
+_current: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+_tracer = otel_trace.get_tracer("healthbot") if OTEL_AVAILABLE else None
+
+
+class RequestTrace:
+    """Stage spans of one request, in completion order."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+        self.attributes: Dict[str, object] = {}
+        self._finished = False
+
+    def add(self, name: str, seconds: float) -> None:
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append((name, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds per stage (repeated stages are summed) plus ``total``."""
+        out: Dict[str, float] = {}
+        for name, seconds in self.spans:
+            out[name] = out.get(name, 0.0) + seconds * 1000
+        out["total"] = self.elapsed() * 1000
+        return {name: round(ms, 1) for name, ms in out.items()}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.timings().items())
+
+    def finish(self, **fields) -> None:
+        """Write the request's single structured log line (once)."""
+        if self._finished:
+            return
+        self._finished = True
+        logger.info(json.dumps({
+            "event": self.name,
+            "trace_id": self.trace_id,
+            **self.attributes,
+            **fields,
+            "timings_ms": self.timings(),
+        }, default=str))
+
+
+def start_trace(name: str) -> RequestTrace:
+    """Make a new trace current for the rest of this request."""
+    trace = RequestTrace(name)
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a stage into the current trace, the stage histogram and OpenTelemetry."""
+    otel = (
+        _tracer.start_as_current_span(name)
+        if OTEL_AVAILABLE and settings.TRACING_OTEL else nullcontext()
+    )
+    started = time.perf_counter()
+    try:
+        with otel:
+            yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe_stage(name, elapsed)
+        trace = _current.get()
+        if trace is not None:
+            trace.add(name, elapsed)
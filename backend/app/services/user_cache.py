@@ -0,0 +1,126 @@
+"""
+Authenticated-user cache — the small slice of ``User`` that auth checks need.
+
+``get_current_user`` runs on nearly every API call; caching the principal
+(id, role, is_active, has_consented) for a short TTL removes its
+``SELECT ... FROM users`` round trip. Anything that changes those fields
+must call ``user_cache.invalidate(user_id)`` after committing.
+
+With ``USER_CACHE_REDIS`` enabled the entries live in Redis so that every
+worker sees an invalidation immediately; otherwise (or if Redis cannot be
+reached) a per-process LRU is used.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from app.config import settings
+from app.models.user import UserRole
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Authenticated caller as seen by route dependencies."""
+
+    id: int
+    role: UserRole
+    is_active: bool
+    has_consented: bool
+
+
+class UserCache:
+    """Size-bounded TTL cache of ``UserPrincipal`` keyed by user id."""
+
+    KEY_PREFIX = "user_principal:"
+
+    def __init__(self, ttl: float, max_entries: int, use_redis: bool = False):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.use_redis = use_redis and REDIS_AVAILABLE
+        self.redis_client: Optional[object] = None
+        self._initialized = False
+        self._entries: "OrderedDict[int, Tuple[float, UserPrincipal]]" = OrderedDict()
+
+    async def _init_redis(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        if self.use_redis:
+            try:
+                self.redis_client = aioredis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                )
+                await self.redis_client.ping()
+            except Exception:
+                logger.warning("User cache: Redis unavailable, using in-process cache")
+                self.redis_client = None
+
+    async def get(self, user_id: int) -> Optional[UserPrincipal]:
+        await self._init_redis()
+        if self.redis_client is not None:
+            try:
+                raw = await self.redis_client.get(f"{self.KEY_PREFIX}{user_id}")
+            except Exception:
+                return None
+            if raw is None:
+                return None
+            data = json.loads(raw)
+            return UserPrincipal(**{**data, "role": UserRole(data["role"])})
+
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return entry[1]
+
+    async def set(self, principal: UserPrincipal) -> None:
+        await self._init_redis()
+        if self.redis_client is not None:
+            data = {**asdict(principal), "role": principal.role.value}
+            try:
+                await self.redis_client.set(
+                    f"{self.KEY_PREFIX}{principal.id}", json.dumps(data), ex=max(1, int(self.ttl)),
+                )
+            except Exception:
+                pass
+            return
+
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.delete(f"{self.KEY_PREFIX}{user_id}")
+            except Exception:
+                logger.warning("User cache: failed to invalidate user %s in Redis", user_id)
+
+    def clear(self):
+        self._entries.clear()
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    use_redis=settings.USER_CACHE_REDIS,
+)
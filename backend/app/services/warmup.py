@@ -0,0 +1,69 @@
+"""
+Background warm-up of heavy subsystems.
+
+The lifespan used to load the NLP models (spaCy, the intent classifier) and
+build the AI client before the server accepted connections, so every
+restart or scale-out waited for them. Now startup only does what requests
+cannot work without (the database); the rest runs here as a background task
+while the process already answers ``/api/health``. ``/api/health/ready``
+reports 503 until every step has finished, so load balancers hold traffic
+back until then.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+OK = "ok"
+FAILED = "failed"
+
+
+class Warmup:
+    """Runs named async warm-up steps once, in order, and records their outcome."""
+
+    def __init__(self):
+        self.steps: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, steps: Dict[str, Callable[[], Awaitable]]) -> asyncio.Task:
+        self.steps = {name: PENDING for name in steps}
+        self.durations = {}
+        self._task = asyncio.create_task(self._run(steps))
+        return self._task
+
+    async def _run(self, steps: Dict[str, Callable[[], Awaitable]]):
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                await step()
+                self.steps[name] = OK
+            except Exception as e:
+                # Non-fatal: each subsystem has a fallback path at request time
+                logger.warning(f"Warm-up step '{name}' failed: {e}")
+                self.steps[name] = FAILED
+            self.durations[name] = round(time.perf_counter() - started, 3)
+            logger.info(f"Warm-up step '{name}': {self.steps[name]} in {self.durations[name]}s")
+
+    @property
+    def ready(self) -> bool:
+        """True once every step has run (successfully or not)."""
+        return self._task is not None and self._task.done()
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> Dict:
+        return {"ready": self.ready, "steps": dict(self.steps), "durations": dict(self.durations)}
+
+
+warmup = Warmup()
@@ -1,22 +1,32 @@
 """FastAPI dependency injection utilities."""
 
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_read_db
 from app.utils.jwt_handler import verify_token
 from app.models.user import User, UserRole
+from app.services.user_cache import UserPrincipal, user_cache
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    """Extract and validate the current user from JWT token."""
+    db: AsyncSession = Depends(get_read_db),
+) -> UserPrincipal:
+    """
+    Extract and validate the current user from JWT token.
+
+    Returns the cached ``UserPrincipal``; the ``users`` row is only read on a
+    cache miss, from the read pool so authentication never waits on the
+    writer connection. Routes that need the full profile load it themselves.
+    """
     token = credentials.credentials
     payload = verify_token(token)
 
@@ -31,8 +41,15 @@ async def get_current_user(
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    user = await user_cache.get(int(user_id))
+    if user is None:
+        row = (await db.execute(
+            select(User.id, User.role, User.is_active, User.has_consented)
+            .where(User.id == int(user_id))
+        )).one_or_none()
+        if row is not None:
+            user = UserPrincipal(*row)
+            await user_cache.set(user)
 
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
@@ -40,9 +57,22 @@ async def get_current_user(
     return user
 
 
+def get_token_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> Optional[int]:
+    """User id from a valid bearer token, or None for anonymous callers (no database access)."""
+    if credentials is None:
+        return None
+    payload = verify_token(credentials.credentials)
+    try:
+        return int(payload["sub"]) if payload else None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
 def require_role(*roles: UserRole):
     """Dependency factory: require user to have one of the specified roles."""
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
         if current_user.role not in roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -52,7 +82,7 @@ def require_role(*roles: UserRole):
     return role_checker
 
 
-async def require_consent(current_user: User = Depends(get_current_user)) -> User:
+async def require_consent(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Ensure user has accepted the medical disclaimer before using chat."""
     if not current_user.has_consented:
         raise HTTPException(
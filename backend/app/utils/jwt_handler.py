@@ -1,17 +1,70 @@
-"""JWT token creation and verification."""
+"""
+JWT token creation and verification.
 
+Verification goes through a bounded LRU of already-verified tokens, so a
+client reusing its access token costs one hash + dictionary lookup instead
+of a full decode and HMAC check. Entries expire at the token's own ``exp``.
+
+Keys are selected by the ``kid`` header. ``JWT_SIGNING_KEYS`` lists the
+accepted keys (``kid:secret`` pairs) and ``JWT_ACTIVE_KID`` picks the one
+used for new tokens; tokens without a ``kid`` are checked against
+``JWT_SECRET_KEY``. Retiring a key also retires its cached tokens.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from jose import JWTError, jwt
 from app.config import settings
 
+# PyJWT decodes noticeably faster than python-jose; use it when installed.
+# Both packages import as ``jwt``, so check for a PyJWT-only attribute.
+try:
+    import jwt as _pyjwt
+    if not hasattr(_pyjwt, "PyJWTError"):
+        _pyjwt = None
+except ImportError:
+    _pyjwt = None
+
+
+@lru_cache(maxsize=4)
+def _parse_keys(spec: str) -> Dict[str, str]:
+    keys = {}
+    for pair in spec.split(","):
+        if ":" in pair:
+            kid, secret = pair.split(":", 1)
+            keys[kid.strip()] = secret.strip()
+    return keys
+
+
+def _signing_keys() -> Dict[str, str]:
+    return _parse_keys(settings.JWT_SIGNING_KEYS)
+
+
+def _key_for(kid: Optional[str]) -> Optional[str]:
+    if kid is None:
+        return settings.JWT_SECRET_KEY
+    return _signing_keys().get(kid)
+
+
+def _encode(to_encode: Dict) -> str:
+    kid = settings.JWT_ACTIVE_KID or None
+    key = _key_for(kid)
+    if key is None:
+        raise RuntimeError(f"JWT_ACTIVE_KID {kid!r} is not listed in JWT_SIGNING_KEYS")
+    headers = {"kid": kid} if kid else None
+    return jwt.encode(to_encode, key, algorithm=settings.JWT_ALGORITHM, headers=headers)
+
 
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    return _encode(to_encode)
 
 
 def create_refresh_token(data: Dict) -> str:
@@ -19,13 +72,69 @@ def create_refresh_token(data: Dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    return _encode(to_encode)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified token payloads keyed by SHA-256 of the token."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Optional[str], Dict]]" = OrderedDict()
+
+    def get(self, key: bytes) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        exp, kid, payload = entry
+        if exp <= time.time() or _key_for(kid) is None:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, key: bytes, kid: Optional[str], payload: Dict):
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        self._entries[key] = (float(exp), kid, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(max_entries=settings.JWT_CACHE_MAX_ENTRIES)
+
+
+def _decode(token: str) -> Tuple[Optional[str], Dict]:
+    """Full signature + claims verification. Raises JWTError on any failure."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is not None and not isinstance(kid, str):
+        # Attacker-controlled header: a list/dict kid would break the key lookup
+        raise JWTError("Invalid key id")
+    key = _key_for(kid)
+    if key is None:
+        raise JWTError("Unknown signing key")
+    if _pyjwt is not None:
+        try:
+            return kid, _pyjwt.decode(token, key, algorithms=[settings.JWT_ALGORITHM])
+        except _pyjwt.PyJWTError as e:
+            raise JWTError(str(e))
+    return kid, jwt.decode(token, key, algorithms=[settings.JWT_ALGORITHM])
 
 
 def verify_token(token: str) -> Optional[Dict]:
     """Verify and decode a JWT token."""
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return dict(payload)
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
+        kid, payload = _decode(token)
     except JWTError:
         return None
+    token_cache.put(cache_key, kid, payload)
+    return dict(payload)
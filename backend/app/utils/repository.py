@@ -0,0 +1,46 @@
+"""Single-statement create/update helpers using INSERT/UPDATE ... RETURNING."""
+
+from typing import Any, Dict, Iterable, Optional, Type, TypeVar
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+
+async def insert_returning(db: AsyncSession, model: Type[T], **values: Any) -> T:
+    """
+    Insert a row and return it as a persistent ORM instance in one round trip.
+
+    Replaces ``db.add(obj); flush(); refresh(obj)`` — generated ids and column
+    defaults come back via ``RETURNING`` (SQLite >= 3.35, PostgreSQL) instead
+    of a follow-up SELECT.
+    """
+    result = await db.execute(insert(model).values(**values).returning(model))
+    return result.scalar_one()
+
+
+async def update_returning(
+    db: AsyncSession,
+    model: Type[T],
+    where: Iterable[Any],
+    values: Dict[str, Any],
+) -> Optional[T]:
+    """
+    Update the row matching ``where`` and return its new state, or None.
+
+    The ownership filter goes in ``where`` so lookup, update and reload are a
+    single ``UPDATE ... WHERE ... RETURNING`` statement.
+    """
+    where = list(where)
+    if not values:
+        result = await db.execute(select(model).where(*where))
+        return result.scalar_one_or_none()
+    result = await db.execute(
+        update(model)
+        .where(*where)
+        .values(**values)
+        .returning(model)
+        .execution_options(populate_existing=True, synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
@@ -0,0 +1,83 @@
+"""
+Encryption benchmark — per-call AESGCM construction vs cached cipher vs bulk APIs.
+
+Encrypts and decrypts N message-sized records (default 100k) with:
+  legacy     a new AESGCM per call + base64 (the previous implementation)
+  cached     encrypt()/decrypt() with the cached cipher
+  many       encrypt_many()/decrypt_many() (base64 text)
+  many-raw   encrypt_many(raw=True) — bytes for LargeBinary columns
+
+Usage (from backend/):
+    python -m benchmarks.bench_encryption [--records 100000] [--size 200]
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.services.encryption import EncryptionService
+
+
+def _legacy_encrypt(key: bytes, plaintext: str) -> str:
+    nonce = os.urandom(12)
+    return base64.b64encode(nonce + AESGCM(key).encrypt(nonce, plaintext.encode('utf-8'), None)).decode('utf-8')
+
+
+def _legacy_decrypt(key: bytes, data: str) -> str:
+    raw = base64.b64decode(data)
+    return AESGCM(key).decrypt(raw[:12], raw[12:], None).decode('utf-8')
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--size", type=int, default=200, help="plaintext length in characters")
+    args = parser.parse_args()
+
+    svc = EncryptionService()
+    records = [f"{i:08d} " + "x" * (args.size - 9) for i in range(args.records)]
+
+    runs = {
+        "legacy": (
+            lambda: [_legacy_encrypt(svc.key, r) for r in records],
+            lambda enc: [_legacy_decrypt(svc.key, e) for e in enc],
+        ),
+        "cached": (
+            lambda: [svc.encrypt(r) for r in records],
+            lambda enc: [svc.decrypt(e) for e in enc],
+        ),
+        "many": (
+            lambda: svc.encrypt_many(records),
+            lambda enc: svc.decrypt_many(enc),
+        ),
+        "many-raw": (
+            lambda: svc.encrypt_many(records, raw=True),
+            lambda enc: svc.decrypt_many(enc, raw=True),
+        ),
+    }
+    print(f"{args.records} records x {args.size} chars")
+    for name, (enc_fn, dec_fn) in runs.items():
+        encrypted, enc_s = _timed(enc_fn)
+        decrypted, dec_s = _timed(lambda: dec_fn(encrypted))
+        assert decrypted == records
+        stored = sum(len(e) for e in encrypted)
+        print(
+            f"{name:>9}: encrypt {args.records / enc_s:9.0f}/s  decrypt {args.records / dec_s:9.0f}/s"
+            f"  stored {stored / args.records:6.1f} B/record"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+JWT verification benchmark — full decode vs the verified-token cache.
+
+Usage (from backend/):
+    python -m benchmarks.bench_jwt_verify [--iterations 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import jwt_handler
+from app.utils.jwt_handler import create_access_token, verify_token, token_cache
+
+
+def _time(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "42", "role": "PATIENT"})
+    backend = "PyJWT" if jwt_handler._pyjwt is not None else "python-jose"
+
+    def cold():
+        token_cache.clear()
+        verify_token(token)
+
+    cold_us = _time(cold, args.iterations)
+    verify_token(token)
+    warm_us = _time(lambda: verify_token(token), args.iterations)
+    print(f"backend: {backend}")
+    print(f"full decode : {cold_us:8.2f} us/verify")
+    print(f"cached      : {warm_us:8.2f} us/verify  ({cold_us / warm_us:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Login load benchmark — bcrypt on the event loop vs the dedicated hash executor.
+
+Runs a burst of concurrent logins against the real app (temporary SQLite file)
+while a background "chat" client keeps polling a cheap endpoint
+(``GET /api/chat/conversations``). Reports login throughput and the latency
+the chat client observed during the storm — the number that matters, since
+inline bcrypt stalls every other request on the loop.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login_load [--logins 40] [--concurrency 20] [--rounds 10]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _configure_env(rounds: int):
+    tmp = tempfile.mkdtemp(prefix="healthbot-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+    os.environ["APP_DEBUG"] = "false"
+    os.environ["BCRYPT_ROUNDS"] = str(rounds)
+
+
+async def _run(mode: str, logins: int, concurrency: int) -> dict:
+    from httpx import AsyncClient, ASGITransport
+    from app.main import app
+    from app.database import init_db
+    from app.services import auth_service
+
+    await init_db()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        email = f"bench-{mode}@example.com"
+        await client.post("/api/auth/register", json={
+            "email": email, "full_name": "Bench User",
+            "password": "benchpass123", "role": "PATIENT",
+        })
+
+        original = auth_service.verify_and_update_password
+        if mode == "inline":
+            async def inline_verify(plain, hashed):
+                return auth_service.pwd_context.verify_and_update(plain, hashed)
+            auth_service.verify_and_update_password = inline_verify
+            import app.routers.auth as auth_router
+            auth_router.verify_and_update_password = inline_verify
+
+        chat_latencies = []
+        done = asyncio.Event()
+
+        async def chat_poller():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/chat/conversations")
+                chat_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with sem:
+                r = await client.post("/api/auth/login", json={"email": email, "password": "benchpass123"})
+                assert r.status_code == 200, r.text
+
+        poller = asyncio.create_task(chat_poller())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await poller
+
+        if mode == "inline":
+            auth_service.verify_and_update_password = original
+            import app.routers.auth as auth_router
+            auth_router.verify_and_update_password = original
+
+    chat_latencies.sort()
+    return {
+        "logins_per_s": logins / elapsed,
+        "chat_p50_ms": statistics.median(chat_latencies) * 1000,
+        "chat_max_ms": chat_latencies[-1] * 1000,
+        "chat_samples": len(chat_latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    _configure_env(args.rounds)
+
+    for mode in ("inline", "executor"):
+        r = await _run(mode, args.logins, args.concurrency)
+        print(
+            f"{mode:>9}: {r['logins_per_s']:7.1f} logins/s | chat p50 {r['chat_p50_ms']:7.1f} ms"
+            f" max {r['chat_max_ms']:7.1f} ms ({r['chat_samples']} samples)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Middleware overhead benchmark — BaseHTTPMiddleware vs pure ASGI.
+
+Drives a small Starlette app directly through the ASGI interface (no HTTP
+server, no client buffering) with the previous ``BaseHTTPMiddleware``
+security-headers implementation and with the current pure-ASGI one. Reports
+JSON requests/sec and SSE time-to-first-byte (first body chunk of a
+streaming response whose generator yields immediately, then keeps going).
+
+Usage (from backend/):
+    python -m benchmarks.bench_middleware [--requests 5000] [--streams 500]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.middleware.security_headers import SECURITY_HEADERS, SecurityHeadersMiddleware
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """The pre-rewrite implementation, kept here for comparison."""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+async def _json(request):
+    return JSONResponse({"status": "healthy"})
+
+
+async def _sse(request):
+    async def events():
+        yield "data: first\n\n"
+        for i in range(5):
+            await asyncio.sleep(0.001)
+            yield f"data: {i}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _build(middleware_cls):
+    return Starlette(
+        routes=[Route("/json", _json), Route("/sse", _sse)],
+        middleware=[Middleware(middleware_cls)],
+    )
+
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 5000), "server": ("bench", 80),
+    }
+
+
+async def _call(app, path: str) -> float:
+    """Run one request; return seconds until the first non-empty body chunk."""
+    start = time.perf_counter()
+    first = None
+    delivered = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        # Like a server: one request message, then block until disconnect
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first
+        if first is None and message["type"] == "http.response.body" and message.get("body"):
+            first = time.perf_counter() - start
+
+    await app(_scope(path), receive, send)
+    disconnected.set()
+    return first
+
+
+async def _run(name: str, app, requests: int, streams: int):
+    for _ in range(50):  # warm-up
+        await _call(app, "/json")
+    start = time.perf_counter()
+    for _ in range(requests):
+        await _call(app, "/json")
+    rps = requests / (time.perf_counter() - start)
+
+    ttfb = sorted([await _call(app, "/sse") for _ in range(streams)])
+    print(
+        f"{name:>14}: {rps:8.0f} req/s | SSE TTFB p50 {statistics.median(ttfb) * 1e3:6.3f} ms"
+        f" p99 {ttfb[int(len(ttfb) * 0.99) - 1] * 1e3:6.3f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--streams", type=int, default=500)
+    args = parser.parse_args()
+
+    await _run("BaseHTTP", _build(LegacySecurityHeadersMiddleware), args.requests, args.streams)
+    await _run("pure ASGI", _build(SecurityHeadersMiddleware), args.requests, args.streams)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+SQLite concurrency benchmark — legacy StaticPool vs writer + read-only WAL pool.
+
+Simulates the chat workload: many concurrent readers (conversation lists,
+history, context fetches) interleaved with a smaller number of writers
+(message inserts), while a few "slow" sessions hold a connection open the
+way a Tier 2/3 request does during generation.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sqlite_concurrency [--readers 64] [--writers 8] [--seconds 5]
+
+Parallel readers only pay off with more than one CPU; on a single core the
+extra aiosqlite threads mostly add GIL hand-off cost, so compare on hardware
+that matches production.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import create_sqlite_engine
+
+# Mirrors the current ``messages`` table: no index on conversation_id, so the
+# context query is a scan + sort — real SQLite work that releases the GIL.
+SCHEMA = [
+    "CREATE TABLE messages (id INTEGER PRIMARY KEY, conversation_id INTEGER, content TEXT)",
+]
+
+
+async def _seed(engine, rows: int = 20000):
+    async with engine.begin() as conn:
+        for stmt in SCHEMA:
+            await conn.execute(text(stmt))
+        await conn.execute(
+            text("INSERT INTO messages (conversation_id, content) VALUES (:c, :t)"),
+            [{"c": i % 500, "t": "x" * 200} for i in range(rows)],
+        )
+
+
+async def _run(write_engine, read_engine, readers: int, writers: int, slow: int, seconds: float):
+    deadline = time.perf_counter() + seconds
+    counts = {"reads": 0, "writes": 0}
+    latencies = []
+
+    async def reader(i: int):
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            async with read_engine.connect() as conn:
+                await conn.execute(
+                    text("SELECT id, content FROM messages WHERE conversation_id = :c ORDER BY id DESC LIMIT 10"),
+                    {"c": i % 500},
+                )
+            latencies.append(time.perf_counter() - t0)
+            counts["reads"] += 1
+
+    async def writer(i: int):
+        while time.perf_counter() < deadline:
+            async with write_engine.begin() as conn:
+                await conn.execute(
+                    text("INSERT INTO messages (conversation_id, content) VALUES (:c, 'bench')"),
+                    {"c": i % 500},
+                )
+            counts["writes"] += 1
+
+    async def slow_request():
+        # Holds a read session open across a simulated AI call
+        while time.perf_counter() < deadline:
+            async with read_engine.connect() as conn:
+                await conn.execute(text("SELECT count(*) FROM messages WHERE conversation_id = 1"))
+                await asyncio.sleep(0.5)
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(reader(i) for i in range(readers)),
+        *(writer(i) for i in range(writers)),
+        *(slow_request() for _ in range(slow)),
+    )
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    return counts["reads"] / elapsed, counts["writes"] / elapsed, p50 * 1000, p99 * 1000
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        # --- Before: one shared connection for everything -----------------
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'static.db')}"
+        static = create_async_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        async with static.begin() as conn:
+            await conn.execute(text("PRAGMA journal_mode=WAL"))
+            await conn.execute(text("PRAGMA synchronous=NORMAL"))
+        await _seed(static)
+        before = await _run(static, static, args.readers, args.writers, args.slow, args.seconds)
+        await static.dispose()
+
+        # --- After: one writer connection + read-only WAL pool -------------
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'split.db')}"
+        writer = create_sqlite_engine(url, read_only=False, pool_size=1)
+        reader = create_sqlite_engine(url, read_only=True, pool_size=args.pool)
+        for eng in (writer, reader):
+            eng.echo = False
+        await _seed(writer)
+        after = await _run(writer, reader, args.readers, args.writers, args.slow, args.seconds)
+        await writer.dispose()
+        await reader.dispose()
+
+    print(f"cpus={os.cpu_count()}  readers={args.readers}  writers={args.writers}  slow={args.slow}")
+    print(f"{'mode':<28}{'reads/s':>10}{'writes/s':>10}{'read p50 ms':>13}{'read p99 ms':>13}")
+    for label, row in (("StaticPool (single conn)", before), ("writer + %d readers" % args.pool, after)):
+        print(f"{label:<28}{row[0]:>10.0f}{row[1]:>10.0f}{row[2]:>13.2f}{row[3]:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=64)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--slow", type=int, default=2, help="sessions held open across a simulated AI call")
+    parser.add_argument("--pool", type=int, default=4, help="read-only pool size")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""
+Startup profile — import-time breakdown and time to first request / readiness.
+
+Runs in fresh subprocesses (so nothing is already imported):
+  imports    ``python -X importtime -c "import app.main"``, self time summed
+             per top-level package (sklearn.*, openai.*, ...)
+  lifespan   process start → lifespan startup done (server would accept
+             connections) → background warm-up finished (/api/health/ready 200)
+
+Uses an in-memory database so nothing on disk is touched.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--top 15] [--runs 3]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LIFESPAN_SCRIPT = """
+import time
+t0 = time.perf_counter()
+import asyncio
+from app.main import app
+from app.services.warmup import warmup
+t_import = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        t_started = time.perf_counter()
+        while not warmup.ready:
+            await asyncio.sleep(0.01)
+        t_ready = time.perf_counter()
+    print(f"{t_import - t0:.3f} {t_started - t0:.3f} {t_ready - t0:.3f}")
+
+asyncio.run(main())
+"""
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    return env
+
+
+def import_profile(top: int):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    by_package = defaultdict(int)
+    total = 0
+    for line in out.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_time, cumulative, _, name = match.groups()
+        by_package[name.split(".")[0]] += int(self_time)
+        if name == "app.main":
+            total = int(cumulative)
+    print(f"import app.main: {total / 1e6:.3f}s  (self time by top-level package)")
+    for name, micros in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {name:<28} {micros / 1e6:7.3f}s")
+
+
+def lifespan_profile(runs: int):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", LIFESPAN_SCRIPT],
+            cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True,
+        ).stdout.split()
+        samples.append([float(v) for v in out[-3:]])
+    imported, started, ready = (statistics.median(col) for col in zip(*samples))
+    print(f"\nmedian of {runs} runs (seconds from process start):")
+    print(f"  app imported        {imported:.3f}")
+    print(f"  accepting traffic   {started:.3f}")
+    print(f"  ready (warm-up)     {ready:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    import_profile(args.top)
+    lifespan_profile(args.runs)
+
+
+if __name__ == "__main__":
+    main()
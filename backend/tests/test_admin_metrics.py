@@ -0,0 +1,133 @@
+"""
+Tests for admin metrics rollups and the dashboard cache.
+"""
+import pytest
+from httpx import AsyncClient
+
+from app.main import app
+from app.models.conversation import Conversation
+from app.services import admin_metrics
+from app.services.chat_service import MessageWriteBehind, get_message_writer
+
+
+async def _conversation(session_factory) -> int:
+    async with session_factory() as db:
+        conv = Conversation(session_id="metrics", title="t")
+        db.add(conv)
+        await db.commit()
+        return conv.id
+
+
+async def _token(client: AsyncClient, email: str, role: str = "ADMIN") -> str:
+    await client.post("/api/auth/register", json={
+        "email": email,
+        "full_name": "Metrics User",
+        "password": "securepass123",
+        "role": role,
+    })
+    login = await client.post("/api/auth/login", json={"email": email, "password": "securepass123"})
+    return login.json()["access_token"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics_cache():
+    admin_metrics.metrics_cache.clear()
+    yield
+    admin_metrics.metrics_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_rollups_follow_write_behind_inserts(session_factory):
+    async with session_factory() as db:
+        await admin_metrics.ensure_counters(db)
+    conv_id = await _conversation(session_factory)
+
+    writer = MessageWriteBehind(session_factory, flush_interval=60)
+    writer.enqueue(conv_id, "user", "hi")
+    writer.enqueue(conv_id, "assistant", "hello", intent="nlp_ml")
+    writer.enqueue(conv_id, "user", "headache?")
+    writer.enqueue(conv_id, "assistant", "rest", intent="nvidia_api")
+    await writer.stop()
+
+    async with session_factory() as db:
+        assert await admin_metrics.message_total(db) == 4
+        series = await admin_metrics.message_series(db, hours=1)
+    assert len(series) == 1
+    assert series[0]["total_messages"] == 4
+    assert series[0]["tiers"] == {"user": 2, "nlp_ml": 1, "nvidia_api": 1}
+
+    async with session_factory() as db:
+        await admin_metrics.record_messages_deleted(db, 3)
+        await db.commit()
+        assert await admin_metrics.message_total(db) == 1
+
+
+@pytest.mark.asyncio
+async def test_deleting_a_conversation_discards_its_buffered_messages(client: AsyncClient, session_factory):
+    async with session_factory() as db:
+        await admin_metrics.ensure_counters(db)
+    conv_id = await _conversation(session_factory)
+    writer = MessageWriteBehind(session_factory, flush_interval=60)
+    app.dependency_overrides[get_message_writer] = lambda: writer
+
+    writer.enqueue(conv_id, "user", "hi")
+    writer.enqueue(conv_id, "assistant", "hello", intent="nlp_ml")
+    assert await writer.flush() == 2
+    writer.enqueue(conv_id, "user", "still buffered")
+
+    client.cookies.set("healthbot_session", "metrics")
+    assert (await client.delete(f"/api/chat/conversations/{conv_id}")).status_code == 200
+    assert writer.backlog == 0
+    await writer.stop()
+
+    async with session_factory() as db:
+        assert await admin_metrics.message_total(db) == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_cache_coalesces_loads():
+    cache = admin_metrics.MetricsCache(ttl=60)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return {"total": len(calls)}
+
+    first = await cache.get_or_load("system", load)
+    second = await cache.get_or_load("system", load)
+    assert first == second == {"total": 1}
+    assert len(calls) == 1
+
+    cache.clear()
+    assert await cache.get_or_load("system", load) == {"total": 2}
+
+
+@pytest.mark.asyncio
+async def test_admin_metrics_endpoints(client: AsyncClient, session_factory):
+    async with session_factory() as db:
+        await admin_metrics.ensure_counters(db)
+    conv_id = await _conversation(session_factory)
+    writer = MessageWriteBehind(session_factory, flush_interval=60)
+    writer.enqueue(conv_id, "user", "hi")
+    writer.enqueue(conv_id, "assistant", "hello", intent="nlp_ml")
+    await writer.stop()
+
+    headers = {"Authorization": f"Bearer {await _token(client, 'admin-metrics@example.com')}"}
+    res = await client.get("/api/admin/metrics", headers=headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["total_users"], body["total_conversations"], body["total_messages"]) == (1, 1, 2)
+    assert body["total_feedbacks"] == 0 and body["average_rating"] is None
+
+    # Served from the TTL cache until it expires
+    await _token(client, "second-admin@example.com")
+    assert (await client.get("/api/admin/metrics", headers=headers)).json()["total_users"] == 1
+
+    res = await client.get("/api/admin/metrics/series?hours=1", headers=headers)
+    assert res.status_code == 200
+    [point] = res.json()
+    assert point["total_messages"] == 2 and point["tiers"] == {"user": 1, "nlp_ml": 1}
+
+    patient = await _token(client, "patient-metrics@example.com", role="PATIENT")
+    res = await client.get("/api/admin/metrics", headers={"Authorization": f"Bearer {patient}"})
+    assert res.status_code == 403
@@ -82,3 +82,30 @@ async def test_delete_appointment(client: AsyncClient):
 async def test_appointments_require_auth(client: AsyncClient):
     response = await client.get("/api/appointments/")
     assert response.status_code in [401, 403]
+
+
+@pytest.mark.asyncio
+async def test_update_appointment(client: AsyncClient):
+    token = await get_patient_token(client)
+    create_res = await client.post(
+        "/api/appointments/",
+        json={"title": "Original", "scheduled_at": "2025-09-01T09:00:00"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    appt_id = create_res.json()["id"]
+    update_res = await client.put(
+        f"/api/appointments/{appt_id}",
+        json={"title": "Rescheduled", "location": "Clinic B"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert update_res.status_code == 200
+    data = update_res.json()
+    assert data["title"] == "Rescheduled"
+    assert data["location"] == "Clinic B"
+
+    missing = await client.put(
+        "/api/appointments/99999",
+        json={"title": "Nope"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert missing.status_code == 404
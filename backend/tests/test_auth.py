@@ -117,3 +117,156 @@ async def test_consent(client: AsyncClient):
         headers={"Authorization": f"Bearer {token}"},
     )
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_cost(client: AsyncClient, db_session):
+    """A hash made with a different bcrypt cost is upgraded on successful login."""
+    from passlib.hash import bcrypt
+    from app.config import settings
+    from app.services.auth_service import get_user_by_email
+
+    await client.post("/api/auth/register", json={
+        "email": "rehash@example.com",
+        "full_name": "Rehash User",
+        "password": "securepass123",
+        "role": "PATIENT",
+    })
+    user = await get_user_by_email(db_session, "rehash@example.com")
+    user.password_hash = bcrypt.using(rounds=4).hash("securepass123")
+    await db_session.commit()
+
+    response = await client.post("/api/auth/login", json={
+        "email": "rehash@example.com",
+        "password": "securepass123",
+    })
+    assert response.status_code == 200
+    assert user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+
+async def _register_and_login(client: AsyncClient, email: str, role: str = "PATIENT") -> dict:
+    await client.post("/api/auth/register", json={
+        "email": email,
+        "full_name": "Cache User",
+        "password": "securepass123",
+        "role": role,
+    })
+    login_res = await client.post("/api/auth/login", json={"email": email, "password": "securepass123"})
+    return {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_principal_cached_until_invalidated(client: AsyncClient, db_session):
+    """Auth checks use the cached principal; invalidation forces a reload."""
+    from sqlalchemy import update
+    from app.models.user import User
+    from app.services.auth_service import get_user_by_email
+    from app.services.user_cache import user_cache
+
+    headers = await _register_and_login(client, "cached@example.com")
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+    user = await get_user_by_email(db_session, "cached@example.com")
+
+    # Out-of-band change: the cached principal is still served
+    await db_session.execute(update(User).where(User.id == user.id).values(is_active=False))
+    await db_session.commit()
+    assert (await client.get("/api/appointments/", headers=headers)).status_code == 200
+
+    await user_cache.invalidate(user.id)
+    assert (await client.get("/api/appointments/", headers=headers)).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_principal_lookup_uses_read_pool(client: AsyncClient):
+    """A cache miss reads the user from the read pool, not the writer connection."""
+    from app.database import get_db
+    from app.main import app
+    from app.services.user_cache import user_cache
+
+    headers = await _register_and_login(client, "read-pool@example.com")
+    user_cache.clear()
+
+    async def writer_unavailable():
+        raise AssertionError("authentication used the writer connection")
+        yield
+
+    app.dependency_overrides[get_db] = writer_unavailable
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_consent_invalidates_principal(client: AsyncClient, db_session):
+    """Accepting consent is visible to the next auth check immediately."""
+    from app.services.auth_service import get_user_by_email
+    from app.services.user_cache import user_cache
+
+    headers = await _register_and_login(client, "consent-cache@example.com")
+    await client.get("/api/auth/me", headers=headers)
+    user = await get_user_by_email(db_session, "consent-cache@example.com")
+    assert (await user_cache.get(user.id)).has_consented is False
+
+    await client.post("/api/auth/consent", json={"accepted": True}, headers=headers)
+    assert await user_cache.get(user.id) is None
+    await client.get("/api/auth/me", headers=headers)
+    assert (await user_cache.get(user.id)).has_consented is True
+
+
+async def _user_id(client: AsyncClient, headers: dict) -> int:
+    return (await client.get("/api/auth/me", headers=headers)).json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_admin_changes_invalidate_principal(client: AsyncClient):
+    """Deactivation, role changes and deletion by an admin apply to the next request."""
+    admin = await _register_and_login(client, "cache-admin@example.com", role="ADMIN")
+    headers = await _register_and_login(client, "cache-target@example.com")
+    user_id = await _user_id(client, headers)
+    assert (await client.get("/api/admin/users", headers=headers)).status_code == 403
+
+    res = await client.patch(f"/api/admin/users/{user_id}", json={"role": "ADMIN"}, headers=admin)
+    assert res.status_code == 200 and res.json()["role"] == "ADMIN"
+    assert (await client.get("/api/admin/users", headers=headers)).status_code == 200
+
+    res = await client.patch(f"/api/admin/users/{user_id}", json={"is_active": False}, headers=admin)
+    assert res.status_code == 200 and res.json()["is_active"] is False
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
+
+    await client.patch(f"/api/admin/users/{user_id}", json={"is_active": True}, headers=admin)
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+    assert (await client.delete(f"/api/admin/users/{user_id}", headers=admin)).status_code == 200
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_profile_of_deleted_user_is_unauthorized(client: AsyncClient, db_session):
+    """A principal cached before an out-of-band delete gets 401, not a 500."""
+    from sqlalchemy import delete
+    from app.models.user import User
+    from app.services.user_cache import user_cache
+
+    headers = await _register_and_login(client, "gone@example.com")
+    user_id = await _user_id(client, headers)
+    await db_session.execute(delete(User).where(User.id == user_id))
+    await db_session.commit()
+
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
+    assert await user_cache.get(user_id) is None
+
+
+@pytest.mark.asyncio
+async def test_user_cache_bounded_and_expiring():
+    """The in-process cache evicts least-recently-used entries and honours the TTL."""
+    from app.models.user import UserRole
+    from app.services.user_cache import UserCache, UserPrincipal
+
+    cache = UserCache(ttl=60, max_entries=2)
+    for i in (1, 2):
+        await cache.set(UserPrincipal(i, UserRole.PATIENT, True, True))
+    await cache.get(1)
+    await cache.set(UserPrincipal(3, UserRole.PATIENT, True, True))
+    assert await cache.get(2) is None
+    assert await cache.get(1) is not None
+
+    expired = UserCache(ttl=0, max_entries=2)
+    await expired.set(UserPrincipal(1, UserRole.PATIENT, True, True))
+    assert await expired.get(1) is None
@@ -0,0 +1,544 @@
+"""
+Tests for the chat send flow and message write-behind buffer.
+"""
+import csv
+import io
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from sqlalchemy.exc import OperationalError
+
+from app.main import app
+from app.models.conversation import Conversation, Message
+from app.routers import chat
+from app.services.chat_service import MessageWriteBehind, get_message_writer, is_outage
+from app.services.metrics import WRITE_BEHIND_DROPPED
+from app.services import quota
+from app.services.quota import QuotaManager, RESERVE_LUA, TIER2_SECONDS, TIER3_TOKENS, get_quota_manager
+
+
+class _StubPipeline:
+    """Tier 1 NLP stub so tests don't need spaCy / the intent model."""
+
+    async def process(self, text, context=None):
+        return {
+            "response": "Drink water and rest.",
+            "intent": "greeting",
+            "confidence": 0.95,
+            "entities": [],
+            "is_emergency": False,
+        }
+
+
+@pytest.fixture
+def stub_nlp(monkeypatch):
+    async def _get():
+        return _StubPipeline()
+    monkeypatch.setattr(chat, "_get_nlp_pipeline", _get)
+
+
+@pytest_asyncio.fixture
+async def writer(client, session_factory):
+    # Long interval: tests flush explicitly
+    w = MessageWriteBehind(session_factory, max_batch=50, flush_interval=60)
+    app.dependency_overrides[get_message_writer] = lambda: w
+    yield w
+    await w.stop()
+
+
+async def _messages(session_factory, conv_id):
+    async with session_factory() as db:
+        return (await db.execute(
+            select(Message).where(Message.conversation_id == conv_id).order_by(Message.id)
+        )).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_emergency_message_persisted(client: AsyncClient, session_factory, writer):
+    response = await client.post("/api/chat/send", json={"message": "I want to kill myself"})
+    assert response.status_code == 200
+    assert response.headers["X-Is-Emergency"] == "true"
+    conv_id = int(response.headers["X-Conversation-Id"])
+
+    await writer.flush()
+    rows = await _messages(session_factory, conv_id)
+    assert [m.role for m in rows] == ["user", "assistant"]
+    assert rows[1].is_emergency is True
+
+
+@pytest.mark.asyncio
+async def test_messages_are_written_behind(client: AsyncClient, session_factory, writer, stub_nlp):
+    response = await client.post("/api/chat/send", json={"message": "hello, I have a headache"})
+    assert response.status_code == 200
+    assert response.headers["X-AI-Tier"] == "nlp_ml"
+    conv_id = int(response.headers["X-Conversation-Id"])
+
+    # Nothing committed yet, but visible as pending context
+    assert await _messages(session_factory, conv_id) == []
+    assert [m["role"] for m in writer.pending_for(conv_id)] == ["user", "assistant"]
+
+    assert await writer.flush() == 2
+    rows = await _messages(session_factory, conv_id)
+    assert [m.role for m in rows] == ["user", "assistant"]
+    assert rows[1].intent == "nlp_ml"
+    assert writer.pending_for(conv_id) == []
+
+
+@pytest.mark.asyncio
+async def test_write_behind_batches_and_drains_on_stop(session_factory):
+    async with session_factory() as db:
+        conv = Conversation(session_id="s1", title="t")
+        db.add(conv)
+        await db.commit()
+        conv_id = conv.id
+
+    w = MessageWriteBehind(session_factory, max_batch=10, flush_interval=60)
+    for i in range(25):
+        w.enqueue(conv_id, "user", f"m{i}")
+    await w.stop()
+
+    assert w.backlog == 0
+    async with session_factory() as db:
+        count = await db.scalar(select(func.count(Message.id)).where(Message.conversation_id == conv_id))
+        rows = (await db.execute(
+            select(Message.content).where(Message.conversation_id == conv_id).order_by(Message.id)
+        )).scalars().all()
+    assert count == 25
+    assert rows == [f"m{i}" for i in range(25)]
+
+
+async def _contents(session_factory, conv_id):
+    async with session_factory() as db:
+        return (await db.execute(
+            select(Message.content).where(Message.conversation_id == conv_id).order_by(Message.id)
+        )).scalars().all()
+
+
+async def _conversation(session_factory) -> int:
+    async with session_factory() as db:
+        conv = Conversation(session_id="poison", title="t")
+        db.add(conv)
+        await db.commit()
+        return conv.id
+
+
+@pytest.mark.asyncio
+async def test_write_behind_drops_poison_row_after_retries(session_factory):
+    conv_id = await _conversation(session_factory)
+    w = MessageWriteBehind(session_factory, max_batch=10, flush_interval=60, max_retries=2, retry_backoff=0.5)
+    dropped = WRITE_BEHIND_DROPPED._children[()].value
+    w.enqueue(conv_id, "user", "before")
+    w.enqueue(conv_id, None, "rejected: role is NOT NULL")
+    w.enqueue(conv_id, "assistant", "after")
+
+    started = time.monotonic()
+    with pytest.raises(Exception):
+        await w.flush()
+    assert w.backlog == 3 and w.failures == 1
+    assert w._retry_at - started >= 0.5  # backing off before the next attempt
+
+    # Retry budget spent: rows are written one by one and the bad one dropped
+    assert await w.flush() == 2
+    assert w.backlog == 0 and w.failures == 0
+    assert WRITE_BEHIND_DROPPED._children[()].value == dropped + 1
+    w.enqueue(conv_id, "user", "later")
+    await w.stop()
+    assert await _contents(session_factory, conv_id) == ["before", "after", "later"]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_stop_isolates_bad_rows(session_factory):
+    conv_id = await _conversation(session_factory)
+    w = MessageWriteBehind(session_factory, max_batch=10, flush_interval=60)
+    w.enqueue(conv_id, None, "rejected")
+    w.enqueue(conv_id, "user", "kept")
+    await w.stop()  # must not raise at shutdown
+    assert w.backlog == 0
+    assert await _contents(session_factory, conv_id) == ["kept"]
+
+
+@pytest.mark.asyncio
+async def test_write_behind_keeps_rows_while_database_is_down():
+    def unreachable():
+        raise OperationalError("INSERT", {}, ConnectionRefusedError("db down"))
+
+    w = MessageWriteBehind(unreachable, max_batch=10, flush_interval=60, max_retries=1)
+    w.enqueue(1, "user", "hello")
+    with pytest.raises(OperationalError):
+        await w.flush()
+    assert w.backlog == 1  # an outage is not a bad row: nothing dropped
+    await w.stop()
+    assert w.backlog == 1
+
+
+def test_outage_classification_per_dialect():
+    def sqlite_error(message):
+        return OperationalError("INSERT", {}, sqlite3.OperationalError(message))
+
+    class _PgError(Exception):
+        def __init__(self, sqlstate):
+            self.sqlstate = sqlstate
+
+    assert is_outage(sqlite_error("database is locked"), "sqlite")
+    assert not is_outage(sqlite_error("no such table: messages"), "sqlite")
+    assert not is_outage(sqlite_error("table messages has no column named intent"), "sqlite")
+    assert is_outage(OperationalError("INSERT", {}, _PgError("08006")), "postgresql")
+    assert is_outage(OperationalError("INSERT", {}, _PgError("40P01")), "postgresql")
+    assert not is_outage(OperationalError("INSERT", {}, _PgError("42P01")), "postgresql")
+    assert is_outage(ConnectionRefusedError("db down"), "postgresql")
+
+
+@pytest.mark.asyncio
+async def test_write_behind_drops_rows_on_permanent_operational_error(session_factory, monkeypatch):
+    conv_id = await _conversation(session_factory)
+    w = MessageWriteBehind(session_factory, max_batch=10, flush_interval=60, max_retries=1)
+    dropped = WRITE_BEHIND_DROPPED._children[()].value
+
+    async def missing_table(db, rows, touches):
+        raise OperationalError("INSERT", {}, sqlite3.OperationalError("no such table: messages"))
+    monkeypatch.setattr(w, "_write", missing_table)
+
+    w.enqueue(conv_id, "user", "a")
+    w.enqueue(conv_id, "assistant", "b")
+    assert await w.flush() == 0
+    # Not requeued at max_backoff forever: the rows are counted and dropped
+    assert w.backlog == 0 and w._retry_at == 0.0
+    assert WRITE_BEHIND_DROPPED._children[()].value == dropped + 2
+
+
+@pytest.mark.asyncio
+async def test_full_backlog_sheds_chat_requests(client: AsyncClient, session_factory, stub_nlp):
+    w = MessageWriteBehind(session_factory, max_batch=2, flush_interval=60, max_backlog=2)
+    app.dependency_overrides[get_message_writer] = lambda: w
+    dropped = WRITE_BEHIND_DROPPED._children[()].value
+    w._retry_at = time.monotonic() + 20  # backing off after failed flushes
+
+    w.enqueue(1, "user", "a")
+    w.enqueue(1, "assistant", "b")
+    res = await client.post("/api/chat/send", json={"message": "hello, I have a headache"})
+    assert res.status_code == 503
+    assert 19 <= int(res.headers["Retry-After"]) <= 20
+
+    # Hard ceiling at max_backlog + max_batch: memory stays bounded
+    for text in ("c", "d", "e"):
+        w.enqueue(1, "user", text)
+    assert w.backlog == 4
+    assert WRITE_BEHIND_DROPPED._children[()].value == dropped + 1
+    w._rows.clear()
+    w._touches.clear()
+    await w.stop()
+
+
+@pytest.mark.asyncio
+async def test_reads_include_unflushed_messages(client: AsyncClient, session_factory, writer, stub_nlp):
+    client.cookies.set("healthbot_session", "pending-sess")
+    res = await client.post("/api/chat/send", json={"message": "hello, I have a headache"})
+    conv_id = int(res.headers["X-Conversation-Id"])
+    assert writer.backlog == 2
+
+    detail = (await client.get(f"/api/chat/conversations/{conv_id}")).json()
+    assert [(m["id"], m["role"]) for m in detail["messages"]] == [(None, "user"), (None, "assistant")]
+    assert detail["messages"][0]["content"] == "hello, I have a headache"
+
+    export = await client.get(f"/api/chat/conversations/{conv_id}/export")
+    lines = [json.loads(line) for line in export.text.splitlines()]
+    assert [(m["message_id"], m["role"]) for m in lines] == [(None, "user"), (None, "assistant")]
+
+    # Once written they come from the database, exactly once
+    await writer.flush()
+    detail = (await client.get(f"/api/chat/conversations/{conv_id}")).json()
+    assert [m["role"] for m in detail["messages"]] == ["user", "assistant"]
+    assert all(m["id"] is not None for m in detail["messages"])
+
+
+async def _seed_session(session_factory, session_id, conversations, messages_each):
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    ids = []
+    async with session_factory() as db:
+        for c in range(conversations):
+            conv = Conversation(session_id=session_id, title=f"c{c}", updated_at=base + timedelta(minutes=c))
+            db.add(conv)
+            await db.flush()
+            ids.append(conv.id)
+            for m in range(messages_each):
+                db.add(Message(conversation_id=conv.id, role="user", content=f"m{m}",
+                               created_at=base + timedelta(seconds=m)))
+        await db.commit()
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_conversation_list_keyset_pagination(client: AsyncClient, session_factory):
+    ids = await _seed_session(session_factory, "page-sess", conversations=5, messages_each=3)
+    client.cookies.set("healthbot_session", "page-sess")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        res = await client.get("/api/chat/conversations", params=params)
+        assert res.status_code == 200
+        page = res.json()
+        assert len(page) <= 2
+        assert all(c["message_count"] == 3 for c in page)
+        seen += [c["id"] for c in page]
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == list(reversed(ids))
+
+    bad = await client.get("/api/chat/conversations", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_conversation_history_pagination(client: AsyncClient, session_factory):
+    [conv_id] = await _seed_session(session_factory, "hist-sess", conversations=1, messages_each=7)
+    client.cookies.set("healthbot_session", "hist-sess")
+
+    first = (await client.get(f"/api/chat/conversations/{conv_id}", params={"limit": 3})).json()
+    assert [m["content"] for m in first["messages"]] == ["m4", "m5", "m6"]
+    assert first["next_cursor"]
+
+    older = (await client.get(
+        f"/api/chat/conversations/{conv_id}", params={"limit": 5, "before": first["next_cursor"]}
+    )).json()
+    assert [m["content"] for m in older["messages"]] == ["m0", "m1", "m2", "m3"]
+    assert older["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_conversation_export_streams_ndjson_and_csv(client: AsyncClient, session_factory):
+    [conv_id] = await _seed_session(session_factory, "export-sess", conversations=1, messages_each=1200)
+    client.cookies.set("healthbot_session", "export-sess")
+
+    res = await client.get(f"/api/chat/conversations/{conv_id}/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert len(lines) == 1200
+    assert lines[0]["content"] == "m0" and lines[-1]["content"] == "m1199"
+    assert lines[0]["conversation_id"] == conv_id
+
+    res = await client.get(f"/api/chat/conversations/{conv_id}/export", params={"format": "csv"})
+    rows = list(csv.reader(io.StringIO(res.text)))
+    assert rows[0][:3] == ["conversation_id", "message_id", "role"]
+    assert len(rows) == 1201
+
+    client.cookies.set("healthbot_session", "someone-else")
+    assert (await client.get(f"/api/chat/conversations/{conv_id}/export")).status_code == 404
+
+
+async def _bearer(client: AsyncClient, email: str, role: str) -> dict:
+    await client.post("/api/auth/register", json={
+        "email": email, "full_name": "Staff User", "password": "securepass123", "role": role,
+    })
+    login = await client.post("/api/auth/login", json={"email": email, "password": "securepass123"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_staff_export_streams_any_conversation(client: AsyncClient, session_factory):
+    [conv_id] = await _seed_session(session_factory, "patient-sess", conversations=1, messages_each=5)
+    url = f"/api/admin/conversations/{conv_id}/export"
+
+    patient = await _bearer(client, "export-patient@example.com", "PATIENT")
+    assert (await client.get(url, headers=patient)).status_code == 403
+
+    clinician = await _bearer(client, "export-clinician@example.com", "CLINICIAN")
+    res = await client.get(url, headers=clinician, params={"format": "csv"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(res.text)))
+    assert [row[3] for row in rows[1:]] == [f"m{i}" for i in range(5)]
+
+    res = await client.get("/api/admin/conversations/999999/export", headers=clinician)
+    assert res.status_code == 404
+
+
+# --- AI tier quotas ---
+
+def _stub_confidence(monkeypatch, confidence):
+    class _Pipeline(_StubPipeline):
+        async def process(self, text, context=None):
+            return {**await super().process(text, context), "confidence": confidence}
+
+    async def _get():
+        return _Pipeline()
+    monkeypatch.setattr(chat, "_get_nlp_pipeline", _get)
+
+
+@pytest.fixture
+def quotas(client):
+    manager = QuotaManager({TIER2_SECONDS: 0.001, TIER3_TOKENS: 100}, window_seconds=3600)
+    app.dependency_overrides[get_quota_manager] = lambda: manager
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_tier2_quota_degrades_to_nlp(client: AsyncClient, writer, quotas, monkeypatch):
+    import asyncio
+
+    class _LocalAI:
+        _model_id = "stub"
+
+        async def generate_response(self, message, context):
+            await asyncio.sleep(0.01)
+            return "Local model answer."
+
+    _stub_confidence(monkeypatch, 0.6)
+    monkeypatch.setattr(app.state, "local_ai_service", _LocalAI(), raising=False)
+
+    first = await client.post("/api/chat/send", json={"message": "I have a headache"})
+    assert first.headers["X-AI-Tier"] == "local_ai"
+    second = await client.post("/api/chat/send", json={"message": "still a headache"})
+    assert second.headers["X-AI-Tier"] == chat.QUOTA_DEGRADED_TIER
+
+    [usage] = await quotas.snapshot()
+    assert usage["exhausted"] == [TIER2_SECONDS]
+
+
+class _Remote:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def generate_response_with_usage(self, message, context):
+        import asyncio
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return "Remote answer.", 150
+
+
+@pytest.mark.asyncio
+async def test_tier3_quota_counts_tokens(client: AsyncClient, writer, quotas, monkeypatch):
+    remote = _Remote()
+    _stub_confidence(monkeypatch, 0.3)
+    monkeypatch.setattr(app.state, "gemini_service", remote, raising=False)
+
+    first = await client.post("/api/chat/send", json={"message": "my fever is high"})
+    assert first.headers["X-AI-Tier"] == "nvidia_api"
+    second = await client.post("/api/chat/send", json={"message": "my fever is higher"})
+    assert second.headers["X-AI-Tier"] == chat.QUOTA_DEGRADED_TIER
+    assert remote.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_quota_survives_dropped_session_cookie(client: AsyncClient, writer, quotas, monkeypatch):
+    _stub_confidence(monkeypatch, 0.3)
+    monkeypatch.setattr(app.state, "gemini_service", _Remote(), raising=False)
+
+    first = await client.post("/api/chat/send", json={"message": "my fever is high"})
+    assert first.headers["X-AI-Tier"] == "nvidia_api"
+    client.cookies.clear()
+    second = await client.post("/api/chat/send", json={"message": "my fever is higher"})
+    assert second.headers["X-AI-Tier"] == chat.QUOTA_DEGRADED_TIER
+    assert [row["subject"] for row in await quotas.snapshot()] == ["ip:127.0.0.1"]
+
+
+@pytest.mark.asyncio
+async def test_quota_keyed_by_user_when_signed_in(client: AsyncClient, writer, quotas, monkeypatch):
+    _stub_confidence(monkeypatch, 0.3)
+    monkeypatch.setattr(app.state, "gemini_service", _Remote(), raising=False)
+
+    async def headers(email):
+        await client.post("/api/auth/register", json={
+            "email": email, "full_name": "Quota User", "password": "securepass123", "role": "PATIENT",
+        })
+        login = await client.post("/api/auth/login", json={"email": email, "password": "securepass123"})
+        return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    alice, bob = await headers("alice-quota@example.com"), await headers("bob-quota@example.com")
+    send = {"message": "my fever is high"}
+    assert (await client.post("/api/chat/send", json=send, headers=alice)).headers["X-AI-Tier"] == "nvidia_api"
+    assert (await client.post("/api/chat/send", json=send, headers=alice)).headers["X-AI-Tier"] == chat.QUOTA_DEGRADED_TIER
+    # Same IP, different user: separate budget
+    assert (await client.post("/api/chat/send", json=send, headers=bob)).headers["X-AI-Tier"] == "nvidia_api"
+    assert all(row["subject"].startswith("user:") for row in await quotas.snapshot())
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_reservation(client: AsyncClient, writer, quotas, monkeypatch):
+    import asyncio
+
+    remote = _Remote(delay=0.05)
+    _stub_confidence(monkeypatch, 0.3)
+    monkeypatch.setattr(app.state, "gemini_service", remote, raising=False)
+
+    responses = await asyncio.gather(*(
+        client.post("/api/chat/send", json={"message": f"my fever is high {i}"}) for i in range(5)
+    ))
+    tiers = sorted(r.headers["X-AI-Tier"] for r in responses)
+    assert tiers == [chat.QUOTA_DEGRADED_TIER] * 4 + ["nvidia_api"]
+    assert remote.calls == 1
+    # The reservation was settled to the real token count
+    assert await quotas.used("ip:127.0.0.1", TIER3_TOKENS) == 150
+
+
+def _redis_quotas(redis, window_seconds=3600):
+    manager = QuotaManager({TIER2_SECONDS: 10, TIER3_TOKENS: 100}, window_seconds=window_seconds)
+    manager._initialized = True
+    manager.redis_client = redis
+    manager._reserve_script = redis.register_script(RESERVE_LUA)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_settle_applies_to_the_reservation_window(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    manager = _redis_quotas(fakeredis.FakeAsyncRedis(decode_responses=True), window_seconds=60)
+    clock = [600.0]
+    monkeypatch.setattr(quota.time, "time", lambda: clock[0])
+
+    reservation = await manager.reserve("ip:a", TIER3_TOKENS, 80)
+    clock[0] += 60  # the window rolls over while the call runs
+    await manager.settle(reservation, 20)
+    assert await manager.used("ip:a", TIER3_TOKENS) == 0
+    clock[0] -= 60
+    assert await manager.used("ip:a", TIER3_TOKENS) == 20
+
+
+@pytest.mark.asyncio
+async def test_settle_sticks_to_the_reservation_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager = _redis_quotas(redis)
+
+    script = manager._reserve_script
+
+    async def unreachable(**kwargs):
+        raise ConnectionError("redis down")
+
+    manager._reserve_script = unreachable
+    reservation = await manager.reserve("ip:a", TIER3_TOKENS, 80)
+    assert reservation is not None and not reservation.in_redis
+
+    # Redis is back before the call finishes: the correction stays in-process
+    manager._reserve_script = script
+    await manager.settle(reservation, 30)
+    assert await redis.keys("quota:*") == []
+    assert manager._local_usage()["ip:a"][TIER3_TOKENS] == 30
+
+
+@pytest.mark.asyncio
+async def test_admin_quota_usage_endpoint(client: AsyncClient, writer, quotas, monkeypatch):
+    _stub_confidence(monkeypatch, 0.3)
+    monkeypatch.setattr(app.state, "gemini_service", _Remote(), raising=False)
+    await client.post("/api/chat/send", json={"message": "my fever is high"})
+
+    await client.post("/api/auth/register", json={
+        "email": "quota-admin@example.com", "full_name": "Admin", "password": "securepass123", "role": "ADMIN",
+    })
+    login = await client.post("/api/auth/login", json={"email": "quota-admin@example.com", "password": "securepass123"})
+    res = await client.get("/api/admin/quotas", headers={"Authorization": f"Bearer {login.json()['access_token']}"})
+    assert res.status_code == 200
+    [row] = res.json()
+    assert row["subject"] == "ip:127.0.0.1"
+    assert row["tier3_tokens"] == 150 and row["exhausted"] == [TIER3_TOKENS]
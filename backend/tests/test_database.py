@@ -0,0 +1,82 @@
+"""
+Tests for database engine setup and repository helpers.
+"""
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import create_sqlite_engine
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_applied_per_connection(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}"
+    writer = create_sqlite_engine(url, read_only=False, pool_size=1)
+    reader = create_sqlite_engine(url, read_only=True, pool_size=2)
+    try:
+        async with writer.begin() as conn:
+            assert (await conn.scalar(text("PRAGMA journal_mode"))).lower() == "wal"
+            assert await conn.scalar(text("PRAGMA busy_timeout")) > 0
+            assert await conn.scalar(text("PRAGMA query_only")) == 0
+        async with reader.connect() as conn:
+            assert await conn.scalar(text("PRAGMA query_only")) == 1
+            assert await conn.scalar(text("PRAGMA cache_size")) < 0
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reader_sees_committed_writes_but_cannot_write(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'split.db'}"
+    writer = create_sqlite_engine(url, read_only=False, pool_size=1)
+    reader = create_sqlite_engine(url, read_only=True, pool_size=2)
+    try:
+        async with writer.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)"))
+            await conn.execute(text("INSERT INTO t (v) VALUES ('a')"))
+        async with reader.connect() as conn:
+            assert await conn.scalar(text("SELECT count(*) FROM t")) == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t (v) VALUES ('b')"))
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+class _StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@pytest.mark.asyncio
+async def test_create_paths_issue_one_statement(db_session):
+    from app.models.user import UserRole
+    from app.schemas.auth import UserRegister
+    from app.services import chat_service
+    from app.services.auth_service import create_user
+
+    with _StatementCounter(db_session.bind) as counter:
+        conv = await chat_service.get_or_create_conversation(db_session, "sess-1")
+    assert len(counter.statements) == 1
+    assert "RETURNING" in counter.statements[0]
+    assert conv.id is not None and conv.created_at is not None
+
+    with _StatementCounter(db_session.bind) as counter:
+        user = await create_user(db_session, UserRegister(
+            email="count@example.com", full_name="Count User",
+            password="securepass123", role=UserRole.PATIENT,
+        ))
+    assert len(counter.statements) == 1
+    assert user.id is not None and user.is_active is True
@@ -0,0 +1,110 @@
+"""
+Tests for the sampling profiler endpoint and the event-loop lag monitor.
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.services import profiler
+from app.services.profiler import LoopLagMonitor, ProfilerBusyError, render_collapsed, sample_stacks
+
+
+def _spin_until(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _block_loop():
+    time.sleep(0.3)
+
+
+def test_sample_stacks_collapses_busy_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin_until, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        stacks = sample_stacks(0.2, 0.005, {worker.ident})
+    finally:
+        stop.set()
+        worker.join()
+
+    assert stacks
+    assert all(stack.startswith("busy-worker;") for stack in stacks)
+    assert any(stack.endswith("test_diagnostics:_spin_until") for stack in stacks)
+    lines = render_collapsed(stacks).splitlines()
+    assert all(re.fullmatch(r"\S.* \d+", line) for line in lines)
+
+
+def test_one_profile_at_a_time():
+    with profiler._profile_lock:
+        with pytest.raises(ProfilerBusyError):
+            sample_stacks(0.01, 0.005)
+
+
+async def _token(client: AsyncClient, email: str, role: str) -> str:
+    await client.post("/api/auth/register", json={
+        "email": email,
+        "full_name": "Diag User",
+        "password": "securepass123",
+        "role": role,
+    })
+    login = await client.post("/api/auth/login", json={"email": email, "password": "securepass123"})
+    return login.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_is_admin_only(client: AsyncClient):
+    token = await _token(client, "patient-diag@example.com", "PATIENT")
+    res = await client.get(
+        "/api/admin/diagnostics/profile?seconds=0.05",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_returns_collapsed_stacks(client: AsyncClient):
+    token = await _token(client, "admin-diag@example.com", "ADMIN")
+    res = await client.get(
+        "/api/admin/diagnostics/profile?seconds=0.2&interval_ms=5",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert res.headers["content-disposition"].startswith("attachment;")
+    assert int(res.headers["X-Profile-Samples"]) > 0
+    counts = [int(line.rsplit(" ", 1)[1]) for line in res.text.splitlines()]
+    assert sum(counts) == int(res.headers["X-Profile-Samples"])
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoint_rejects_tiny_interval(client: AsyncClient):
+    token = await _token(client, "admin-diag2@example.com", "ADMIN")
+    res = await client.get(
+        "/api/admin/diagnostics/profile?seconds=0.05&interval_ms=0.0001",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_lag_monitor_logs_blocking_call(caplog):
+    monitor = LoopLagMonitor(threshold=0.05, interval=0.01)
+    with caplog.at_level(logging.WARNING, logger="app.profiler"):
+        monitor.start()
+        await asyncio.sleep(0.05)
+        _block_loop()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    # A slow CI host can stall the loop elsewhere too; the blocking call must be caught
+    assert monitor.stalls >= 1
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.profiler"]
+    blocked = [m for m in messages if m.startswith("Event loop blocked")]
+    assert any("_block_loop" in m for m in blocked)
+    assert any(m.startswith("Event loop stall ended") for m in messages)
@@ -1,8 +1,23 @@
 """
 Tests for encryption service.
 """
+import base64
+import os
+import subprocess
+import sys
+
 import pytest
-from app.services.encryption import EncryptionService
+from sqlalchemy import Text, select, type_coerce
+from sqlalchemy.orm import undefer
+
+from app.models.conversation import Conversation, Message
+from app.services import encryption
+from app.services.encryption import EncryptionService, KeyRing, parse_key
+from app.services.reencryption import reencrypt_column
+
+OLD_KEY = "11" * 32
+NEW_KEY = "22" * 32
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 class TestEncryption:
@@ -39,3 +54,183 @@ class TestEncryption:
         encrypted = self.enc.encrypt(plaintext)
         decrypted = self.enc.decrypt(encrypted)
         assert decrypted == plaintext
+
+    def test_many_round_trip(self):
+        plaintexts = ["", "héllo", "Medical record " * 50] + [f"row {i}" for i in range(100)]
+        encrypted = self.enc.encrypt_many(plaintexts)
+        assert len(set(encrypted)) == len(encrypted)
+        assert self.enc.decrypt_many(encrypted) == plaintexts
+        # Bulk output is interchangeable with the single-item API
+        assert self.enc.decrypt(encrypted[1]) == "héllo"
+
+    def test_raw_bytes_format(self):
+        raw = self.enc.encrypt_many(["a", "b"], raw=True)
+        assert all(isinstance(r, bytes) for r in raw)
+        assert len(raw[0]) == 12 + 1 + 16  # nonce + plaintext + GCM tag
+        assert self.enc.decrypt_many(raw, raw=True) == ["a", "b"]
+        assert self.enc.decrypt_bytes(self.enc.encrypt_bytes(b"\x00\x01")) == b"\x00\x01"
+
+    def test_tampered_ciphertext_rejected(self):
+        from cryptography.exceptions import InvalidTag
+        raw = bytearray(self.enc.encrypt_bytes(b"secret"))
+        raw[-1] ^= 1
+        with pytest.raises(InvalidTag):
+            self.enc.decrypt_bytes(bytes(raw))
+
+
+class TestKeyRing:
+    def test_prefix_and_round_trip(self):
+        ring = KeyRing({"k1": OLD_KEY}, "k1")
+        stored = ring.encrypt("héllo")
+        assert stored.startswith("enc:k1:")
+        assert ring.decrypt(stored) == "héllo"
+        assert not ring.needs_rotation(stored)
+
+    def test_legacy_plaintext_passes_through(self):
+        ring = KeyRing({"k1": OLD_KEY}, "k1")
+        assert ring.decrypt("plain old row") == "plain old row"
+        assert ring.needs_rotation("plain old row")
+
+    def test_rotation_keeps_old_keys_readable(self):
+        old = KeyRing({"k1": OLD_KEY}, "k1").encrypt("secret")
+        ring = KeyRing({"k1": OLD_KEY, "k2": NEW_KEY}, "k2")
+        assert ring.decrypt(old) == "secret"
+        assert ring.needs_rotation(old)
+        moved = ring.reencrypt(old)
+        assert moved.startswith("enc:k2:") and ring.decrypt(moved) == "secret"
+
+    def test_unknown_kid_left_as_is_but_not_rewrapped(self):
+        stored = KeyRing({"k9": OLD_KEY}, "k9").encrypt("secret")
+        ring = KeyRing({"k1": OLD_KEY}, "k1")
+        assert ring.decrypt(stored) == stored
+        with pytest.raises(ValueError, match="Unknown encryption key id 'k9'"):
+            ring.reencrypt(stored)
+        with pytest.raises(ValueError):
+            KeyRing({"k1": OLD_KEY}, "missing")
+
+    def test_plaintext_that_looks_like_an_envelope(self):
+        ring = KeyRing({"default": OLD_KEY}, "default")
+        for text in ("enc: see attached", "enc:default:not base64!", "enc:default:aGVsbG8=", "enc:"):
+            assert ring.decrypt(text) == text
+            assert ring.decrypt(ring.reencrypt(text)) == text
+
+
+class TestKeyParsing:
+    def test_hex_and_base64_keys(self):
+        raw = bytes(range(32))
+        assert parse_key(raw.hex()) == raw
+        assert parse_key(base64.b64encode(raw).decode()) == raw
+        # Short hex keys keep their historical zero padding
+        assert parse_key("0123456789abcdef") == bytes.fromhex("0123456789abcdef".ljust(64, "0"))
+
+    def test_malformed_key_has_clear_error(self):
+        for bad in ("not a key", base64.b64encode(b"too short").decode(), ""):
+            with pytest.raises(ValueError, match="64 hex characters or base64 of 32 bytes"):
+                parse_key(bad)
+
+    def test_production_refuses_default_key(self, monkeypatch):
+        monkeypatch.setattr(encryption.settings, "APP_ENV", "production")
+        with pytest.raises(RuntimeError, match="development default"):
+            encryption.check_production_key()
+        monkeypatch.setattr(encryption.settings, "AES_ENCRYPTION_KEY", NEW_KEY)
+        encryption.check_production_key()
+
+    def test_encryption_service_shim(self):
+        service = encryption.encryption_service
+        assert service is encryption.encryption_service
+        assert service.decrypt(service.encrypt("x")) == "x"
+
+    def test_app_imports_without_parsing_keys(self):
+        env = {**os.environ, "AES_ENCRYPTION_KEY": "not-a-valid-key"}
+        result = subprocess.run(
+            [sys.executable, "-c", "import app.main"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+
+async def _stored_contents(session_factory):
+    async with session_factory() as db:
+        raw = type_coerce(Message.__table__.c.content, Text)
+        return (await db.execute(select(raw).order_by(Message.id))).scalars().all()
+
+
+async def _seed(session_factory, session_id, contents):
+    async with session_factory() as db:
+        conv = Conversation(session_id=session_id, title="t")
+        db.add(conv)
+        await db.flush()
+        for text in contents:
+            db.add(Message(conversation_id=conv.id, role="user", content=text))
+        await db.commit()
+        return conv.id
+
+
+@pytest.mark.asyncio
+async def test_message_content_encrypted_at_rest(session_factory):
+    conv_id = await _seed(session_factory, "enc-sess", ["I have a headache", "and a fever"])
+    stored = await _stored_contents(session_factory)
+    assert all(v.startswith("enc:default:") for v in stored)
+    assert "headache" not in "".join(stored)
+
+    async with session_factory() as db:
+        messages = (await db.execute(
+            select(Message).options(undefer(Message.content))
+            .where(Message.conversation_id == conv_id).order_by(Message.id)
+        )).scalars().all()
+    assert [m.content for m in messages] == ["I have a headache", "and a fever"]
+
+
+@pytest.mark.asyncio
+async def test_unencrypted_content_starting_with_prefix_is_readable(client, session_factory, monkeypatch):
+    monkeypatch.setattr(encryption.settings, "ENCRYPT_AT_REST", False)
+    conv_id = await _seed(session_factory, "plain-sess", ["enc:foo is my username"])
+    assert await _stored_contents(session_factory) == ["enc:foo is my username"]
+
+    client.cookies.set("healthbot_session", "plain-sess")
+    res = await client.get(f"/api/chat/conversations/{conv_id}")
+    assert res.status_code == 200
+    assert res.json()["messages"][0]["content"] == "enc:foo is my username"
+
+
+@pytest.mark.asyncio
+async def test_listing_and_loading_do_not_decrypt(client, session_factory, monkeypatch):
+    conv_id = await _seed(session_factory, "lazy-sess", [f"m{i}" for i in range(5)])
+    calls = []
+    ring = encryption.get_keyring()
+    monkeypatch.setattr(ring, "decrypt", lambda stored: calls.append(stored) or KeyRing.decrypt(ring, stored))
+
+    client.cookies.set("healthbot_session", "lazy-sess")
+    res = await client.get("/api/chat/conversations")
+    assert res.status_code == 200 and res.json()[0]["message_count"] == 5
+    async with session_factory() as db:
+        messages = (await db.execute(select(Message).where(Message.conversation_id == conv_id))).scalars().all()
+        assert len(messages) == 5
+    assert calls == []
+
+    # Rendering the transcript decrypts exactly the rendered messages
+    res = await client.get(f"/api/chat/conversations/{conv_id}")
+    assert [m["content"] for m in res.json()["messages"]] == [f"m{i}" for i in range(5)]
+    assert len(calls) == 5
+
+
+@pytest.mark.asyncio
+async def test_reencryption_job_rotates_in_batches(session_factory, monkeypatch):
+    old_ring = KeyRing({"default": OLD_KEY}, "default")
+    monkeypatch.setattr(encryption, "keyring", old_ring)
+    await _seed(session_factory, "rot-sess", [f"note {i}" for i in range(7)])
+    async with session_factory() as db:
+        # A legacy plaintext row written before encryption was enabled
+        await db.execute(Message.__table__.update().where(Message.id == 1).values(
+            content=type_coerce("legacy note", Text)))
+        await db.commit()
+
+    new_ring = KeyRing({"default": OLD_KEY, "k2": NEW_KEY}, "k2")
+    monkeypatch.setattr(encryption, "keyring", new_ring)
+    assert await reencrypt_column(session_factory, Message.content, batch_size=3) == 7
+    stored = await _stored_contents(session_factory)
+    assert all(v.startswith("enc:k2:") for v in stored)
+    assert [new_ring.decrypt(v) for v in stored] == ["legacy note"] + [f"note {i}" for i in range(1, 7)]
+
+    # Nothing left to move on a second pass
+    assert await reencrypt_column(session_factory, Message.content, batch_size=3) == 0
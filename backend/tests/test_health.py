@@ -0,0 +1,248 @@
+"""
+Tests for startup warm-up and the health / readiness endpoints.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.main import app
+from app.routers import health as health_router
+from app.services import health
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from app.services.gemini_service import AIService
+from app.services.warmup import Warmup, OK, FAILED
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def fresh_health_cache():
+    health.health_checker.clear()
+    yield
+    health.health_checker.clear()
+
+
+async def _finished_warmup(monkeypatch) -> Warmup:
+    warmup = Warmup()
+    monkeypatch.setattr(health_router, "warmup", warmup)
+    await warmup.start({})
+    return warmup
+
+
+def test_heavy_libraries_not_imported_with_app():
+    out = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, app.main; print([m for m in ('sklearn', 'joblib', 'openai', 'torch', 'spacy') if m in sys.modules])"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    assert out.strip() == "[]"
+
+
+@pytest.mark.asyncio
+async def test_warmup_records_each_step():
+    gate = asyncio.Event()
+
+    async def slow():
+        await gate.wait()
+
+    async def broken():
+        raise RuntimeError("model missing")
+
+    warmup = Warmup()
+    task = warmup.start({"slow": slow, "broken": broken})
+    await asyncio.sleep(0)
+    assert not warmup.ready
+    gate.set()
+    await task
+    assert warmup.ready
+    assert warmup.steps == {"slow": OK, "broken": FAILED}
+
+
+@pytest.mark.asyncio
+async def test_readiness_follows_warmup(client: AsyncClient, monkeypatch):
+    gate = asyncio.Event()
+
+    async def step():
+        await gate.wait()
+
+    warmup = Warmup()
+    monkeypatch.setattr(health_router, "warmup", warmup)
+    monkeypatch.setattr(settings, "HEALTH_READY_CHECKS", "database")
+    task = warmup.start({"nlp": step})
+
+    res = await client.get("/api/health/ready")
+    assert res.status_code == 503
+    assert res.json()["status"] == "warming_up"
+    # Liveness is unaffected by warm-up
+    assert (await client.get("/api/health")).status_code == 200
+
+    gate.set()
+    await task
+    res = await client.get("/api/health/ready")
+    assert res.status_code == 200
+    assert res.json()["warmup"]["steps"] == {"nlp": OK}
+    assert res.json()["checks"]["database"]["status"] == health.OK
+
+
+@pytest.mark.asyncio
+async def test_liveness_checks_nothing(client: AsyncClient):
+    res = await client.get("/api/health/live")
+    assert res.status_code == 200 and res.json() == {"status": "alive"}
+
+
+class _Pipeline:
+    _initialized = True
+    models_loaded = False
+    load_error = "Can't find model 'en_core_web_sm'"
+
+
+class _LocalAI:
+    is_configured = True
+    is_ready = False
+    _loading = False
+    _model_id = "tiny"
+    load_error = "CUDA out of memory"
+
+
+class _AIService:
+    is_configured = True
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_degraded_subsystems(client: AsyncClient, monkeypatch):
+    await _finished_warmup(monkeypatch)
+    ai = _AIService()
+    monkeypatch.setattr(app.state, "nlp_pipeline", _Pipeline(), raising=False)
+    monkeypatch.setattr(app.state, "local_ai_service", _LocalAI(), raising=False)
+    monkeypatch.setattr(app.state, "gemini_service", ai, raising=False)
+
+    res = await client.get("/api/health/ready")
+    assert res.status_code == 503
+    checks = res.json()["checks"]
+    assert res.json()["status"] == "not_ready"
+    assert checks["database"]["status"] == health.OK
+    assert checks["nlp"] == {"status": health.DOWN, "reason": _Pipeline.load_error}
+    assert checks["tier2"] == {"status": health.DOWN, "reason": _LocalAI.load_error}
+    assert checks["tier3"] == {"status": health.OK, "circuit": CLOSED}
+
+    # Only the configured checks gate readiness
+    monkeypatch.setattr(settings, "HEALTH_READY_CHECKS", "database,tier3")
+    assert (await client.get("/api/health/ready")).status_code == 200
+
+    ai.breaker.record_failure()
+    ai.breaker.record_failure()
+    health.health_checker.clear()
+    res = await client.get("/api/health/ready")
+    assert res.status_code == 503
+    assert res.json()["checks"]["tier3"]["circuit"] == OPEN
+
+
+@pytest.mark.asyncio
+async def test_missing_optional_libraries_do_not_gate_readiness(client: AsyncClient, monkeypatch):
+    await _finished_warmup(monkeypatch)
+    pipeline = SimpleNamespace(_initialized=True, models_loaded=False, dependency_missing=True,
+                               load_error="No module named 'spacy'")
+    monkeypatch.setattr(app.state, "nlp_pipeline", pipeline, raising=False)
+    monkeypatch.setattr(app.state, "local_ai_service", None, raising=False)
+    monkeypatch.setattr(app.state, "gemini_service", None, raising=False)
+    monkeypatch.setattr(settings, "HEALTH_READY_CHECKS", settings.model_fields["HEALTH_READY_CHECKS"].default)
+
+    res = await client.get("/api/health/ready")
+    checks = res.json()["checks"]
+    assert checks["nlp"] == {"status": health.DISABLED, "reason": "No module named 'spacy'"}
+    # Tier 3 is down (no NVIDIA key) but does not gate readiness by default
+    assert checks["tier3"]["status"] == health.DOWN
+    assert res.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_readiness_checks_are_cached(client: AsyncClient, monkeypatch):
+    await _finished_warmup(monkeypatch)
+    calls = []
+    real = health.check_database
+
+    async def counting(session_factory):
+        calls.append(1)
+        return await real(session_factory)
+
+    monkeypatch.setattr(health, "check_database", counting)
+    await asyncio.gather(*(client.get("/api/health/ready") for _ in range(10)))
+    await client.get("/api/health/ready")
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_database_check_reports_failure():
+    class _Broken:
+        def __call__(self):
+            raise ConnectionError("connection refused")
+
+    result = await health.check_database(_Broken())
+    assert result["status"] == health.DOWN
+    assert "connection refused" in result["reason"]
+
+
+def test_circuit_breaker_opens_and_recovers(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.circuit_breaker.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] += 30
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # the single trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    now[0] += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_call_releases_the_circuit():
+    gate = threading.Event()
+
+    def create(**kwargs):
+        gate.wait(5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+                               usage=SimpleNamespace(total_tokens=3))
+
+    ai = AIService()
+    ai._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    ai.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    ai.breaker.record_failure()
+    assert ai.breaker.state == HALF_OPEN
+
+    task = asyncio.create_task(ai.generate_response_with_usage("hello"))
+    await asyncio.sleep(0.05)
+    assert ai.breaker.trial_in_flight
+    assert health.check_tier3(ai)["status"] == health.DOWN  # calls are being rejected
+
+    task.cancel()  # e.g. the SSE client went away
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    gate.set()
+    assert not ai.breaker.trial_in_flight
+    assert health.check_tier3(ai) == {"status": health.OK, "circuit": HALF_OPEN}
+    # The next request gets to be the trial and closes the circuit
+    assert await ai.generate_response_with_usage("hello") == ("ok", 3)
+    assert ai.breaker.state == CLOSED
@@ -0,0 +1,73 @@
+"""
+Tests for JWT verification, the verified-token cache and key rotation.
+"""
+from datetime import timedelta
+
+import pytest
+from httpx import AsyncClient
+from jose import jwt
+
+from app.config import settings
+from app.utils import jwt_handler
+from app.utils.jwt_handler import create_access_token, verify_token, token_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def test_repeat_verification_is_served_from_cache(monkeypatch):
+    token = create_access_token({"sub": "1"})
+    assert verify_token(token)["sub"] == "1"
+
+    def fail(_token):
+        raise AssertionError("decoded twice")
+    monkeypatch.setattr(jwt_handler, "_decode", fail)
+    assert verify_token(token)["sub"] == "1"
+
+
+def test_cached_payload_is_not_shared():
+    token = create_access_token({"sub": "1"})
+    verify_token(token)["sub"] = "2"
+    assert verify_token(token)["sub"] == "1"
+
+
+def test_expired_and_tampered_tokens_rejected():
+    expired = create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))
+    assert verify_token(expired) is None
+    token = create_access_token({"sub": "1"})
+    assert verify_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB")) is None
+    assert verify_token("not-a-jwt") is None
+
+
+def test_key_rotation_by_kid(monkeypatch):
+    monkeypatch.setattr(settings, "JWT_SIGNING_KEYS", "old:old-secret,new:new-secret")
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "old")
+    old_token = create_access_token({"sub": "1"})
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "new")
+    new_token = create_access_token({"sub": "2"})
+
+    assert verify_token(old_token)["sub"] == "1"
+    assert verify_token(new_token)["sub"] == "2"
+
+    # Retiring the old key also retires tokens already in the cache
+    monkeypatch.setattr(settings, "JWT_SIGNING_KEYS", "new:new-secret")
+    assert verify_token(old_token) is None
+    assert verify_token(new_token)["sub"] == "2"
+
+
+@pytest.mark.parametrize("kid", [["old"], {"k": "v"}, 7])
+def test_non_string_kid_rejected(monkeypatch, kid):
+    monkeypatch.setattr(settings, "JWT_SIGNING_KEYS", "old:old-secret")
+    token = jwt.encode({"sub": "1"}, "old-secret", algorithm=settings.JWT_ALGORITHM, headers={"kid": kid})
+    assert verify_token(token) is None
+
+
+@pytest.mark.asyncio
+async def test_non_string_kid_is_unauthorized(client: AsyncClient):
+    token = jwt.encode({"sub": "1"}, "x", algorithm=settings.JWT_ALGORITHM, headers={"kid": ["a", "b"]})
+    res = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 401
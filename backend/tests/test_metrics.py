@@ -0,0 +1,95 @@
+"""
+Tests for the in-process Prometheus metrics and the /metrics endpoint.
+"""
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.main import app
+from app.routers import chat
+from app.services import metrics
+from app.services.chat_service import MessageWriteBehind, get_message_writer
+
+
+def test_exposition_format():
+    registry = metrics.Registry()
+    requests = registry.register(metrics.Counter("demo_requests", "Requests.", ["route"]))
+    latency = registry.register(metrics.Histogram("demo_seconds", "Latency.", buckets=(0.1, 1)))
+    depth = registry.register(metrics.Gauge("demo_depth", "Depth."))
+
+    requests.labels(route='/say "hi"').inc()
+    requests.labels(route='/say "hi"').inc(2)
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+    depth.set_function(lambda: 7)
+
+    text = registry.render()
+    assert "# TYPE demo_requests counter" in text
+    assert 'demo_requests_total{route="/say \\"hi\\""} 3' in text
+    assert 'demo_seconds_bucket{le="0.1"} 2' in text  # le is inclusive
+    assert 'demo_seconds_bucket{le="1"} 3' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 4' in text
+    assert "demo_seconds_count 4" in text
+    assert "demo_seconds_sum 3.65" in text
+    assert "demo_depth 7" in text
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric("demo", "Demo.")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_requires_token(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert (await client.get("/metrics")).status_code == 401
+    wrong = await client.get("/metrics", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401
+    ok = await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert ok.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_off_in_production_without_token(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "APP_ENV", "production")
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert (await client.get("/metrics")).status_code == 404
+
+
+class _StubPipeline:
+    async def process(self, text, context=None):
+        return {"response": "Rest and drink fluids.", "intent": "greeting",
+                "confidence": 0.95, "entities": [], "is_emergency": False}
+
+
+@pytest.mark.asyncio
+async def test_chat_send_records_stages_and_tier(client: AsyncClient, session_factory, monkeypatch):
+    async def _get():
+        return _StubPipeline()
+    monkeypatch.setattr(chat, "_get_nlp_pipeline", _get)
+    writer = MessageWriteBehind(session_factory, max_batch=50, flush_interval=60)
+    app.dependency_overrides[get_message_writer] = lambda: writer
+
+    def count(stage):
+        return sum(metrics.STAGE_SECONDS.labels(stage=stage).counts)
+
+    stages = ("emergency", "context", "db_commit", "nlp", "format")
+    before = {stage: count(stage) for stage in stages}
+    tier_before = metrics.TIER_SELECTED.labels(tier="nlp_ml").value
+    sse_before = sum(metrics.SSE_STREAM_SECONDS._children[()].counts)
+
+    res = await client.post("/api/chat/send", json={"message": "hello, I have a headache"})
+    assert res.status_code == 200
+    await writer.stop()
+
+    assert all(count(stage) == before[stage] + 1 for stage in stages)
+    assert metrics.TIER_SELECTED.labels(tier="nlp_ml").value == tier_before + 1
+    assert sum(metrics.SSE_STREAM_SECONDS._children[()].counts) == sse_before + 1
+    assert count("write_behind_commit") >= 1
+
+    scrape = await client.get("/metrics")
+    assert scrape.status_code == 200
+    assert scrape.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'healthbot_chat_stage_seconds_bucket{stage="nlp",le="+Inf"}' in scrape.text
+    assert 'healthbot_chat_tier_selected_total{tier="nlp_ml"}' in scrape.text
+    assert "healthbot_write_behind_backlog" in scrape.text
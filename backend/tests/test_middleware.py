@@ -0,0 +1,165 @@
+"""
+Tests for the ASGI middlewares.
+"""
+import pytest
+from httpx import AsyncClient, ASGITransport
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.middleware.rate_limiter import ClientAddress, LocalTokenBucket, RateLimiterMiddleware
+from app.middleware.security_headers import SECURITY_HEADERS, SecurityHeadersMiddleware
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+requires_fakeredis = pytest.mark.skipif(fakeredis is None, reason="fakeredis not installed")
+
+
+async def _plain(request):
+    return PlainTextResponse("ok", headers={"X-Frame-Options": "SAMEORIGIN"})
+
+
+async def _stream(request):
+    async def events():
+        yield "data: one\n\n"
+        yield "data: two\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@pytest.fixture
+def headers_app():
+    return Starlette(
+        routes=[Route("/plain", _plain), Route("/stream", _stream)],
+        middleware=[Middleware(SecurityHeadersMiddleware)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_security_headers_replace_existing(headers_app):
+    async with AsyncClient(transport=ASGITransport(app=headers_app), base_url="http://test") as c:
+        response = await c.get("/plain")
+    for name, value in SECURITY_HEADERS.items():
+        assert response.headers.get_list(name) == [value]
+
+
+@pytest.mark.asyncio
+async def test_security_headers_on_streaming_response(headers_app):
+    async with AsyncClient(transport=ASGITransport(app=headers_app), base_url="http://test") as c:
+        response = await c.get("/stream")
+    assert response.headers["Content-Security-Policy"] == "default-src 'self'"
+    assert response.text == "data: one\n\ndata: two\n\n"
+
+
+@pytest.mark.asyncio
+async def test_app_health_has_security_headers(client):
+    response = await client.get("/api/health")
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+# --- Rate limiter ---
+
+
+async def _ok(request):
+    return JSONResponse({"ok": True})
+
+
+def _limited_app(redis_client, requests_per_minute=10):
+    return Starlette(
+        routes=[Route("/api/health", _ok), Route("/api/chat/send", _ok, methods=["POST"]), Route("/api/other", _ok)],
+        middleware=[Middleware(
+            RateLimiterMiddleware,
+            requests_per_minute=requests_per_minute,
+            route_costs={"/api/health": 0, "/api/chat/send": 5},
+            redis_client=redis_client,
+        )],
+    )
+
+
+@pytest.fixture
+def enable_rate_limit(monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+@requires_fakeredis
+@pytest.mark.asyncio
+async def test_rate_limit_weighted_costs_with_redis(enable_rate_limit):
+    redis = fakeredis.FakeAsyncRedis()
+    app = _limited_app(redis)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        # Bucket of 10: two chat sends (cost 5 each) drain it
+        assert (await c.post("/api/chat/send")).status_code == 200
+        assert (await c.post("/api/chat/send")).status_code == 200
+        blocked = await c.get("/api/other")
+        assert blocked.status_code == 429
+        assert int(blocked.headers["Retry-After"]) >= 1
+        # Exempt routes never spend tokens
+        assert (await c.get("/api/health")).status_code == 200
+    assert await redis.exists("rate_limit:127.0.0.1")
+
+
+@requires_fakeredis
+@pytest.mark.asyncio
+async def test_rate_limit_is_atomic_under_concurrency(enable_rate_limit):
+    import asyncio
+
+    app = _limited_app(fakeredis.FakeAsyncRedis(), requests_per_minute=20)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        responses = await asyncio.gather(*(c.get("/api/other") for _ in range(50)))
+    assert sum(r.status_code == 200 for r in responses) == 20
+
+
+class _BrokenRedis:
+    def register_script(self, script):
+        async def call(**kwargs):
+            raise ConnectionError("redis down")
+        return call
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_falls_back_to_local_buckets(enable_rate_limit, monkeypatch):
+    monkeypatch.setattr(RateLimiterMiddleware, "REDIS_RETRY_SECONDS", 3600)
+    app = _limited_app(_BrokenRedis(), requests_per_minute=3)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        codes = [(await c.get("/api/other")).status_code for _ in range(5)]
+    assert codes == [200, 200, 200, 429, 429]
+
+
+def test_local_bucket_refills():
+    bucket = LocalTokenBucket(capacity=2, rate=1000)
+    assert bucket.take("k", 2) == (True, 0.0)
+    allowed, retry_after = bucket.take("k", 2)
+    assert not allowed and retry_after > 0
+
+
+def _scope(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return {"type": "http", "client": (peer, 50000), "headers": headers}
+
+
+def test_client_address_from_trusted_proxy():
+    resolve = ClientAddress(["127.0.0.1", "10.0.0.0/8"])
+    # Direct clients are keyed on their own address, whatever they send
+    assert resolve(_scope("203.0.113.9", "1.2.3.4")) == "203.0.113.9"
+    # Through nginx: the address nginx appended, not the client-supplied one
+    assert resolve(_scope("10.0.0.5", "6.6.6.6, 198.51.100.7")) == "198.51.100.7"
+    assert resolve(_scope("10.0.0.5", "198.51.100.7, 10.0.0.8")) == "198.51.100.7"
+    assert resolve(_scope("10.0.0.5")) == "10.0.0.5"
+
+    trust_all = ClientAddress(["*"])
+    assert trust_all(_scope("172.20.0.3", "6.6.6.6, 198.51.100.7")) == "198.51.100.7"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_buckets_per_forwarded_client(enable_rate_limit):
+    app = _limited_app(_BrokenRedis(), requests_per_minute=2)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        a = [(await c.get("/api/other", headers={"X-Forwarded-For": "198.51.100.1"})).status_code
+             for _ in range(3)]
+        b = await c.get("/api/other", headers={"X-Forwarded-For": "198.51.100.2"})
+    assert a == [200, 200, 429]
+    assert b.status_code == 200
@@ -0,0 +1,93 @@
+"""
+Query-plan tests for the hot chat queries.
+
+The SQL actually emitted by chat_service is captured and re-run under
+EXPLAIN, so the assertions follow the service code rather than a copy of it.
+Set TEST_POSTGRES_URL (postgresql+asyncpg://...) to also check PostgreSQL.
+"""
+import os
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.services import chat_service
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+async def _capture(session, coro_fn):
+    """Run a service call and return the (statement, params) of its last SELECT."""
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        await coro_fn(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return captured[-1]
+
+
+async def _sqlite_plan(session, statement, params) -> str:
+    conn = await session.connection()
+    result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params)
+    return "\n".join(row[-1] for row in result.fetchall())
+
+
+async def _postgres_plan(session, statement, params) -> str:
+    conn = await session.connection()
+    await conn.exec_driver_sql("SET enable_seqscan = off")
+    result = await conn.exec_driver_sql("EXPLAIN " + statement, params)
+    return "\n".join(row[0] for row in result.fetchall())
+
+
+# Exercise the keyset branch as well as the first page
+CURSOR = chat_service.encode_cursor(datetime(2026, 1, 1), 10)
+
+HOT_QUERIES = [
+    ("context", lambda db: chat_service.get_conversation_context(db, 1), "ix_messages_conversation_created_id"),
+    ("history", lambda db: chat_service.get_conversation_messages(db, 1, "s1", before=CURSOR), "ix_messages_conversation_created_id"),
+    ("listing", lambda db: chat_service.get_user_conversations(db, "s1", cursor=CURSOR), "ix_conversations_session_updated_id"),
+]
+
+
+@pytest_asyncio.fixture(params=["sqlite"] + (["postgres"] if POSTGRES_URL else []))
+async def plan_session(request):
+    url = "sqlite+aiosqlite:///:memory:" if request.param == "sqlite" else POSTGRES_URL
+    engine = create_async_engine(url, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "INSERT INTO conversations (id, session_id, title, is_active, created_at, updated_at) "
+            "VALUES (1, 's1', 't', true, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+        ))
+    async with sessionmaker(engine, class_=AsyncSession)() as session:
+        yield request.param, session
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name,call,index", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+async def test_hot_query_uses_composite_index(plan_session, name, call, index):
+    dialect, session = plan_session
+    statement, params = await _capture(session, call)
+
+    if dialect == "sqlite":
+        plan = await _sqlite_plan(session, statement, params)
+        assert index in plan, plan
+        assert "TEMP B-TREE" not in plan, plan  # no separate sort step
+    else:
+        plan = await _postgres_plan(session, statement, params)
+        assert index in plan, plan
+        assert "Seq Scan" not in plan and "Sort" not in plan, plan
@@ -0,0 +1,249 @@
+"""
+Tests for the symptom checker flow and its session stores.
+"""
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.main import app
+from app.services.symptom_session_store import (
+    InMemorySessionStore, RedisSessionStore, SessionState, SymptomSessionStore, get_session_store,
+)
+
+
+@pytest.fixture
+def store(client):
+    s = InMemorySessionStore(ttl=60, max_sessions=100)
+    app.dependency_overrides[get_session_store] = lambda: s
+    return s
+
+
+async def _walk_first_options(client: AsyncClient, session_id: str):
+    """Always pick option 0 until the checker returns a result."""
+    for _ in range(50):
+        response = await client.post("/api/symptoms/answer", json={"session_id": session_id, "option_index": 0})
+        assert response.status_code == 200
+        data = response.json()
+        if data.get("is_final") and "result" in data:
+            return data
+    raise AssertionError("symptom checker never finished")
+
+
+@pytest.mark.asyncio
+async def test_full_session_flow(client: AsyncClient, store):
+    start = await client.post("/api/symptoms/start")
+    assert start.status_code == 200
+    session_id = start.json()["session_id"]
+    assert start.json()["node_id"] == "root"
+    assert len(store) == 1
+
+    result = await _walk_first_options(client, session_id)
+    assert result["result"]["conditions"]
+    assert result["result"]["urgency"] in ("low", "medium", "high")
+    # Completed sessions are removed
+    assert len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_session_and_bad_option(client: AsyncClient, store):
+    missing = await client.post("/api/symptoms/answer", json={"session_id": "nope", "option_index": 0})
+    assert missing.status_code == 400
+
+    session_id = (await client.post("/api/symptoms/start")).json()["session_id"]
+    bad = await client.post("/api/symptoms/answer", json={"session_id": session_id, "option_index": 99})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_memory_store_is_bounded_and_expires():
+    store = InMemorySessionStore(ttl=60, max_sessions=2)
+    for sid in ("a", "b", "c"):
+        await store.set(sid, SessionState(0, [], np.zeros(3, dtype=np.float32)))
+    assert len(store) == 2
+    assert await store.get("a") is None
+
+    expiring = InMemorySessionStore(ttl=0, max_sessions=10)
+    await expiring.set("a", SessionState(0))
+    assert await expiring.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_store_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    store = RedisSessionStore(ttl=60, fallback=InMemorySessionStore(60, 10), redis_client=redis)
+
+    state = SessionState(3, [0], np.array([0.0, 2.0, 1.5], dtype=np.float32))
+    await store.set("s1", state)
+    loaded = await store.get("s1")
+    assert (loaded.node, loaded.path) == (3, [0])
+    np.testing.assert_array_equal(loaded.scores, state.scores)
+    assert 0 < await redis.ttl("symptom_session:s1") <= 60
+    await store.delete("s1")
+    assert await store.get("s1") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_store_degrades_to_memory_on_errors():
+    redis_exceptions = pytest.importorskip("redis.exceptions")
+
+    class _DownRedis:
+        async def get(self, *args, **kwargs):
+            raise redis_exceptions.ConnectionError("redis down")
+
+        set = delete = get
+
+    memory = InMemorySessionStore(60, 10)
+    store = RedisSessionStore(ttl=60, fallback=memory, redis_client=_DownRedis())
+    await store.set("s1", SessionState(3, [0], np.zeros(2, dtype=np.float32)))
+    assert len(memory) == 1
+    assert (await store.get("s1")).node == 3
+    await store.delete("s1")
+    assert await store.get("s1") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_store_treats_old_payloads_as_expired():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    store = RedisSessionStore(ttl=60, fallback=InMemorySessionStore(60, 10), redis_client=redis)
+
+    # Format written by the previous release: string node id, dense score list
+    await redis.set("symptom_session:old", '{"n":"root","p":[],"s":[0.0,1.0]}')
+    await redis.set("symptom_session:junk", "not json")
+    assert await store.get("old") is None
+    assert await store.get("junk") is None
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SymptomSessionStore()
+
+
+def _reference_result(tree_json, path):
+    """The original dict-walking checker: stable sort, so ties keep first-scored order."""
+    node_id, scores = "root", {}
+    for option_index in path:
+        option = tree_json["nodes"][node_id]["options"][option_index]
+        for condition, score in option.get("scores", {}).items():
+            scores[condition] = scores.get(condition, 0) + score
+        node_id = option.get("next")
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    total = sum(s for _, s in ranked)
+    conditions = [(name, round((score / total) * 100, 1)) for name, score in ranked[:3]]
+    max_score = ranked[0][1] if ranked else 0
+    urgency = "high" if max_score > 5 else "medium" if max_score > 3 else "low"
+    return conditions, urgency
+
+
+def _all_paths(tree_json, node_id="root", prefix=()):
+    node = tree_json["nodes"][node_id]
+    for i, option in enumerate(node["options"]):
+        nxt = option.get("next")
+        if nxt is None or nxt not in tree_json["nodes"] or tree_json["nodes"][nxt].get("is_final"):
+            yield prefix + (i,)
+        else:
+            yield from _all_paths(tree_json, nxt, prefix + (i,))
+
+
+def test_compiled_tree_matches_reference_on_every_path():
+    from app.services.symptom_checker import SymptomCheckerSession, _load_tree, generate_result
+
+    tree = _load_tree()
+    tree_json = tree.tree
+    paths = list(_all_paths(tree_json))
+    assert paths
+    for path in paths:
+        session = SymptomCheckerSession()
+        for option_index in path:
+            result = session.answer(option_index)
+        assert result["is_final"]
+        # Both the precomputed table and the live computation
+        computed = generate_result(tree, session.state.scores, tree.scoring_order(list(path)))
+        assert computed == result, path
+        conditions = [(c["name"], c["probability"]) for c in result["result"]["conditions"]]
+        assert (conditions, result["result"]["urgency"]) == _reference_result(tree_json, path), path
+
+
+@pytest.mark.asyncio
+async def test_stateless_flow_matches_session_flow(client: AsyncClient, store):
+    start = await client.post("/api/symptoms/stateless/start")
+    assert start.status_code == 200
+    token = start.json()["token"]
+
+    for _ in range(50):
+        response = await client.post("/api/symptoms/stateless/answer", json={"token": token, "option_index": 0})
+        assert response.status_code == 200
+        data = response.json()
+        if "result" in data:
+            break
+        token = data["token"]
+    stateless_result = data
+
+    session_id = (await client.post("/api/symptoms/start")).json()["session_id"]
+    assert stateless_result == await _walk_first_options(client, session_id)
+    assert len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_stateless_rejects_forged_tokens(client: AsyncClient):
+    from app.services.symptom_checker import encode_path_token
+
+    token = encode_path_token([0])
+    body, mac = token.split(".")
+    forged = f"{encode_path_token([1]).split('.')[0]}.{mac}"
+    for bad in (forged, "garbage", body):
+        response = await client.post("/api/symptoms/stateless/answer", json={"token": bad, "option_index": 0})
+        assert response.status_code == 400
+
+    out_of_range = await client.post("/api/symptoms/stateless/answer", json={"token": token, "option_index": 99})
+    assert out_of_range.status_code == 400
+
+
+def _tree(**nodes):
+    return {"nodes": nodes, "conditions": {"flu": {}}}
+
+
+def test_validator_reports_structural_errors():
+    from app.services.symptom_tree_build import validate_tree
+
+    errors, warnings = validate_tree(_tree(
+        root={"question": "q", "options": [
+            {"text": "a", "next": "loop_a", "scores": {"flu": 1}},
+            {"text": "b", "next": "missing", "scores": {"mystery": 1}},
+        ]},
+        loop_a={"question": "q", "options": [{"text": "a", "next": "loop_b"}]},
+        loop_b={"question": "q", "options": [{"text": "a", "next": "loop_a"}]},
+        orphan={"question": "q", "options": [{"text": "a", "next": None}]},
+    ))
+    assert any("missing node 'missing'" in e for e in errors)
+    assert any("cycle through 'loop_a'" in e for e in errors)
+    assert any("'orphan' is unreachable" in e for e in errors)
+    assert warnings == ["node 'root' option 1 scores unknown condition 'mystery'"]
+
+    assert validate_tree({"nodes": {}}) == (["missing 'root' node"], [])
+
+
+def test_shipped_tree_is_valid_and_table_current():
+    from app.services.symptom_tree_build import main, validate_tree
+    from app.services.symptom_checker import _load_tree
+
+    errors, _ = validate_tree(_load_tree().tree)
+    assert errors == []
+    assert main(["--check"]) == 0
+
+
+def test_results_served_from_precomputed_table(monkeypatch):
+    from app.services import symptom_checker
+    from app.services.symptom_checker import SymptomCheckerSession, _load_tree
+
+    tree = _load_tree()
+    assert len(tree.results) == len(list(_all_paths(tree.tree)))
+
+    def fail(*args):
+        raise AssertionError("result computed instead of looked up")
+    monkeypatch.setattr(symptom_checker, "generate_result", fail)
+    session = SymptomCheckerSession()
+    while not (result := session.answer(0))["is_final"]:
+        pass
+    assert result["result"]["conditions"]
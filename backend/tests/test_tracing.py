@@ -0,0 +1,88 @@
+"""
+Tests for per-request stage timing (Server-Timing, SSE done event, trace log).
+"""
+import asyncio
+import contextvars
+import json
+import logging
+
+import pytest
+from httpx import AsyncClient
+
+from app.main import app
+from app.routers import chat
+from app.services.chat_service import MessageWriteBehind, get_message_writer
+from app.services.tracing import current_trace, span, start_trace
+
+
+def test_spans_accumulate_into_current_trace():
+    # Own context so the trace doesn't stay current for later tests
+    contextvars.copy_context().run(_record_spans)
+
+
+def _record_spans():
+    trace = start_trace("unit")
+    with span("ner"):
+        pass
+    with span("tier3_call"):
+        pass
+    with span("tier3_call"):
+        pass
+    timings = trace.timings()
+    assert set(timings) == {"ner", "tier3_call", "total"}
+    assert [name for name, _ in trace.spans] == ["ner", "tier3_call", "tier3_call"]
+    parts = trace.server_timing().split(", ")
+    assert parts[0].startswith("ner;dur=")
+    assert parts[-1].startswith("total;dur=")
+
+
+@pytest.mark.asyncio
+async def test_traces_are_isolated_per_task():
+    async def handle(name):
+        trace = start_trace(name)
+        with span(name):
+            await asyncio.sleep(0.01)
+        assert current_trace() is trace
+        return trace
+
+    a, b = await asyncio.gather(asyncio.create_task(handle("a")), asyncio.create_task(handle("b")))
+    assert [n for n, _ in a.spans] == ["a"]
+    assert [n for n, _ in b.spans] == ["b"]
+
+
+class _StubPipeline:
+    async def process(self, text, context=None):
+        with span("intent"):
+            pass
+        return {"response": "Rest and drink fluids.", "intent": "greeting",
+                "confidence": 0.95, "entities": [], "is_emergency": False}
+
+
+@pytest.mark.asyncio
+async def test_chat_send_reports_stage_timings(client: AsyncClient, session_factory, monkeypatch, caplog):
+    async def _get():
+        return _StubPipeline()
+    monkeypatch.setattr(chat, "_get_nlp_pipeline", _get)
+    writer = MessageWriteBehind(session_factory, max_batch=50, flush_interval=60)
+    app.dependency_overrides[get_message_writer] = lambda: writer
+
+    with caplog.at_level(logging.INFO, logger="app.trace"):
+        res = await client.post("/api/chat/send", json={"message": "hello, I have a headache"})
+    await writer.stop()
+    assert res.status_code == 200
+
+    stages = {entry.split(";")[0] for entry in res.headers["Server-Timing"].split(", ")}
+    assert {"emergency", "context", "db_commit", "intent", "nlp", "format", "total"} <= stages
+
+    events = [json.loads(line[len("data: "):]) for line in res.text.split("\n\n") if line.startswith("data: ")]
+    done = events[-1]
+    assert done["done"] is True
+    assert {"nlp", "intent", "total"} <= set(done["timings"])
+
+    [record] = [r for r in caplog.records if r.name == "app.trace"]
+    line = json.loads(record.getMessage())
+    assert line["event"] == "chat_send"
+    assert line["tier"] == "nlp_ml"
+    assert line["completed"] is True
+    assert line["conversation_id"] == int(res.headers["X-Conversation-Id"])
+    assert "stream_ms" in line and "nlp" in line["timings_ms"]
@@ -15,14 +15,26 @@ function AppContent() {
     const [conversations, setConversations] = useState<Conversation[]>([]);
     const [activeConvId, setActiveConvId] = useState<number | null>(null);
     const [sidebarOpen, setSidebarOpen] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
 
+    // The list is paginated: load the newest page, older pages on "Load more"
     const loadConversations = useCallback(async () => {
         try {
             const res = await api.get('/chat/conversations');
             setConversations(res.data);
+            setNextCursor(res.headers['x-next-cursor'] || null);
         } catch { }
     }, []);
 
+    const loadMoreConversations = useCallback(async () => {
+        if (!nextCursor) return;
+        try {
+            const res = await api.get('/chat/conversations', { params: { cursor: nextCursor } });
+            setConversations(prev => [...prev, ...res.data.filter((c: Conversation) => !prev.some(p => p.id === c.id))]);
+            setNextCursor(res.headers['x-next-cursor'] || null);
+        } catch { }
+    }, [nextCursor]);
+
     useEffect(() => { loadConversations(); }, [loadConversations]);
 
     const handleNewChat = () => {
@@ -62,6 +74,8 @@ function AppContent() {
                     onDelete={handleDeleteConv}
                     isOpen={sidebarOpen}
                     onToggle={() => setSidebarOpen(false)}
+                    hasMore={nextCursor !== null}
+                    onLoadMore={loadMoreConversations}
                 />
 
                 <div className="flex-1 flex flex-col min-w-0">
@@ -10,6 +10,8 @@ interface Props {
     onDelete: (id: number) => void;
     isOpen: boolean;
     onToggle: () => void;
+    hasMore: boolean;
+    onLoadMore: () => void;
 }
 
 interface GroupedConversations { label: string; conversations: Conversation[]; }
@@ -52,7 +54,7 @@ function Logo() {
     );
 }
 
-export default function Sidebar({ conversations, activeId, onSelect, onDelete, isOpen, onToggle }: Props) {
+export default function Sidebar({ conversations, activeId, onSelect, onDelete, isOpen, onToggle, hasMore, onLoadMore }: Props) {
     const grouped = useMemo(() => groupByDate(conversations), [conversations]);
     const location = useLocation();
 
@@ -139,6 +141,12 @@ export default function Sidebar({ conversations, activeId, onSelect, onDelete, i
                         </div>
                     ))
                 )}
+                {hasMore && (
+                    <button onClick={onLoadMore}
+                        className="w-full mt-1 px-3 py-1.5 rounded-lg text-[12px] font-medium text-teal-600 dark:text-teal-400 hover:bg-[#f0fdfa] dark:hover:bg-[#1a2332] transition-all duration-150">
+                        Load more
+                    </button>
+                )}
             </div>
         </div>
     );
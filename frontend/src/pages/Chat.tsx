@@ -18,22 +18,43 @@ export default function Chat({ conversations, activeConvId, setActiveConvId, onC
 
     const [messages, setMessages] = useState<ChatMessageType[]>([]);
     const [streamingContent, setStreamingContent] = useState('');
+    const [olderCursor, setOlderCursor] = useState<string | null>(null);
+    const [loadingOlder, setLoadingOlder] = useState(false);
 
     const messagesEndRef = useRef<HTMLDivElement>(null);
+    const keepScrollRef = useRef(false);
     const scrollToBottom = () => messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
 
-    useEffect(() => { scrollToBottom(); }, [messages, streamingContent]);
+    useEffect(() => {
+        // Prepending older messages must not jump the view to the bottom
+        if (keepScrollRef.current) { keepScrollRef.current = false; return; }
+        scrollToBottom();
+    }, [messages, streamingContent]);
 
     useEffect(() => {
         if (activeConvId) { loadMessages(activeConvId); }
-        else { setMessages([]); }
+        else { setMessages([]); setOlderCursor(null); }
     }, [activeConvId]);
 
+    // The newest page comes first; older pages are fetched on "Load older messages"
     const loadMessages = async (convId: number) => {
         try {
             const res = await api.get(`/chat/conversations/${convId}`);
             setMessages(res.data.messages || []);
+            setOlderCursor(res.data.next_cursor || null);
+        } catch { }
+    };
+
+    const loadOlderMessages = async () => {
+        if (!activeConvId || !olderCursor || loadingOlder) return;
+        setLoadingOlder(true);
+        try {
+            const res = await api.get(`/chat/conversations/${activeConvId}`, { params: { before: olderCursor } });
+            keepScrollRef.current = true;
+            setMessages(prev => [...(res.data.messages || []), ...prev]);
+            setOlderCursor(res.data.next_cursor || null);
         } catch { }
+        finally { setLoadingOlder(false); }
     };
 
     const handleSend = async (message: string) => {
@@ -141,9 +162,17 @@ export default function Chat({ conversations, activeConvId, setActiveConvId, onC
                 ) : (
                     /* ===== MESSAGES ===== */
                     <div className="max-w-3xl mx-auto w-full p-4">
+                        {olderCursor && (
+                            <div className="flex justify-center mb-4">
+                                <button onClick={loadOlderMessages} disabled={loadingOlder}
+                                    className="px-4 py-1.5 rounded-full text-[12px] font-medium text-teal-600 dark:text-teal-400 bg-[#f0fdfa] dark:bg-[#1a2332] hover:bg-[#ccfbf1] dark:hover:bg-[#1f2b3d] transition-all duration-150 disabled:opacity-50">
+                                    {loadingOlder ? 'Loading…' : 'Load older messages'}
+                                </button>
+                            </div>
+                        )}
                         <AnimatePresence>
                             {messages.map((msg) => (
-                                <ChatMessage key={msg.id} message={msg} />
+                                <ChatMessage key={msg.id ?? `pending-${msg.created_at}-${msg.role}`} message={msg} />
                             ))}
                         </AnimatePresence>
                         {isStreaming && streamingContent && <StreamingMessage content={streamingContent} />}
@@ -14,7 +14,7 @@ export interface TokenResponse {
 }
 
 export interface ChatMessage {
-    id: number;
+    id: number | null;  // null while the server has not written it yet
     role: 'user' | 'assistant';
     content: string;
     intent?: string;